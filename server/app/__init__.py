@@ -68,18 +68,75 @@ def create_app():
     if not db_path:
         raise RuntimeError("DB_PATH is missing – add to environment.")
     from .core import Controller
-    app.ctrl = Controller(db_path)  # type: ignore
+    app.ctrl = Controller(  # type: ignore
+        db_path,
+        frame_dir=app.config.get("FRAME_STORE_DIR"),
+        frame_keep=int(app.config.get("FRAME_STORE_KEEP") or 10),
+    )
     logger.info("Controller init: %s", db_path)
+    app.ctrl.db.query_stats.configure(  # type: ignore
+        slow_ms=app.config.get("DB_SLOW_QUERY_MS"),
+        enabled=bool(app.config.get("DB_QUERY_STATS")),
+    )
+    app.ctrl.api_key_cache.configure(  # type: ignore
+        max_entries=int(app.config.get("API_KEY_CACHE_SIZE") or 0),
+        ttl_s=float(app.config.get("API_KEY_CACHE_TTL_S") or 0),
+    )
+    app.ctrl.api_key_touches.configure(  # type: ignore
+        float(app.config.get("API_KEY_TOUCH_FLUSH_S") or 0))
+    app.ctrl.users.configure(  # type: ignore
+        float(app.config.get("USER_CACHE_TTL_S") or 0))
+    app.ctrl.kdf.configure(  # type: ignore
+        max_concurrency=int(app.config.get("KDF_MAX_CONCURRENCY") or 2),
+        max_waiting=int(app.config.get("KDF_MAX_WAITING") or 0),
+    )
+
+    # ─── Optional write-behind ingestion (group commit) ───
+    write_behind_ms = int(app.config.get("DB_WRITE_BEHIND_MS") or 0)
+    if write_behind_ms > 0:
+        app.ctrl.enable_write_behind(  # type: ignore
+            flush_interval_ms=write_behind_ms,
+            max_batch=int(app.config.get("DB_WRITE_BEHIND_MAX_ROWS") or 200),
+        )
+
+    # ─── Scheduled retention (replaces per-insert cleanup triggers) ───
+    retention_interval_s = int(app.config.get("DB_RETENTION_INTERVAL_S") or 0)
+    if retention_interval_s > 0:
+        app.ctrl.start_retention(  # type: ignore
+            interval_s=retention_interval_s,
+            logs_max_age_days=app.config.get("LOGS_MAX_AGE_DAYS"),
+            logs_max_rows=app.config.get("LOGS_MAX_ROWS"),
+        )
+
+    # ─── Off-peak DB maintenance (optimize, ANALYZE, incremental vacuum) ───
+    maintenance_hour = int(app.config.get("DB_MAINTENANCE_HOUR", -1))
+    if 0 <= maintenance_hour <= 23:
+        app.ctrl.start_maintenance(  # type: ignore
+            offpeak_hour=maintenance_hour,
+            convert_max_mb=float(app.config.get("DB_VACUUM_CONVERT_MAX_MB") or 0),
+        )
+
+    # ─── Scheduled online backups ───
+    backup_interval_s = int(app.config.get("BACKUP_INTERVAL_S") or 0)
+    if backup_interval_s > 0:
+        from .config import backup_options
+        try:
+            app.ctrl.start_backups(  # type: ignore
+                interval_s=backup_interval_s, **backup_options(app.config))
+        except Exception as e:
+            logger.warning("Failed to start backups: %s", e)
 
     # ─── Route all ERROR+ logs into DB ───
     try:
         from .logging_handlers import DBLogHandler
-        db_handler = DBLogHandler(app.ctrl)
+        db_handler = DBLogHandler(
+            app.ctrl, max_queue=int(app.config.get("DB_LOG_QUEUE_SIZE") or 1000))
         db_handler.setLevel(logging.ERROR)
         # Include exception tracebacks in the stored message
         db_handler.setFormatter(logging.Formatter(
             '%(levelname)s %(name)s: %(message)s'))
         logging.getLogger().addHandler(db_handler)
+        app.db_log_handler = db_handler  # type: ignore
     except Exception as e:
         logger.warning("Failed to install DBLogHandler: %s", e)
 
@@ -136,6 +193,30 @@ def create_app():
             logging.getLogger(__name__).warning(
                 "Shutdown log_message failed: %s", e)
         try:
+            handler = getattr(app, 'db_log_handler', None)
+            if handler is not None:
+                handler.flush()
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "Shutdown log handler flush failed: %s", e)
+        try:
+            app.ctrl.flush_write_behind()  # type: ignore
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "Shutdown write-behind flush failed: %s", e)
+        try:
+            app.ctrl.flush_api_key_touches()  # type: ignore
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "Shutdown API-key touch flush failed: %s", e)
+        try:
+            from .blueprints.villenkoti.api import controller as villenkoti_ctrl
+            villenkoti_ctrl.flush_key_touches()
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "Shutdown Villenkoti API-key touch flush failed: %s", e)
+        try:
+            app.sio_handler.frames.stop()  # type: ignore[attr-defined]
             socketio.emit('server_shutdown')
             socketio.stop()
         except Exception as e:
@@ -158,10 +239,19 @@ def create_app():
     # ─── Services (AC thermostat, Hue, Socket events) ───
     from .services import init_services
     init_services(app)
+    app.sio_handler.frames.configure(  # type: ignore[attr-defined]
+        int(app.config.get("DASHBOARD_FRAME_MS") or 0))
 
     # ─── Blueprints ───
     from .blueprints import register_blueprints
     register_blueprints(app)
+    from .blueprints.villenkoti.api import controller as villenkoti_ctrl
+    villenkoti_ctrl.key_touches.configure(
+        float(app.config.get("API_KEY_TOUCH_FLUSH_S") or 0))
+
+    # ─── CLI commands ───
+    from .cli import register_cli
+    register_cli(app)
 
     # ─── Template asset registry ───
     from .assets import register_assets
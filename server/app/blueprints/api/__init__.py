@@ -12,6 +12,8 @@ from .novpn_api import novpn_bp
 from .esp32_api import esp32_bp
 from .bmp_sensor import bmp_bp
 from .car_heater_api import car_bp
+from .db_api import db_bp
+from .logs_api import logs_bp
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -24,3 +26,5 @@ api_bp.register_blueprint(hvac_bp)
 api_bp.register_blueprint(timelapse_bp)
 api_bp.register_blueprint(misc_bp)
 api_bp.register_blueprint(car_bp)
+api_bp.register_blueprint(db_bp)
+api_bp.register_blueprint(logs_bp)
@@ -4,6 +4,7 @@ from typing import Any, Dict
 import logging
 from flask import Blueprint, request, jsonify, current_app
 from ...core import Controller
+from ...core.timeseries import parse_downsample_args
 from ...extensions import csrf
 
 bmp_bp = Blueprint('bmp_bp', __name__, url_prefix='/bmp')
@@ -42,7 +43,10 @@ def get_latest_bmp_data():
 
 @bmp_bp.route("/date", methods=["GET"])
 def get_bmp_data_by_date():
-    """Get BMP sensor data for a specific date (?date=YYYY-MM-DD)."""
+    """Get BMP sensor data for a specific date (?date=YYYY-MM-DD).
+
+    Optional ``max_points`` (LTTB) or ``bucket`` (e.g. ``5m``) downsample it.
+    """
     logger.debug("Received request for BMP data by date")
     ctrl: Controller = getattr(current_app, "ctrl", None)
     if ctrl is None:
@@ -60,6 +64,14 @@ def get_bmp_data_by_date():
         logger.debug("Invalid date format: %s", date_str)
         return jsonify({"error": "date must be in ISO format YYYY-MM-DD"}), 400
 
+    try:
+        max_points, bucket_ms = parse_downsample_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if max_points or bucket_ms:
+        return jsonify(ctrl.get_bmp_sensor_series(
+            date_str, max_points=max_points, bucket_ms=bucket_ms)), 200
+
     data = ctrl.get_bmp_sensor_data_for_date(date_str)
     if not data:
         logger.debug("No BMP data found for date: %s", date_str)
@@ -6,7 +6,9 @@ import json
 from dataclasses import asdict
 from zoneinfo import ZoneInfo
 from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required
 from ...core import Controller
+from ...core.timeseries import parse_downsample_args
 from ...core.models import CarHeaterStatus
 from ...extensions import csrf, socketio
 from ...security import require_api_key
@@ -143,3 +145,29 @@ def update_car_heater_status():
 
     # Return commands as a plain JSON list so ESP can act on them
     return jsonify(commands), 200
+
+
+@car_bp.route('/history', methods=['GET'])
+@login_required
+def car_heater_history():
+    """
+    Car heater readings between ``start`` and ``end`` (ISO timestamps).
+
+    Optional ``max_points`` (LTTB on power) or ``bucket`` (e.g. ``5m``)
+    downsample the series.
+    """
+    ctrl: Controller = getattr(current_app, "ctrl", None)
+    if ctrl is None:
+        return jsonify({"error": "Controller not initialized"}), 500
+
+    start_iso = request.args.get("start")
+    end_iso = request.args.get("end")
+    if not start_iso or not end_iso:
+        return jsonify({"error": "start and end query parameters are required"}), 400
+    try:
+        max_points, bucket_ms = parse_downsample_args(request.args)
+        series = ctrl.get_car_heater_series(
+            start_iso, end_iso, max_points=max_points, bucket_ms=bucket_ms)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(series), 200
@@ -0,0 +1,126 @@
+"""Database diagnostics API routes (Root-Admin only).
+
+Endpoints (all under /db):
+- /stats (GET)
+- /health (GET; ?tables=1 adds per-table sizes)
+- /queries (GET top-N statements by latency + slow-query log)
+- /queries/reset (POST clear query statistics)
+- /maintenance (POST run optimize/ANALYZE/incremental vacuum now)
+- /backups (GET list, POST start a backup now)
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+from flask import Blueprint, jsonify, current_app, request
+from flask_login import login_required
+
+from ...config import backup_options
+from ...utils import get_ctrl, require_root_admin_or_redirect
+
+
+db_bp = Blueprint("api_db", __name__, url_prefix="/db")
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@db_bp.route('/stats', methods=['GET'])
+@login_required
+def db_stats():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    stats = get_ctrl().db_stats()
+    handler = getattr(current_app, 'db_log_handler', None)
+    stats['log_handler'] = handler.stats() if handler is not None else None
+    return jsonify({'ok': True, 'stats': stats})
+
+
+@db_bp.route('/health', methods=['GET'])
+@login_required
+def db_health():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    include_tables = request.args.get('tables') in ('1', 'true', 'yes')
+    return jsonify({'ok': True, 'health': get_ctrl().db_health(include_tables)})
+
+
+@db_bp.route('/queries', methods=['GET'])
+@login_required
+def query_stats():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    stats = get_ctrl().db.query_stats
+    try:
+        top = min(200, max(1, int(request.args.get('top', 20))))
+        statements = stats.top(top, request.args.get('sort', 'total'))
+    except ValueError as e:
+        return jsonify({'ok': False, 'error': str(e)}), 400
+    return jsonify({
+        'ok': True,
+        'stats': stats.stats(),
+        'statements': statements,
+        'slow': stats.slow_log(),
+    })
+
+
+@db_bp.route('/queries/reset', methods=['POST'])
+@login_required
+def reset_query_stats():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    get_ctrl().db.query_stats.reset()
+    return jsonify({'ok': True})
+
+
+@db_bp.route('/maintenance', methods=['POST'])
+@login_required
+def run_maintenance():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    ctrl = get_ctrl()
+
+    def _run():
+        try:
+            ctrl.run_db_maintenance()
+        except Exception:
+            logger.exception("Manual DB maintenance failed")
+
+    # Vacuum steps pause between batches; results show up in GET /health
+    threading.Thread(target=_run, name="ManualDBMaintenance", daemon=True).start()
+    return jsonify({'ok': True, 'started': True}), 202
+
+
+@db_bp.route('/backups', methods=['GET'])
+@login_required
+def list_backups():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    engine = get_ctrl().backup_engine(**backup_options(current_app.config))
+    return jsonify({'ok': True, 'stats': engine.stats()})
+
+
+@db_bp.route('/backups', methods=['POST'])
+@login_required
+def start_backup():
+    guard = require_root_admin_or_redirect("Root-Admin required", json=True)
+    if guard:
+        return guard
+    engine = get_ctrl().backup_engine(**backup_options(current_app.config))
+
+    def _run():
+        try:
+            engine.run_once()
+        except Exception:
+            logger.exception("Manual backup failed")
+
+    # Throttled backups take a while; report progress via GET /backups
+    threading.Thread(target=_run, name="ManualBackup", daemon=True).start()
+    return jsonify({'ok': True, 'started': True}), 202
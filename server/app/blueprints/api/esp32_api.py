@@ -2,6 +2,7 @@
 
 Endpoints:
 - /esp32_temphum (GET, POST)
+- /esp32_temphum/rollup (GET)
 - /esp32_test (GET, POST)
 """
 from __future__ import annotations
@@ -9,13 +10,15 @@ from __future__ import annotations
 import logging
 import threading
 from typing import Any, Dict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytz
 from flask import Blueprint, request, jsonify, current_app, render_template
 from flask_login import login_required, current_user
 
 from ...core import Controller
+from ...core.timeseries import parse_downsample_args
+from ...core.timeutil import day_range_ms
 from ...extensions import csrf
 from ...security import require_api_key
 from ...services.ac import ACThermostat
@@ -40,15 +43,26 @@ _esp32_test_last: dict[str, Any] = {
 @esp32_bp.route('/esp32_temphum', methods=['GET'])
 @login_required
 def get_esp32_temphum():
+    """
+    Readings for one day. Optional ``max_points`` (LTTB) or ``bucket``
+    (e.g. ``5m``; mean/min/max per bucket) downsample the series.
+    """
     ctrl: Controller = current_app.ctrl  # type: ignore
     finland_tz = pytz.timezone('Europe/Helsinki')
     date_str = request.args.get(
         'date', datetime.now(finland_tz).date().isoformat())
     location = request.args.get('location', 'default').strip()
+    try:
+        max_points, bucket_ms = parse_downsample_args(request.args)
+    except ValueError as e:
+        return jsonify({'ok': False, 'error': 'invalid_downsample', 'message': str(e)}), 400
     logger.info(
         "API /esp32_temphum for %s by %s",
         date_str, current_user.get_id()
     )
+    if max_points or bucket_ms:
+        return jsonify(ctrl.get_esp32_temphum_series(
+            date_str, location, max_points=max_points, bucket_ms=bucket_ms))
     data = ctrl.get_esp32_temphum_for_date(date_str, location)
     return jsonify([
         {
@@ -61,6 +75,44 @@ def get_esp32_temphum():
     ])
 
 
+@esp32_bp.route('/esp32_temphum/rollup', methods=['GET'])
+@login_required
+def get_esp32_temphum_rollup():
+    """
+    Pre-aggregated readings for a location over whole local days.
+
+    Query: location, resolution ('1m' | '1h', default '1h'),
+    start/end (YYYY-MM-DD, inclusive; default the last 7 days).
+    """
+    ctrl: Controller = current_app.ctrl  # type: ignore
+    finland_tz = pytz.timezone('Europe/Helsinki')
+    today = datetime.now(finland_tz).date()
+    location = request.args.get('location', 'default').strip()
+    resolution = request.args.get('resolution', '1h').strip()
+    try:
+        end_day = datetime.strptime(
+            request.args.get('end', today.isoformat()), '%Y-%m-%d').date()
+        start_day = datetime.strptime(
+            request.args.get('start', (end_day - timedelta(days=6)).isoformat()),
+            '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'ok': False, 'error': 'invalid_date'}), 400
+    if start_day > end_day:
+        return jsonify({'ok': False, 'error': 'invalid_range'}), 400
+    start_ms, _ = day_range_ms(start_day, finland_tz)
+    _, end_ms = day_range_ms(end_day, finland_tz)
+    try:
+        buckets = ctrl.get_esp32_temphum_rollup(
+            location, start_ms, end_ms, resolution)
+    except ValueError as e:
+        return jsonify({'ok': False, 'error': 'invalid_resolution', 'message': str(e)}), 400
+    logger.info(
+        "API /esp32_temphum/rollup %s %s..%s (%s) by %s",
+        location, start_day, end_day, resolution, current_user.get_id()
+    )
+    return jsonify(buckets)
+
+
 ac_check_flag = True
 
 
@@ -106,16 +158,13 @@ def post_esp32_temphum():
             current_app, 'ac_thermostat', None)  # type: ignore
         ac_on_val: bool | None = bool(
             ac_thermo.is_on) if ac_thermo is not None else None
-        if ac_on_val is None:
-            # Fallback to persisted DB flag if thermostat not in memory
-            conf = ctrl.get_thermostat_conf()
-            if conf and conf.current_phase in ('on', 'off'):
-                ac_on_val = (conf.current_phase == 'on')
     except Exception:
         ac_on_val = None
 
+    # Without an in-memory thermostat the persisted phase is read in the
+    # same transaction as the insert
     saved = ctrl.record_esp32_temphum(
-        location, temp, hum, ac_on=ac_on_val)
+        location, temp, hum, ac_on=ac_on_val, infer_ac=ac_on_val is None)
     current_app.sio_handler.emit_to_views('esp32_temphum', {
         'location': saved.location,
         'temperature': saved.temperature,
@@ -15,6 +15,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required
 
 from ...core import Controller
+from ...core.timeutil import to_epoch_ms
 from ...services.ac import ACThermostat
 
 
@@ -114,131 +115,20 @@ def hvac_avg_rates_today():
     start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
     date_str = start_local.date().isoformat()
 
-    readings = ctrl.get_esp32_temphum_for_date(date_str, location)
-    logger.debug("avg_rates: location=%s date=%s (Helsinki) readings=%d",
-                 location, date_str, len(readings))
-
-    # Prepare events with initial state
-    start_iso = start_local.isoformat()
-    end_iso = now_local.isoformat()
-    events = ctrl.get_ac_events_between(start_iso, end_iso)
-    init_state = ctrl.get_last_ac_state_before(start_iso)
-    logger.debug("avg_rates: window=%s..%s events=%d init_state=%s",
-                 start_iso, end_iso, len(events), init_state)
-    if init_state is None:
-        try:
-            conf = ctrl.get_thermostat_conf()
-            if conf and conf.current_phase in ('on', 'off'):
-                init_state = (conf.current_phase == 'on')
-        except Exception:
-            init_state = None
-
-    def _parse_iso(s: str):
-        try:
-            x = s.strip()
-            if x.endswith('Z'):
-                x = x[:-1]
-            dt = datetime.fromisoformat(x)
-            if dt.tzinfo is None:
-                dt = finland_tz.localize(dt)
-            return dt
-        except Exception:
-            return None
-
-    ev_idx = 0
-    cur_state = init_state
-    ev_dts = []
-    for e in events:
-        dt = _parse_iso(e['timestamp'])
-        if dt is not None:
-            ev_dts.append((dt, bool(e['is_on'])))
-    if ev_dts:
-        logger.debug("avg_rates: first_events=%s", [
-                     ev_dts[i][0].isoformat() for i in range(min(5, len(ev_dts)))])
-    else:
-        logger.debug("avg_rates: no events inside window")
-
-    points: list[tuple[datetime, float, bool | None]] = []
-    skipped_ts = 0
-    for r in readings:
-        ts = _parse_iso(r.timestamp)
-        if ts is None:
-            skipped_ts += 1
-            continue
-        while ev_idx < len(ev_dts) and ev_dts[ev_idx][0] <= ts:
-            cur_state = ev_dts[ev_idx][1]
-            ev_idx += 1
-        try:
-            tval = float(r.temperature)
-        except Exception:
-            continue
-        points.append((ts, tval, cur_state))
-    if points:
-        logger.debug("avg_rates: points=%d first_ts=%s last_ts=%s skipped_ts=%d", len(
-            points), points[0][0].isoformat(), points[-1][0].isoformat(), skipped_ts)
-    else:
-        logger.debug("avg_rates: points=0 skipped_ts=%d", skipped_ts)
-
-    if len(points) < 2:
-        return jsonify({
-            'location': location,
-            'date': date_str,
-            'cooling_rate_c_per_h': None,
-            'heating_rate_c_per_h': None,
-            'cooling_power_w': None,
-            'heating_power_w': None,
-            'time_on_s': 0,
-            'time_off_s': 0,
-            'pairs_on': 0,
-            'pairs_off': 0,
-        })
-
-    points.sort(key=lambda x: x[0])
-    MAX_GAP_S = 15 * 60
-    sum_dt_on = 0.0
-    sum_dT_on = 0.0
-    sum_dt_off = 0.0
-    sum_dT_off = 0.0
-    pairs_on = 0
-    pairs_off = 0
-    skipped_no_state = 0
-    skipped_bad_gap = 0
-    skipped_nonpos_dt = 0
-
-    for i in range(1, len(points)):
-        t0, T0, s0 = points[i - 1]
-        t1, T1, s1 = points[i]
-        if s0 is None:
-            skipped_no_state += 1
-            continue
-        dt = (t1 - t0).total_seconds()
-        if dt <= 0:
-            skipped_nonpos_dt += 1
-            continue
-        if dt > MAX_GAP_S:
-            skipped_bad_gap += 1
-            continue
-        dT = (T1 - T0)
-        if s0 is True:
-            sum_dt_on += dt
-            sum_dT_on += dT
-            pairs_on += 1
-        else:
-            sum_dt_off += dt
-            sum_dT_off += dT
-            pairs_off += 1
-
-    cooling_rate_per_s = (sum_dT_on / sum_dt_on) if sum_dt_on > 0 else None
-    heating_rate_per_s = (sum_dT_off / sum_dt_off) if sum_dt_off > 0 else None
-
-    cooling_rate_c_per_h = (cooling_rate_per_s *
-                            3600.0) if cooling_rate_per_s is not None else None
-    heating_rate_c_per_h = (heating_rate_per_s *
-                            3600.0) if heating_rate_per_s is not None else None
+    rates = ctrl.get_hvac_avg_rates(
+        location, to_epoch_ms(start_local, finland_tz), to_epoch_ms(now_local, finland_tz))
+    logger.debug(
+        "avg_rates: location=%s date=%s (Helsinki) readings=%d events=%d init_state=%s",
+        location, date_str, rates['readings'], rates['events'], rates['init_state'])
     logger.debug(
-        "avg_rates: sums on(dt=%.1fs,dT=%.3f) off(dt=%.1fs,dT=%.3f) pairs on=%d off=%d skipped(no_state=%d, nonpos_dt=%d, big_gap=%d)",
-        sum_dt_on, sum_dT_on, sum_dt_off, sum_dT_off, pairs_on, pairs_off, skipped_no_state, skipped_nonpos_dt, skipped_bad_gap
+        "avg_rates: on(dt=%.1fs) off(dt=%.1fs) pairs on=%d off=%d skipped(no_state=%d, nonpos_dt=%d, big_gap=%d)",
+        rates['time_on_s'], rates['time_off_s'], rates['pairs_on'], rates['pairs_off'],
+        rates['skipped_no_state'], rates['skipped_nonpos_dt'], rates['skipped_big_gap']
     )
+    cooling_rate_per_s = rates['cooling_rate_c_per_s']
+    heating_rate_per_s = rates['heating_rate_c_per_s']
+    cooling_rate_c_per_h = rates['cooling_rate_c_per_h']
+    heating_rate_c_per_h = rates['heating_rate_c_per_h']
 
     cap_env = (current_app.config.get('ROOM_THERMAL_CAPACITY_J_PER_K') or  # type: ignore
                current_app.config.get('room_thermal_capacity_j_per_k') or
@@ -269,8 +159,8 @@ def hvac_avg_rates_today():
         'heating_rate_c_per_h': heating_rate_c_per_h,
         'cooling_power_w': cooling_power_w,
         'heating_power_w': heating_power_w,
-        'time_on_s': int(sum_dt_on),
-        'time_off_s': int(sum_dt_off),
-        'pairs_on': pairs_on,
-        'pairs_off': pairs_off,
+        'time_on_s': int(rates['time_on_s']),
+        'time_off_s': int(rates['time_off_s']),
+        'pairs_on': rates['pairs_on'],
+        'pairs_off': rates['pairs_off'],
     })
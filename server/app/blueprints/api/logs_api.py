@@ -0,0 +1,59 @@
+"""Log browsing API routes (admin only).
+
+Endpoints (all under /logs):
+- / (GET)
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+import pytz
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+
+from ...core.timeutil import day_range_ms
+from ...utils import get_ctrl
+
+
+logs_bp = Blueprint("api_logs", __name__, url_prefix="/logs")
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@logs_bp.route('', methods=['GET'])
+@login_required
+def list_logs():
+    """
+    Newest-first page of log rows.
+
+    Query: q (full-text), type (repeatable or comma-separated), from/to
+    (YYYY-MM-DD local days, inclusive), cursor (from the previous page),
+    limit (1..500, default 100).
+    """
+    if not getattr(current_user, 'is_admin', False):
+        return jsonify({'ok': False, 'error': 'forbidden'}), 403
+    finland_tz = pytz.timezone('Europe/Helsinki')
+    types = [t.strip() for v in request.args.getlist('type')
+             for t in v.split(',') if t.strip() and t.strip() != 'all']
+    try:
+        start_ms = end_ms = None
+        if request.args.get('from'):
+            start_ms, _ = day_range_ms(
+                datetime.strptime(request.args['from'], '%Y-%m-%d').date(), finland_tz)
+        if request.args.get('to'):
+            _, end_ms = day_range_ms(
+                datetime.strptime(request.args['to'], '%Y-%m-%d').date(), finland_tz)
+        limit = int(request.args.get('limit', 100))
+        rows, next_cursor = get_ctrl().search_logs(
+            query=request.args.get('q'),
+            types=types or None,
+            start_ms=start_ms,
+            end_ms=end_ms,
+            cursor=request.args.get('cursor') or None,
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({'ok': False, 'error': 'invalid_request', 'message': str(e)}), 400
+    return jsonify({'ok': True, 'logs': rows, 'next_cursor': next_cursor})
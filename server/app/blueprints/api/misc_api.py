@@ -3,19 +3,23 @@
 Endpoints:
 - /gcode (GET)
 - /previewJpg (GET)
+- /frames/latest (GET)
+- /frames/<sha256> (GET)
 - /temphum (GET)
 """
 from __future__ import annotations
 
 import logging
+import os
+import re
 import tempfile
 from datetime import datetime
 
 import pytz
-from flask import Blueprint, jsonify, current_app, send_from_directory, request
+from flask import Blueprint, jsonify, current_app, send_from_directory, send_file, request, abort
 from flask_login import login_required, current_user
 
-from ...core import Controller
+from ...core import Controller, ImageData
 from ...extensions import csrf
 
 
@@ -38,20 +42,85 @@ def get_gcode_commands():
     })
 
 
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _send_frame(img: ImageData, immutable: bool = False):
+    """Stream a stored frame with its hash as ETag (304 on If-None-Match)."""
+    if not img.path or not os.path.exists(img.path):
+        abort(404)
+    try:
+        last_modified = datetime.fromisoformat(img.timestamp)
+    except (TypeError, ValueError):
+        last_modified = None
+    # send_file hands the open file to the server's wsgi.file_wrapper, so
+    # the bytes go out via sendfile() without passing through Python
+    response = send_file(
+        img.path,
+        mimetype=img.mime,
+        etag=img.sha256,
+        last_modified=last_modified,
+        conditional=True,
+        max_age=31536000 if immutable else 0,
+    )
+    if immutable:
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
 @misc_bp.route('/previewJpg')
 @login_required
 def serve_tmp_file():
     """
-    Serve any file under /tmp via HTTP.
+    Serve the newest camera frame: the latest one in the frame store, or
+    /tmp/preview.jpg if the client has written a newer one since.
     """
-    # Log every request for debugging
+    ctrl: Controller = current_app.ctrl  # type: ignore
+    img = ctrl.get_last_image()
+    if img is not None and not _preview_is_newer(ctrl.preview_path, img):
+        return _send_frame(img)
     logger.debug("Serving tmp file: preview.jpg")
-
-    # In production, you may want to sanitize `path`!
     temp_dir = tempfile.gettempdir()
     return send_from_directory(temp_dir, 'preview.jpg')
 
 
+def _preview_is_newer(path: str, img: ImageData) -> bool:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return False
+    try:
+        stored = datetime.fromisoformat(img.timestamp).timestamp()
+    except (TypeError, ValueError):
+        return True
+    # Frames ingested from preview.jpg carry its mtime (to the microsecond)
+    return mtime > stored + 0.001
+
+
+@misc_bp.route('/frames/latest')
+@login_required
+def get_latest_frame():
+    """Newest stored frame (revalidated on every request via ETag)."""
+    ctrl: Controller = current_app.ctrl  # type: ignore
+    img = ctrl.get_last_image()
+    if img is None:
+        abort(404)
+    return _send_frame(img)
+
+
+@misc_bp.route('/frames/<sha256>')
+@login_required
+def get_frame(sha256: str):
+    """A specific frame by content hash; immutable, so cached indefinitely."""
+    if not _SHA256_RE.match(sha256):
+        abort(404)
+    ctrl: Controller = current_app.ctrl  # type: ignore
+    img = ctrl.get_image(sha256)
+    if img is None:
+        abort(404)
+    return _send_frame(img, immutable=True)
+
+
 @misc_bp.route('/temphum')
 @login_required
 def get_temphum():
@@ -11,6 +11,8 @@ from flask_limiter.errors import RateLimitExceeded
 from . import auth_bp
 from ...extensions import limiter, csrf
 from ...core import Controller
+from ...core.kdf import KdfBusy
+from ...utils import flash_busy
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,8 @@ class AuthAnonymous(AnonymousUserMixin):
 
 def kick_if_expired():
     """Check if the user is temporary and expired."""
+    if not current_user.is_authenticated:
+        return None
     ctrl: Controller = current_app.ctrl
     user = ctrl.get_user_by_username(current_user.get_id(), include_pw=False)
     if user and user.is_expired:
@@ -42,7 +46,8 @@ def kick_if_expired():
 
 def load_user(user_id: str):
     ctrl: Controller = current_app.ctrl  # type: ignore
-    user = ctrl.get_user_by_username(user_id)
+    # Password-less lookups are served from the controller's user cache
+    user = ctrl.get_user_by_username(user_id, include_pw=False)
     if user:
         is_admin = getattr(user, "is_admin", False)
         logger.debug("Loaded user %s (is_admin=%s)", user_id, is_admin)
@@ -64,7 +69,28 @@ def handle_rate_limit(e):
     )
 
 
+def _exempt_from_login_limits() -> bool:
+    return (
+        current_user.is_admin
+        or (request.remote_addr or "").startswith('192.168.10.')
+        or request.remote_addr in ['192.168.10.50', '192.168.0.3']
+    )
+
+
+# One budget for login POSTs from all clients together, checked before the
+# view runs: a flood spread over many addresses is refused before any
+# password hash is computed.
+_login_flood_limit = limiter.shared_limit(
+    lambda: current_app.config.get('LOGIN_GLOBAL_RATE_LIMIT') or "60/minute",
+    scope='login-global',
+    key_func=lambda: 'all',
+    methods=['POST'],
+    exempt_when=_exempt_from_login_limits,
+)
+
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@_login_flood_limit
 @limiter.limit(
     "5/minute;20/hour",
     exempt_when=lambda: (
@@ -96,7 +122,14 @@ def login():
                     log_type='auth', message=f"Expired temporary login attempt for {username}")
                 return render_template('login.html')
 
-        if ctrl.authenticate_user(username, password):
+        try:
+            authenticated = ctrl.authenticate_user(username, password)
+        except KdfBusy as e:
+            logger.warning("Login for %s rejected: %s", username, e)
+            flash_busy()
+            return render_template('login.html'), 503
+
+        if authenticated:
             session.permanent = remember
             login_user(
                 # load_user will restore is_admin from DB on reload
@@ -129,6 +162,7 @@ def login():
 
 @auth_bp.route('/login_api', methods=['POST'])
 @csrf.exempt
+@_login_flood_limit
 @limiter.limit(
     "10/minute;60/hour",
     exempt_when=lambda: (
@@ -181,7 +215,17 @@ def login_api():
                 'message': 'Temporary user account expired.'
             }), 401
 
-    if ctrl.authenticate_user(username, password):
+    try:
+        authenticated = ctrl.authenticate_user(username, password)
+    except KdfBusy as e:
+        logger.warning("API login for %s rejected: %s", username, e)
+        return jsonify({
+            'ok': False,
+            'error': 'busy',
+            'message': 'Too many concurrent logins, retry shortly.'
+        }), 503, {'Retry-After': '1'}
+
+    if authenticated:
         session.permanent = remember
         login_user(
             AuthUser(username, is_admin=getattr(user_obj, "is_admin", False)),
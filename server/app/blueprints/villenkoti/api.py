@@ -101,7 +101,7 @@ def execute_sql() -> tuple[Any, int]:
         }), 400
 
     try:
-        cursor = controller.execute_sql(statement, params)
+        sql_result = controller.execute_sql(statement, params)
     except sqlite3.DatabaseError as exc:
         logger.exception('Villenkoti SQL execution failed')
         return jsonify({
@@ -113,10 +113,9 @@ def execute_sql() -> tuple[Any, int]:
     result: dict[str, Any] = {'ok': True}
     normalized_statement = statement.strip().lower()
     if normalized_statement.startswith('select'):
-        rows = cursor.fetchall()
-        result['rows'] = [dict(row) for row in rows]
+        result['rows'] = [dict(row) for row in sql_result.rows or []]
     else:
-        result['rows_affected'] = cursor.rowcount
-        result['last_row_id'] = cursor.lastrowid
+        result['rows_affected'] = sql_result.rowcount
+        result['last_row_id'] = sql_result.lastrowid
 
     return jsonify(result), 200
@@ -5,7 +5,18 @@ import hashlib
 import json
 import os
 import sqlite3
-from typing import Any, Iterable
+import threading
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+from ...core.touch_tracker import TouchTracker
+
+
+@dataclass
+class SqlResult:
+    rows: list[sqlite3.Row] | None  # None for statements without a result set
+    rowcount: int
+    lastrowid: int | None
 
 
 class VillenkotiController:
@@ -22,7 +33,11 @@ class VillenkotiController:
         self.db_path = resolved_path
         self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
+        # The connection is shared by request threads and the touch flusher;
+        # one user at a time so transactions never interleave
+        self._lock = threading.RLock()
         self._ensure_schema()
+        self.key_touches = TouchTracker(self._write_key_touches, name='VillenkotiKeyTouches')
 
     def _ensure_schema(self) -> None:
         statements = [
@@ -58,7 +73,7 @@ class VillenkotiController:
             DELETE FROM sensor_readings WHERE location='Test' OR location='test'
             """,
         ]
-        with self._conn:
+        with self._lock, self._conn:
             for statement in statements:
                 self._conn.execute(statement)
 
@@ -69,7 +84,7 @@ class VillenkotiController:
         """Persists a new API key (plain secret will be hashed)."""
         hashed = self._hash_key(secret)
         created_at = datetime.datetime.utcnow().isoformat() + "Z"
-        with self._conn:
+        with self._lock, self._conn:
             cursor = self._conn.execute(
                 "INSERT INTO api_keys (name, secret_hash, created_at, created_by) VALUES (?, ?, ?, ?)",
                 (name, hashed, created_at, created_by),
@@ -81,19 +96,26 @@ class VillenkotiController:
         if not secret:
             return False
         hashed = self._hash_key(secret)
-        row = self._conn.execute(
-            "SELECT id FROM api_keys WHERE secret_hash = ?",
-            (hashed,),
-        ).fetchone()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM api_keys WHERE secret_hash = ?",
+                (hashed,),
+            ).fetchone()
         if not row:
             return False
-        now = datetime.datetime.utcnow().isoformat() + "Z"
-        with self._conn:
-            self._conn.execute(
+        self.key_touches.touch(row["id"], datetime.datetime.utcnow().isoformat() + "Z")
+        return True
+
+    def _write_key_touches(self, touches: dict[Hashable, str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
                 "UPDATE api_keys SET last_used_at = ? WHERE id = ?",
-                (now, row["id"]),
+                [(ts, key_id) for key_id, ts in touches.items()],
             )
-        return True
+
+    def flush_key_touches(self) -> None:
+        """Writes pending last_used_at values (called at shutdown)."""
+        self.key_touches.stop()
 
     def record_sensor_reading(
         self,
@@ -104,7 +126,7 @@ class VillenkotiController:
     ) -> int:
         """Stores a single sensor reading."""
         timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-        with self._conn:
+        with self._lock, self._conn:
             cursor = self._conn.execute(
                 """
                 INSERT INTO sensor_readings (timestamp, location, temperature, humidity)
@@ -118,14 +140,19 @@ class VillenkotiController:
         self,
         statement: str,
         parameters: Iterable[Any] | None = None,
-    ) -> sqlite3.Cursor:
-        """Runs arbitrary SQL against the Villenkoti database."""
-        cursor = self._conn.cursor()
-        if parameters is None:
-            cursor.execute(statement)
-        elif isinstance(parameters, dict):
-            cursor.execute(statement, parameters)
-        else:
-            cursor.execute(statement, tuple(parameters))
-        self._conn.commit()
-        return cursor
+    ) -> SqlResult:
+        """Runs arbitrary SQL against the Villenkoti database.
+
+        Result rows are read while the connection lock is held.
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            if parameters is None:
+                cursor.execute(statement)
+            elif isinstance(parameters, dict):
+                cursor.execute(statement, parameters)
+            else:
+                cursor.execute(statement, tuple(parameters))
+            rows = cursor.fetchall() if cursor.description is not None else None
+            self._conn.commit()
+            return SqlResult(rows, cursor.rowcount, cursor.lastrowid)
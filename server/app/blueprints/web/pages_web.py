@@ -39,7 +39,8 @@ def get_3d_page():
         f"Last image: {img.id if img else None}, Last temphum: {th}, Last status: {st}")
     return render_template(
         '3d.html',
-        last_image=asdict(img) if img else None,
+        # The frame itself is fetched by URL; never expose the on-disk path
+        last_image={k: v for k, v in asdict(img).items() if k != 'path'} if img else None,
         last_temphum=asdict(th) if th else None,
         last_status=asdict(st) if st else None,
     )
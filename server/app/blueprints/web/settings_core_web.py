@@ -8,10 +8,11 @@ from flask_login import login_required, current_user
 
 from ...utils import (
     get_ctrl,
-    flash_error, flash_success,
+    flash_error, flash_success, flash_busy,
     get_new_password_pair, validate_password_pair,
 )
 from ...core import Controller
+from ...core.kdf import KdfBusy
 
 from . import web_bp
 
@@ -52,7 +53,13 @@ def change_password():
             return render_template('change_password.html')
 
         # Verify current password
-        if not ctrl.authenticate_user(current_user.get_id(), current_pw):
+        try:
+            authenticated = ctrl.authenticate_user(current_user.get_id(), current_pw)
+        except KdfBusy as e:
+            logger.warning("Password change for %s rejected: %s", current_user.get_id(), e)
+            flash_busy()
+            return render_template('change_password.html'), 503
+        if not authenticated:
             flash_error('Nykyinen salasana on virheellinen.')
             return render_template('change_password.html')
 
@@ -64,6 +71,10 @@ def change_password():
                 log_type='info', message=f"User {current_user.get_id()} changed password")
             flash_success('Salasana vaihdettu.')
             return redirect(url_for('web.get_settings_page'))
+        except KdfBusy as e:
+            logger.warning("Password change for %s rejected: %s", current_user.get_id(), e)
+            flash_busy()
+            return render_template('change_password.html'), 503
         except Exception as e:
             flash_error(f"Salasanan vaihto epäonnistui: {e}")
             return render_template('change_password.html')
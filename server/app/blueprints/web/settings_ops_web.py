@@ -9,8 +9,9 @@ from flask_login import login_required, current_user
 from ...utils import (
     get_ctrl,
     require_admin_or_redirect,
-    flash_error, flash_success,
+    flash_error, flash_success, flash_busy,
 )
+from ...core.kdf import KdfBusy
 
 from . import web_bp
 
@@ -26,9 +27,8 @@ def logs():
         "Sinulla ei ole oikeuksia tarkastella lokitietoja.", 'web.get_settings_page')
     if guard:
         return guard
-    ctrl = get_ctrl()
-    logs = ctrl.get_logs(limit=200)
-    return render_template('logs.html', logs=logs)
+    # Rows are loaded page by page from /api/logs by logs.js
+    return render_template('logs.html')
 
 
 @web_bp.route('/settings/api_keys', methods=['GET', 'POST'])
@@ -42,6 +42,7 @@ def api_keys():
 
     ctrl = get_ctrl()
     created_token: str | None = None
+    status = 200
 
     if request.method == 'POST':
         if 'create_key' in request.form:
@@ -59,6 +60,10 @@ def api_keys():
                             name=name, created_by=current_user.get_id())
                         created_token = token  # show once
                         flash_success('API-avain luotu.')
+                    except KdfBusy as e:
+                        logger.warning("API key creation rejected: %s", e)
+                        flash_busy()
+                        status = 503
                     except Exception as e:
                         flash_error(f'API-avaimen luonti epäonnistui: {e}')
         elif 'delete_key' in request.form:
@@ -74,4 +79,4 @@ def api_keys():
         # Fall through to render
 
     keys = ctrl.list_api_keys()
-    return render_template('api_keys.html', keys=keys, created_key=created_token)
+    return render_template('api_keys.html', keys=keys, created_key=created_token), status
@@ -11,10 +11,11 @@ from ...utils import (
     get_ctrl,
     require_admin_or_redirect,
     combine_local_date_time, can_edit_user, can_delete_user,
-    flash_error, flash_success,
+    flash_error, flash_success, flash_busy,
     get_new_password_pair, validate_password_pair,
 )
 from ...core import Controller
+from ...core.kdf import KdfBusy
 
 from . import web_bp
 
@@ -59,6 +60,10 @@ def add_user():
         except ValueError as ve:
             flash_error(str(ve))
             logger.warning("Add user failed: %s", ve)
+        except KdfBusy as e:
+            logger.warning("Add user %s rejected: %s", u, e)
+            flash_busy()
+            return render_template('add_user.html'), 503
 
     return render_template('add_user.html')
 
@@ -198,6 +203,10 @@ def edit_user(username):
             return redirect(url_for('web.user_list'))
         except ValueError as ve:
             flash_error(str(ve))
+        except KdfBusy as e:
+            logger.warning("Update of user %s rejected: %s", username, e)
+            flash_busy()
+            return render_template('edit_user.html', user=user), 503
         except Exception as e:
             flash_error(f"Päivitys epäonnistui: {e}")
     return render_template('edit_user.html', user=user)
@@ -0,0 +1,77 @@
+"""Flask CLI commands (``flask --app run <command>``)."""
+from __future__ import annotations
+
+import os
+
+import click
+from flask import Flask
+
+
+def register_cli(app: Flask) -> None:
+    @app.cli.command("rebuild-rollups")
+    @click.option("--start", "start_day", default=None,
+                  help="First local day to rebuild (YYYY-MM-DD). Default: oldest raw row.")
+    @click.option("--end", "end_day", default=None,
+                  help="Last local day to rebuild, inclusive (YYYY-MM-DD). Default: newest raw row.")
+    def rebuild_rollups_command(start_day: str | None, end_day: str | None) -> None:
+        """Regenerate esp32_temphum 1-minute / 1-hour rollups from raw rows."""
+        from .core.timeutil import day_range_ms
+        ctrl = app.ctrl  # type: ignore
+        start_ms = day_range_ms(start_day, ctrl.finland_tz)[0] if start_day else None
+        end_ms = day_range_ms(end_day, ctrl.finland_tz)[1] if end_day else None
+        result = ctrl.rebuild_esp32_rollups(start_ms, end_ms)
+        click.echo(
+            f"Rebuilt {result['chunks']} chunk(s) in {result['elapsed_ms']} ms; "
+            f"rows: {result['rows']}")
+
+    @app.cli.command("backup-db")
+    def backup_db_command() -> None:
+        """Take an online, compressed backup of DB_PATH now."""
+        from .config import backup_options
+        engine = app.ctrl.backup_engine(**backup_options(app.config))  # type: ignore
+        result = engine.run_once()
+        click.echo(
+            f"Wrote {os.path.join(engine.directory, result['name'])} "
+            f"({result['size']} bytes) in {result['elapsed_ms']} ms")
+
+    @app.cli.command("restore-db")
+    @click.argument("backup")
+    @click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+    def restore_db_command(backup: str, yes: bool) -> None:
+        """Replace DB_PATH with BACKUP (a file name in BACKUP_DIR or a path)."""
+        from .config import backup_options
+        from .core.backup import BackupError
+        app.ctrl.backup_engine(**backup_options(app.config))  # type: ignore
+        if not yes:
+            click.confirm(
+                f"Overwrite {app.ctrl.db.db_path} with {backup}?", abort=True)  # type: ignore
+        try:
+            result = app.ctrl.restore_backup(backup)  # type: ignore
+        except BackupError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Restored {result['restored']} in {result['elapsed_ms']} ms")
+
+    @app.cli.command("db-maintenance")
+    def db_maintenance_command() -> None:
+        """Run optimize/ANALYZE and incremental vacuum now."""
+        result = app.ctrl.run_db_maintenance()  # type: ignore
+        click.echo(
+            f"Fragmentation {result['fragmentation_pct_before']}% -> "
+            f"{result['fragmentation_pct_after']}%, freed {result['pages_freed']} "
+            f"page(s), stats: {result['stats']} ({result['elapsed_ms']} ms)")
+
+    @app.cli.command("vacuum-db")
+    def vacuum_db_command() -> None:
+        """Switch DB_PATH to incremental auto_vacuum with a full VACUUM.
+
+        Blocks writers for the duration; run it while ingest is quiet.
+        """
+        db = app.ctrl.db  # type: ignore
+        before = db.health()
+        if not db.enable_incremental_vacuum():
+            click.echo("auto_vacuum is already incremental; nothing to do")
+            return
+        after = db.health()
+        click.echo(
+            f"Converted to incremental auto_vacuum: {before['db_bytes']} -> "
+            f"{after['db_bytes']} bytes")
@@ -51,13 +51,70 @@ def load_settings() -> Dict[str, Any]:
         "WEB_PASSWORD": os.getenv("WEB_PASSWORD"),
         # DB path
         "DB_PATH": os.getenv("DB_PATH", os.path.join(tempfile.gettempdir())),
+        # Write-behind ingestion: group-commit inserts every N ms (0 = off)
+        "DB_WRITE_BEHIND_MS": int(os.getenv("DB_WRITE_BEHIND_MS", "0") or 0),
+        "DB_WRITE_BEHIND_MAX_ROWS": int(os.getenv("DB_WRITE_BEHIND_MAX_ROWS", "200") or 200),
+        # Scheduled retention pass interval in seconds (0 = off)
+        "DB_RETENTION_INTERVAL_S": int(os.getenv("DB_RETENTION_INTERVAL_S", "600") or 0),
+        # Retention of the logs table (0 = no limit of that kind)
+        "LOGS_MAX_AGE_DAYS": float(os.getenv("LOGS_MAX_AGE_DAYS", "90") or 0),
+        "LOGS_MAX_ROWS": int(os.getenv("LOGS_MAX_ROWS", "100000") or 0),
+        # DB log handler queue bound (records beyond it are dropped and counted)
+        "DB_LOG_QUEUE_SIZE": int(os.getenv("DB_LOG_QUEUE_SIZE", "1000") or 1000),
+        # Per-statement DB latency stats; slower statements are logged with
+        # their EXPLAIN QUERY PLAN
+        "DB_QUERY_STATS": os.getenv("DB_QUERY_STATS", "1").lower() not in ("0", "false", "no", "off"),
+        "DB_SLOW_QUERY_MS": float(os.getenv("DB_SLOW_QUERY_MS", "100") or 100),
+        # Daily off-peak DB maintenance, local hour 0-23 (-1 = off); files
+        # larger than DB_VACUUM_CONVERT_MAX_MB are not auto-converted to
+        # incremental auto_vacuum (use `flask vacuum-db`)
+        "DB_MAINTENANCE_HOUR": int(os.getenv("DB_MAINTENANCE_HOUR", "4") or 4),
+        "DB_VACUUM_CONVERT_MAX_MB": float(os.getenv("DB_VACUUM_CONVERT_MAX_MB", "256") or 0),
+        # Online backups (default dir: "backups" next to DB_PATH; interval 0 = off)
+        "BACKUP_DIR": os.getenv("BACKUP_DIR") or None,
+        "BACKUP_INTERVAL_S": int(os.getenv("BACKUP_INTERVAL_S", "86400") or 0),
+        "BACKUP_KEEP": int(os.getenv("BACKUP_KEEP", "7") or 7),
+        "BACKUP_PAGES_PER_STEP": int(os.getenv("BACKUP_PAGES_PER_STEP", "256") or 256),
+        "BACKUP_STEP_SLEEP_MS": float(os.getenv("BACKUP_STEP_SLEEP_MS", "20") or 0),
+        # Back off backup steps while p99 DB write latency exceeds this (0 = never)
+        "BACKUP_WRITE_P99_BUDGET_MS": float(os.getenv("BACKUP_WRITE_P99_BUDGET_MS", "50") or 0),
+        # Verified API-key tokens cached in memory to skip the password hash
+        # on repeat requests (0 = off for either)
+        "API_KEY_CACHE_SIZE": int(os.getenv("API_KEY_CACHE_SIZE", "256") or 0),
+        "API_KEY_CACHE_TTL_S": float(os.getenv("API_KEY_CACHE_TTL_S", "300") or 0),
+        # Password hashing on native threads: concurrent hashes, queued callers
+        # beyond which logins get 503, and a global cap on login POSTs
+        "KDF_MAX_CONCURRENCY": int(os.getenv("KDF_MAX_CONCURRENCY", "2") or 2),
+        "KDF_MAX_WAITING": int(os.getenv("KDF_MAX_WAITING", "8") or 0),
+        "LOGIN_GLOBAL_RATE_LIMIT": os.getenv("LOGIN_GLOBAL_RATE_LIMIT", "60/minute"),
+        # Password-less user lookups (login session, admin guards) cached for N s (0 = off)
+        "USER_CACHE_TTL_S": float(os.getenv("USER_CACHE_TTL_S", "30") or 0),
+        # API-key last_used_at writes are coalesced and flushed every N s (0 = every use)
+        "API_KEY_TOUCH_FLUSH_S": float(os.getenv("API_KEY_TOUCH_FLUSH_S", "30") or 0),
+        # Camera frame store (default: "frames" next to DB_PATH) and ring size
+        "FRAME_STORE_DIR": os.getenv("FRAME_STORE_DIR") or None,
+        "FRAME_STORE_KEEP": int(os.getenv("FRAME_STORE_KEEP", "10") or 10),
         # Rate limit whitelist for request_filter
         "whitelist": whitelist,
         # Sockets
         "ALLOWED_WS_ORIGINS": allowed_ws,
+        # Dashboard state events are merged into one dashboard_frame per view
+        # every N ms (0 = emit each event immediately)
+        "DASHBOARD_FRAME_MS": int(os.getenv("DASHBOARD_FRAME_MS", "500") or 0),
         # HVAC / Thermostat shared settings
         "THERMOSTAT_LOCATION": os.getenv("THERMOSTAT_LOCATION", "Tietokonepöytä"),
         "ROOM_THERMAL_CAPACITY_J_PER_K": os.getenv("ROOM_THERMAL_CAPACITY_J_PER_K"),
     }
 
     return settings
+
+
+def backup_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for ``Controller.start_backups``/``backup_engine``."""
+    return {
+        "directory": config.get("BACKUP_DIR"),
+        "keep": int(config.get("BACKUP_KEEP") or 7),
+        "pages_per_step": int(config.get("BACKUP_PAGES_PER_STEP") or 256),
+        "step_sleep_ms": float(config.get("BACKUP_STEP_SLEEP_MS") or 0),
+        "write_budget_ms": float(config.get("BACKUP_WRITE_P99_BUDGET_MS") or 0),
+    }
@@ -0,0 +1,138 @@
+"""Bounded, TTL'd cache of verified API-key tokens.
+
+``Controller.verify_api_key_token`` would otherwise run the password KDF
+for every sensor POST. After one successful check the token is remembered
+by its HMAC-SHA256 digest (keyed with a per-process secret, so the cache
+never holds a usable token) together with the key's metadata.
+
+Entries are dropped when they expire, when the cache is full (least
+recently used first), when the key is revoked or deleted in this process
+(:meth:`VerifiedKeyCache.invalidate`), and when the ``api_keys`` revision
+stored in the database changes (:meth:`VerifiedKeyCache.sync`), which is
+how other worker processes learn about a revocation. :meth:`put` takes the
+revision read before the key row was fetched and is ignored if the cache
+has moved on since, so a verification that overlapped a revoke cannot
+re-insert the revoked key.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class VerifiedKeyCache:
+    def __init__(self, max_entries: int = 256, ttl_s: float = 300) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_s = max(0.0, float(ttl_s))
+        self._secret = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        # digest -> (expires_at, key metadata)
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._revision: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def configure(self, max_entries: int | None = None, ttl_s: float | None = None) -> None:
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max(0, int(max_entries))
+            if ttl_s is not None:
+                self.ttl_s = max(0.0, float(ttl_s))
+            self._entries.clear()
+
+    def digest(self, token: str) -> bytes:
+        return hmac.new(self._secret, token.encode('utf-8'), hashlib.sha256).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a previously verified ``token``, or None."""
+        if not self.enabled:
+            return None
+        key = self.digest(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return dict(entry[1])
+
+    def put(self, token: str, meta: Dict[str, Any], revision: int | None) -> None:
+        """Remember a verified token; ``revision`` is what :meth:`sync` saw
+        before the key row was read."""
+        if not self.enabled:
+            return
+        key = self.digest(token)
+        with self._lock:
+            if revision is None or revision != self._revision:
+                self._stale_puts += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_s, dict(meta))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key_id: str | None = None) -> None:
+        """Drop the entries of ``key_id`` (every entry if None)."""
+        with self._lock:
+            if key_id is None:
+                n = len(self._entries)
+                self._entries.clear()
+                # Puts for reads that started before this are dropped
+                self._revision = None
+            else:
+                stale = [k for k, (_, meta) in self._entries.items()
+                         if meta.get('key_id') == key_id]
+                for k in stale:
+                    del self._entries[k]
+                n = len(stale)
+            self._invalidations += n
+
+    def sync(self, revision: int) -> None:
+        """Clear the cache if the shared revision moved since the last call."""
+        with self._lock:
+            if revision == self._revision:
+                return
+            if self._revision is not None:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+            self._revision = revision
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl_s,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'stale_puts': self._stale_puts,
+                'revision': self._revision,
+            }
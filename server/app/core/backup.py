@@ -0,0 +1,248 @@
+"""Online, throttled SQLite backups with compressed rotation.
+
+A background thread snapshots the live database with the SQLite backup API
+(see ``DatabaseManager.backup_to``) in small page steps. Between steps it
+sleeps, and it backs off further while the recent p99 write latency is
+above ``write_budget_ms``, so ingest keeps its latency budget while a
+backup runs. Each snapshot is integrity-checked, gzipped to
+``<directory>/<stem>-YYYYmmdd-HHMMSS.db.gz`` and only the newest ``keep``
+files are retained. :meth:`BackupEngine.restore` loads a snapshot back.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, tzinfo
+from typing import Any, BinaryIO, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = '.db.gz'
+_MAX_BACKOFF_S = 2.0
+_COPY_CHUNK = 256 * 1024
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class BackupEngine:
+    def __init__(
+        self,
+        db: "DatabaseManager",
+        directory: str,
+        tz: tzinfo,
+        interval_s: float = 86400,
+        keep: int = 7,
+        pages_per_step: int = 256,
+        step_sleep_ms: float = 20,
+        write_budget_ms: float = 50,
+    ) -> None:
+        self.db = db
+        self.directory = directory
+        self.tz = tz
+        self.interval_s = max(60.0, float(interval_s))
+        self.keep = max(1, int(keep))
+        self.pages_per_step = max(1, int(pages_per_step))
+        self.step_sleep_s = max(0.0, float(step_sleep_ms) / 1000.0)
+        self.write_budget_ms = float(write_budget_ms) if write_budget_ms else None
+        self.stem = os.path.splitext(os.path.basename(db.db_path))[0] or 'db'
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._failures = 0
+        self._last_result: Dict[str, Any] | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="BackupEngine", daemon=True)
+        self._thread.start()
+        logger.info("Backup engine started (interval=%.0fs, keep=%d, dir=%s)",
+                    self.interval_s, self.keep, self.directory)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Snapshots on disk, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        out: List[Dict[str, Any]] = []
+        for name in names:
+            if not (name.startswith(f"{self.stem}-") and name.endswith(_SUFFIX)):
+                continue
+            st = os.stat(os.path.join(self.directory, name))
+            out.append({
+                'name': name,
+                'size': st.st_size,
+                'created': datetime.fromtimestamp(st.st_mtime, self.tz).isoformat(),
+            })
+        # Names embed the timestamp, so they sort chronologically
+        out.sort(key=lambda b: b['name'], reverse=True)
+        return out
+
+    def run_once(self) -> Dict[str, Any]:
+        """Take one snapshot now and rotate old ones."""
+        with self._run_lock:
+            try:
+                result = self._backup()
+            except Exception:
+                self._failures += 1
+                raise
+            self._runs += 1
+            self._last_result = result
+            self._rotate()
+        logger.info("Backup %s written (%d bytes, %d steps, %.0f ms, throttled %.0f ms)",
+                    result['name'], result['size'], result['steps'],
+                    result['elapsed_ms'], result['throttled_ms'])
+        return result
+
+    def restore(self, name: str) -> Dict[str, Any]:
+        """Replace the live database with snapshot ``name`` (a file in the
+        backup directory or a path). Raises BackupError if it is unusable."""
+        path = name if os.path.sep in name else os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            raise BackupError(f"Backup not found: {name}")
+        t0 = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.restore')
+        os.close(fd)
+        try:
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as src_f, open(tmp, 'wb') as dst_f:
+                _copy(src_f, dst_f)
+            src = sqlite3.connect(tmp)
+            try:
+                self._check(src, path)
+                with self._run_lock:
+                    self.db.restore_from(src)
+            finally:
+                src.close()
+        except (OSError, sqlite3.DatabaseError) as e:
+            raise BackupError(f"Restore from {name} failed: {e}") from e
+        finally:
+            _unlink(tmp)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        logger.warning("Database restored from backup %s in %.0f ms", path, elapsed_ms)
+        return {'restored': path, 'elapsed_ms': round(elapsed_ms, 1)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self._runs,
+            'failures': self._failures,
+            'last_result': self._last_result,
+            'interval_s': self.interval_s,
+            'keep': self.keep,
+            'directory': self.directory,
+            'backups': self.list_backups(),
+        }
+
+    def _backup(self) -> Dict[str, Any]:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{self.stem}-{datetime.now(self.tz).strftime('%Y%m%d-%H%M%S')}{_SUFFIX}"
+        final = os.path.join(self.directory, name)
+        fd, raw = tempfile.mkstemp(dir=self.directory, suffix='.db.tmp')
+        os.close(fd)
+        gz_tmp = final + '.tmp'
+        steps = 0
+        throttled_s = 0.0
+        backoff_s = self.step_sleep_s
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            nonlocal steps, throttled_s, backoff_s
+            steps += 1
+            if remaining <= 0:
+                return
+            p99 = self.db.write_latency_ms(window_s=10.0)
+            if self.write_budget_ms is not None and p99 is not None and p99 > self.write_budget_ms:
+                # Writers are over budget: wait longer before the next step
+                backoff_s = min(_MAX_BACKOFF_S, max(backoff_s * 2, 0.05))
+            else:
+                backoff_s = self.step_sleep_s
+            if backoff_s:
+                time.sleep(backoff_s)
+                throttled_s += backoff_s
+
+        t0 = time.perf_counter()
+        try:
+            dest = sqlite3.connect(raw)
+            try:
+                self.db.backup_to(dest, pages=self.pages_per_step, progress=progress)
+                self._check(dest, name)
+            finally:
+                dest.close()
+            with open(raw, 'rb') as src_f, gzip.open(gz_tmp, 'wb', compresslevel=6) as dst_f:
+                _copy(src_f, dst_f)
+            os.replace(gz_tmp, final)
+        finally:
+            _unlink(raw)
+            _unlink(gz_tmp)
+        return {
+            'name': name,
+            'size': os.path.getsize(final),
+            'steps': steps,
+            'elapsed_ms': round((time.perf_counter() - t0) * 1000.0, 1),
+            'throttled_ms': round(throttled_s * 1000.0, 1),
+            'created': datetime.now(self.tz).isoformat(),
+        }
+
+    @staticmethod
+    def _check(conn: sqlite3.Connection, label: str) -> None:
+        row = conn.execute("PRAGMA quick_check").fetchone()
+        if row is None or row[0] != 'ok':
+            raise BackupError(f"Backup {label} failed quick_check: {row[0] if row else None}")
+
+    def _rotate(self) -> None:
+        for backup in self.list_backups()[self.keep:]:
+            _unlink(os.path.join(self.directory, backup['name']))
+            logger.info("Rotated out backup %s", backup['name'])
+
+    def _seconds_until_due(self) -> float:
+        # Resume the schedule across restarts from the newest snapshot
+        backups = self.list_backups()
+        if not backups:
+            return min(300.0, self.interval_s)
+        newest = os.path.getmtime(os.path.join(self.directory, backups[0]['name']))
+        return max(60.0, newest + self.interval_s - time.time())
+
+    def _run(self) -> None:
+        while not self._stop.wait(timeout=self._seconds_until_due()):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Scheduled backup failed")
+                # Retry on the next interval rather than hammering the disk
+                if self._stop.wait(timeout=self.interval_s):
+                    return
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _copy(src: BinaryIO, dst: BinaryIO) -> None:
+    # Chunked with a yield in between: under eventlet this thread is a
+    # greenlet, and compressing a whole DB in one go would stall the hub.
+    while True:
+        chunk = src.read(_COPY_CHUNK)
+        if not chunk:
+            return
+        dst.write(chunk)
+        time.sleep(0)
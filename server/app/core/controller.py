@@ -2,10 +2,10 @@
 
 import os
 import tempfile
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Sequence
+from dataclasses import replace
 from datetime import datetime, timedelta
 from flask_login import current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 import logging
 
 from . import (
@@ -19,6 +19,19 @@ from . import (
     BMPData,
     CarHeaterStatus,
 )
+from .write_behind import WriteBehindQueue
+from .retention import DEFAULT_POLICIES, RetentionEngine, RetentionPolicy
+from .backup import BackupEngine
+from .timeutil import to_epoch_ms, day_range_ms
+from .rollups import ROLLUPS, rollup_statements, rebuild_rollups
+from .timeseries import lttb, bucket_aggregate
+from .latest_cache import CachedReading, LatestReadingCache
+from .frame_store import FrameStore
+from .api_key_cache import VerifiedKeyCache
+from .touch_tracker import TouchTracker
+from .user_cache import UserCache
+from .kdf import KdfPool
+from .hvac_rates import avg_rates
 import pytz
 import sqlite3
 import secrets
@@ -27,10 +40,209 @@ logger = logging.getLogger(__name__)
 
 
 class Controller:
-    def __init__(self, db_path: str = os.getenv("DB_PATH", os.path.join(tempfile.gettempdir(), "timelapse.db"))):
+    def __init__(
+        self,
+        db_path: str = os.getenv("DB_PATH", os.path.join(tempfile.gettempdir(), "timelapse.db")),
+        frame_dir: str | None = None,
+        frame_keep: int = 10,
+    ):
         from . import DatabaseManager
         self.db = DatabaseManager(db_path)
         self.finland_tz = pytz.timezone('Europe/Helsinki')
+        # Camera frames live on disk next to the DB unless configured otherwise
+        self.frames = FrameStore(
+            self.db,
+            frame_dir or os.path.join(
+                os.path.dirname(os.path.abspath(db_path)), 'frames'),
+            self.finland_tz,
+            keep=frame_keep,
+        )
+        try:
+            self.frames.migrate_legacy()
+        except Exception as e:
+            logger.warning("Legacy image migration failed: %s", e)
+        self.write_behind: WriteBehindQueue | None = None
+        self.retention: RetentionEngine | None = None
+        self.backups: BackupEngine | None = None
+        self.latest = LatestReadingCache()
+        # Newest car heater status; loaded from the DB on first use
+        self._last_car_heater: CarHeaterStatus | None = None
+        self._car_heater_loaded = False
+        self.api_key_cache = VerifiedKeyCache()
+        self.api_key_touches = TouchTracker(
+            self._write_api_key_touches, name='ApiKeyTouches')
+        self.users = UserCache(self.finland_tz)
+        # Password hashing runs on native threads, not the eventlet hub
+        self.kdf = KdfPool()
+        try:
+            self._seed_latest_cache()
+        except Exception as e:
+            logger.warning("Latest-reading cache seed failed: %s", e)
+        try:
+            self.get_last_car_heater_status()
+        except Exception as e:
+            logger.warning("Car heater status cache seed failed: %s", e)
+
+    # --- Write-behind ingestion ---
+    def enable_write_behind(self, flush_interval_ms: int = 250, max_batch: int = 200) -> None:
+        """
+        Route sensor and log inserts through a group-commit queue.
+        Rows recorded while enabled are returned with id=None and become
+        visible to readers after the next flush.
+        """
+        if self.write_behind is not None:
+            return
+        self.write_behind = WriteBehindQueue(
+            self.db, flush_interval_ms=flush_interval_ms, max_batch=max_batch)
+        self.write_behind.start()
+
+    def flush_write_behind(self) -> None:
+        """Stop the write-behind queue (if any) and flush pending rows."""
+        wb = self.write_behind
+        if wb is None:
+            return
+        self.write_behind = None
+        wb.stop()
+
+    # --- Retention ---
+    def start_retention(
+        self,
+        interval_s: float = 600,
+        logs_max_age_days: float | None = 90,
+        logs_max_rows: int | None = 100_000,
+    ) -> RetentionEngine:
+        """Start the scheduled retention engine (idempotent)."""
+        if self.retention is None:
+            policies = list(DEFAULT_POLICIES)
+            if logs_max_age_days or logs_max_rows:
+                policies.append(RetentionPolicy(
+                    'logs',
+                    max_age_days=logs_max_age_days or None,
+                    max_rows=logs_max_rows or None,
+                ))
+            self.retention = RetentionEngine(
+                self.db, self.finland_tz, policies=policies, interval_s=interval_s)
+            self.retention.start()
+        return self.retention
+
+    # --- Maintenance ---
+    def start_maintenance(self, offpeak_hour: int = 4, convert_max_mb: float = 256) -> None:
+        """Schedule daily off-peak optimize/ANALYZE/incremental vacuum."""
+        self.db.start_maintenance(
+            self.finland_tz, offpeak_hour=offpeak_hour, convert_max_mb=convert_max_mb)
+
+    def run_db_maintenance(self) -> Dict[str, Any]:
+        """Run maintenance now (with the scheduler's settings if configured)."""
+        return self.db.maintenance_scheduler(self.finland_tz).run_once()
+
+    def db_health(self, include_tables: bool = False) -> Dict[str, Any]:
+        health = self.db.health(include_tables=include_tables)
+        health['maintenance'] = self.db.maintenance.stats() if self.db.maintenance else None
+        return health
+
+    # --- Backups ---
+    def start_backups(
+        self,
+        directory: str | None = None,
+        interval_s: float = 86400,
+        keep: int = 7,
+        pages_per_step: int = 256,
+        step_sleep_ms: float = 20,
+        write_budget_ms: float = 50,
+    ) -> BackupEngine:
+        """Start scheduled online backups (idempotent)."""
+        engine = self.backup_engine(
+            directory, interval_s, keep, pages_per_step, step_sleep_ms, write_budget_ms)
+        engine.start()
+        return engine
+
+    def backup_engine(
+        self,
+        directory: str | None = None,
+        interval_s: float = 86400,
+        keep: int = 7,
+        pages_per_step: int = 256,
+        step_sleep_ms: float = 20,
+        write_budget_ms: float = 50,
+    ) -> BackupEngine:
+        """The shared backup engine, created on first use. It only runs on a
+        schedule once ``start_backups`` is called; manual runs (CLI, admin
+        API) use it directly. Backups default to ``backups`` next to the DB."""
+        if self.backups is None:
+            self.backups = BackupEngine(
+                self.db,
+                directory or os.path.join(
+                    os.path.dirname(os.path.abspath(self.db.db_path)), 'backups'),
+                self.finland_tz,
+                interval_s=interval_s,
+                keep=keep,
+                pages_per_step=pages_per_step,
+                step_sleep_ms=step_sleep_ms,
+                write_budget_ms=write_budget_ms,
+            )
+        return self.backups
+
+    def restore_backup(self, name: str) -> Dict[str, Any]:
+        """Load a snapshot into the live DB and drop state derived from it."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        result = self.backup_engine().restore(name)
+        self.latest = LatestReadingCache()
+        self._last_car_heater, self._car_heater_loaded = None, False
+        self.api_key_cache.invalidate()
+        self.users.invalidate()
+        try:
+            self._seed_latest_cache()
+        except Exception as e:
+            logger.warning("Latest-reading cache seed failed: %s", e)
+        try:
+            self.get_last_car_heater_status()
+        except Exception as e:
+            logger.warning("Car heater status cache seed failed: %s", e)
+        return result
+
+    def db_stats(self) -> Dict[str, Any]:
+        """Runtime metrics of the DB layer for the admin API."""
+        return {
+            'write_behind': self.write_behind.stats() if self.write_behind else None,
+            'retention': self.retention.stats() if self.retention else None,
+            'backups': self.backups.stats() if self.backups else None,
+            'maintenance': self.db.maintenance.stats() if self.db.maintenance else None,
+            'write_p99_ms': self.db.write_latency_ms(),
+            'query_stats': self.db.query_stats.stats(),
+            'latest_cache': self.latest.stats(),
+            'api_key_cache': self.api_key_cache.stats(),
+            'api_key_touches': self.api_key_touches.stats(),
+            'user_cache': self.users.stats(),
+            'kdf': self.kdf.stats(),
+        }
+
+    def _downsampled(
+        self,
+        query: str,
+        params: tuple,
+        start_ms: int,
+        end_ms: int,
+        y_field: str,
+        fields: Sequence[str],
+        to_dict: Callable[[sqlite3.Row], Dict[str, Any]],
+        max_points: int | None = None,
+        bucket_ms: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Stream ``query`` (must select ``ts_epoch_ms`` ordered ascending) and
+        reduce it in one pass: time buckets with mean/min/max of ``fields``
+        when ``bucket_ms`` is set, LTTB on ``y_field`` when ``max_points`` is
+        set, otherwise every row.
+        """
+        rows = self.db.iterate(query, params)
+        if bucket_ms:
+            return list(bucket_aggregate(
+                rows, 'ts_epoch_ms', fields, bucket_ms, self.finland_tz))
+        if max_points:
+            rows = lttb(rows, 'ts_epoch_ms', y_field,
+                        start_ms, end_ms, max_points)
+        return [to_dict(row) for row in rows]
 
     # --- User operations ---
     def register_user(
@@ -51,29 +263,30 @@ class Controller:
 
         # 1) Hash the password up front
         if password_hash is None and password:
-            pw_hash = generate_password_hash(password)
+            pw_hash = self.kdf.hash(password)
         elif password is None and password_hash is None:
             raise ValueError(
                 "Either password or password_hash must be provided")
         else:
             pw_hash = password_hash
 
-        # 2) Try to insert; if username exists, this is a no-op
-        cursor = self.db.execute_query(
-            "INSERT OR IGNORE INTO users (username, password_hash, is_admin, is_root_admin, is_temporary, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (username, pw_hash, 1 if is_admin else 0,
-             1 if is_root_admin else 0, 1 if is_temporary else 0, expires_at)
-        )
-        if cursor.rowcount == 1:
-            logger.debug(f"User '{username}' created successfully.")
-        else:
-            logger.debug(f"User '{username}' already exists, skipping INSERT.")
+        with self.db.transaction():
+            # 2) Try to insert; if username exists, this is a no-op
+            cursor = self.db.execute_query(
+                "INSERT OR IGNORE INTO users (username, password_hash, is_admin, is_root_admin, is_temporary, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (username, pw_hash, 1 if is_admin else 0,
+                 1 if is_root_admin else 0, 1 if is_temporary else 0, expires_at)
+            )
+            if cursor.rowcount == 1:
+                logger.debug(f"User '{username}' created successfully.")
+            else:
+                logger.debug(f"User '{username}' already exists, skipping INSERT.")
 
-        # 3) Fetch whatever is now in the table
-        row = self.db.fetchone(
-            "SELECT id, username, password_hash, is_admin, is_root_admin, is_temporary, expires_at FROM users WHERE username = ?",
-            (username,)
-        )
+            # 3) Fetch whatever is now in the table
+            row = self.db.fetchone(
+                "SELECT id, username, password_hash, is_admin, is_root_admin, is_temporary, expires_at FROM users WHERE username = ?",
+                (username,)
+            )
         if row is None:
             # This really should never happen
             logger.exception(
@@ -111,6 +324,7 @@ class Controller:
             "UPDATE users SET is_admin = ? WHERE username = ?",
             (is_admin, username)
         )
+        self.users.invalidate(username)
 
     def authenticate_user(self, username: str, password: str) -> bool:
         row = self.db.fetchone(
@@ -118,7 +332,7 @@ class Controller:
         )
         if row is None:
             return False
-        return check_password_hash(row['password_hash'], password)
+        return self.kdf.check(row['password_hash'], password)
 
     def get_all_users(self, exclude_admin: bool = False, exclude_current: bool = False, exclude_expired: bool = False) -> list[User]:
         """Palauttaa listan kaikista käyttäjistä."""
@@ -143,13 +357,21 @@ class Controller:
         return users
 
     def get_user_by_username(self, username: str, include_pw: bool = True) -> User | None:
+        """Look a user up by name. Without the password hash
+        (``include_pw=False``) the result may come from the user cache."""
+        cacheable = not include_pw and not self.db.in_transaction()
+        if cacheable:
+            cached = self.users.get(username)
+            if cached is not None:
+                return cached
+            generation = self.users.generation()
         row = self.db.fetchone(
             "SELECT id, username, password_hash, is_admin, is_root_admin, is_temporary, expires_at FROM users WHERE username = ?",
             (username,)
         )
         if not row:
             return None
-        return User(
+        user = User(
             id=row['id'],
             username=row['username'],
             password_hash=row['password_hash'] if include_pw else None,
@@ -158,6 +380,9 @@ class Controller:
             is_temporary=row['is_temporary'],
             expires_at=row['expires_at']
         )
+        if cacheable:
+            self.users.put(replace(user), generation)
+        return user
 
     def delete_user(self, username: str) -> None:
         """Poistaa käyttäjän annetulla käyttäjätunnuksella."""
@@ -165,6 +390,7 @@ class Controller:
             "DELETE FROM users WHERE username = ?",
             (username,)
         )
+        self.users.invalidate(username)
 
     def delete_temporary_users(self) -> None:
         """Deletes all temporary users."""
@@ -172,6 +398,7 @@ class Controller:
             "DELETE FROM users WHERE is_temporary = 1",
             ()
         )
+        self.users.invalidate()
 
     def delete_expired_temporary_users(self) -> None:
         """Deletes all expired temporary users."""
@@ -180,6 +407,7 @@ class Controller:
             "DELETE FROM users WHERE is_temporary = 1 AND expires_at IS NOT NULL AND expires_at < ?",
             (now,)
         )
+        self.users.invalidate()
 
     def update_user(
         self,
@@ -195,6 +423,24 @@ class Controller:
         If is_temporary is False, expires_at will be set to NULL regardless of value.
         Returns the updated User object.
         """
+        # Hash before taking the write lock; it is deliberately slow
+        pw_hash = self.kdf.hash(password) if password else None
+        try:
+            with self.db.transaction():
+                return self._update_user(
+                    current_username, new_username, pw_hash, is_temporary, is_admin, expires_at)
+        finally:
+            self.users.invalidate(current_username, new_username)
+
+    def _update_user(
+        self,
+        current_username: str,
+        new_username: str | None,
+        pw_hash: str | None,
+        is_temporary: bool | None,
+        is_admin: bool | None,
+        expires_at: str | None,
+    ) -> User:
         row = self.db.fetchone(
             "SELECT id, username, password_hash, is_admin, is_temporary, expires_at FROM users WHERE username = ?",
             (current_username,)
@@ -209,8 +455,7 @@ class Controller:
             updates.append("username = ?")
             params.append(new_username)
 
-        if password:
-            pw_hash = generate_password_hash(password)
+        if pw_hash:
             updates.append("password_hash = ?")
             params.append(pw_hash)
 
@@ -258,25 +503,75 @@ class Controller:
 
     # --- Sensor data operations ---
 
-    def record_esp32_temphum(self, location: str, temperature: float, humidity: float, ac_on: bool | None = None) -> ESP32TemperatureHumidity:
-        now = datetime.now(self.finland_tz).isoformat()
+    def record_esp32_temphum(
+        self,
+        location: str,
+        temperature: float,
+        humidity: float,
+        ac_on: bool | None = None,
+        infer_ac: bool = False,
+    ) -> ESP32TemperatureHumidity:
+        """Store one reading (plus its rollup upserts) in one commit.
+
+        With ``infer_ac`` and no ``ac_on``, the AC state is taken from the
+        persisted thermostat phase, read in the same transaction as the
+        insert.
+        """
+        now_dt = datetime.now(self.finland_tz)
+        now = now_dt.isoformat()
+        ts_ms = to_epoch_ms(now_dt, self.finland_tz)
+        if self.write_behind is not None:
+            if ac_on is None and infer_ac:
+                ac_on = self._ac_on_from_conf()
+            query, params, rollups = self._esp32_temphum_statements(
+                location, now, ts_ms, temperature, humidity, ac_on)
+            # Raw row and rollups are one unit: all of them or none
+            self.write_behind.submit_many([(query, params), *rollups])
+            saved = ESP32TemperatureHumidity(
+                id=None, location=location, timestamp=now,
+                temperature=temperature, humidity=humidity,
+                ac_on=None if ac_on is None else bool(ac_on))
+        else:
+            with self.db.transaction():
+                if ac_on is None and infer_ac:
+                    ac_on = self._ac_on_from_conf()
+                query, params, rollups = self._esp32_temphum_statements(
+                    location, now, ts_ms, temperature, humidity, ac_on)
+                row = self.db.insert_returning(
+                    query, params, "id, location, timestamp, temperature, humidity, ac_on",
+                    followups=rollups)
+            if row is None:
+                raise RuntimeError(
+                    "Failed to retrieve inserted esp32_temphum record")
+            saved = ESP32TemperatureHumidity(
+                id=row['id'], location=row['location'], timestamp=row['timestamp'],
+                temperature=row['temperature'], humidity=row['humidity'],
+                ac_on=(None if row['ac_on'] is None else bool(row['ac_on']))
+            )
+        self.latest.update(saved, ts_ms)
+        return saved
+
+    @staticmethod
+    def _esp32_temphum_statements(
+        location: str,
+        timestamp: str,
+        ts_ms: int,
+        temperature: float,
+        humidity: float,
+        ac_on: bool | None,
+    ) -> tuple[str, tuple, list]:
         # Insert with optional AC state flag (nullable)
-        self.db.execute_query(
-            "INSERT INTO esp32_temphum (location, timestamp, temperature, humidity, ac_on) VALUES (?, ?, ?, ?, ?)",
-            (location, now, temperature, humidity,
-             None if ac_on is None else (1 if ac_on else 0))
-        )
-        row = self.db.fetchone(
-            "SELECT id, location, timestamp, temperature, humidity, ac_on FROM esp32_temphum ORDER BY id DESC LIMIT 1"
-        )
-        if row is None:
-            raise RuntimeError(
-                "Failed to retrieve inserted esp32_temphum record")
-        return ESP32TemperatureHumidity(
-            id=row['id'], location=row['location'], timestamp=row['timestamp'],
-            temperature=row['temperature'], humidity=row['humidity'],
-            ac_on=(None if row['ac_on'] is None else bool(row['ac_on']))
-        )
+        query = "INSERT INTO esp32_temphum (location, timestamp, ts_epoch_ms, temperature, humidity, ac_on) VALUES (?, ?, ?, ?, ?, ?)"
+        params = (location, timestamp, ts_ms, temperature, humidity,
+                  None if ac_on is None else (1 if ac_on else 0))
+        # 1-minute / 1-hour rollups are folded in alongside the raw row
+        return query, params, rollup_statements(location, ts_ms, temperature, humidity, ac_on)
+
+    def _ac_on_from_conf(self) -> bool | None:
+        row = self.db.fetchone("SELECT current_phase FROM thermostat_conf WHERE id = 1")
+        if row is None or row['current_phase'] not in ('on', 'off'):
+            return None
+        return row['current_phase'] == 'on'
 
     # --- AC event logging / queries ---
     def record_ac_event(self, is_on: bool, source: str | None = None, note: str | None = None, when_iso: str | None = None) -> None:
@@ -289,14 +584,15 @@ class Controller:
         """
         ts = when_iso or datetime.now(self.finland_tz).isoformat()
         self.db.execute_query(
-            "INSERT INTO ac_events (timestamp, is_on, source, note) VALUES (?, ?, ?, ?)",
-            (ts, 1 if is_on else 0, source, note)
+            "INSERT INTO ac_events (timestamp, ts_epoch_ms, is_on, source, note) VALUES (?, ?, ?, ?, ?)",
+            (ts, to_epoch_ms(ts, self.finland_tz), 1 if is_on else 0, source, note)
         )
 
     def get_ac_events_between(self, start_iso: str, end_iso: str) -> list[dict]:
         rows = self.db.fetchall(
-            "SELECT id, timestamp, is_on, source, note FROM ac_events WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
-            (start_iso, end_iso)
+            "SELECT id, timestamp, is_on, source, note FROM ac_events WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ? ORDER BY ts_epoch_ms, id",
+            (to_epoch_ms(start_iso, self.finland_tz),
+             to_epoch_ms(end_iso, self.finland_tz))
         )
         return [
             {
@@ -311,13 +607,55 @@ class Controller:
 
     def get_last_ac_state_before(self, ts_iso: str) -> bool | None:
         row = self.db.fetchone(
-            "SELECT is_on FROM ac_events WHERE timestamp <= ? ORDER BY timestamp DESC, id DESC LIMIT 1",
-            (ts_iso,)
+            "SELECT is_on FROM ac_events WHERE ts_epoch_ms <= ? ORDER BY ts_epoch_ms DESC, id DESC LIMIT 1",
+            (to_epoch_ms(ts_iso, self.finland_tz),)
         )
         if row is None:
             return None
         return bool(row['is_on'])
 
+    def get_hvac_avg_rates(self, location: str, start_ms: int, end_ms: int) -> Dict[str, Any]:
+        """Average cooling/heating rates for ``location`` over
+        [start_ms, end_ms] (see hvac_rates.avg_rates).
+
+        Readings and AC events are fetched as columns, so no per-row
+        objects or timestamp parsing are involved.
+        """
+        readings = self.db.fetch_columns(
+            """
+            SELECT ts_epoch_ms, temperature
+              FROM esp32_temphum
+             WHERE location = ? AND ts_epoch_ms >= ? AND ts_epoch_ms <= ?
+             ORDER BY ts_epoch_ms
+            """,
+            (location, int(start_ms), int(end_ms)),
+            (('ts_ms', 'i8'), ('temperature', 'f8')),
+        )
+        events = self.db.fetch_columns(
+            "SELECT ts_epoch_ms, is_on FROM ac_events WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ? ORDER BY ts_epoch_ms, id",
+            (int(start_ms), int(end_ms)),
+            (('ts_ms', 'i8'), ('is_on', '?')),
+        )
+        row = self.db.fetchone(
+            "SELECT is_on FROM ac_events WHERE ts_epoch_ms <= ? ORDER BY ts_epoch_ms DESC, id DESC LIMIT 1",
+            (int(start_ms),)
+        )
+        init_state = bool(row['is_on']) if row is not None else None
+        if init_state is None:
+            try:
+                conf = self.get_thermostat_conf()
+                if conf and conf.current_phase in ('on', 'off'):
+                    init_state = (conf.current_phase == 'on')
+            except Exception:
+                init_state = None
+        result = avg_rates(
+            readings['ts_ms'], readings['temperature'],
+            events['ts_ms'], events['is_on'], init_state)
+        result['readings'] = int(readings['ts_ms'].size)
+        result['events'] = int(events['ts_ms'].size)
+        result['init_state'] = init_state
+        return result
+
     def get_last_esp32_temphum(self) -> Optional[ESP32TemperatureHumidity]:
         row = self.db.fetchone(
             "SELECT id, location, timestamp, temperature, humidity, ac_on FROM esp32_temphum ORDER BY id DESC LIMIT 1"
@@ -331,14 +669,16 @@ class Controller:
         )
 
     def get_esp32_temphum_for_date(self, date_str: str, location: str) -> List[ESP32TemperatureHumidity]:
+        """Readings for one local (Helsinki) calendar day, oldest first."""
+        start_ms, end_ms = day_range_ms(date_str, self.finland_tz)
         rows = self.db.fetchall(
             """
             SELECT id, location, timestamp, temperature, humidity, ac_on
               FROM esp32_temphum
-             WHERE date(timestamp) = ? AND location = ?
-             ORDER BY timestamp
+             WHERE location = ? AND ts_epoch_ms >= ? AND ts_epoch_ms < ?
+             ORDER BY ts_epoch_ms
             """,
-            (date_str, location)
+            (location, start_ms, end_ms)
         )
         return [
             ESP32TemperatureHumidity(
@@ -352,86 +692,188 @@ class Controller:
             for row in rows
         ]
 
-    def get_last_esp32_temphum_for_location(self, location: str) -> Optional[ESP32TemperatureHumidity]:
-        """Return the most recent ESP32TemperatureHumidity row for a given location, or None."""
-        row = self.db.fetchone(
+    def get_esp32_temphum_rollup(
+        self, location: str, start_ms: int, end_ms: int, resolution: str = '1h'
+    ) -> List[Dict[str, Any]]:
+        """Rollup buckets in [start_ms, end_ms) for a location, oldest first."""
+        if resolution not in ROLLUPS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        table, _ = ROLLUPS[resolution]
+        rows = self.db.fetchall(
+            f"""
+            SELECT bucket_ms, n, temp_sum, temp_min, temp_max, temp_first, temp_last,
+                   hum_sum, hum_min, hum_max, hum_first, hum_last, ac_on_n, ac_known_n
+              FROM {table}
+             WHERE location = ? AND bucket_ms >= ? AND bucket_ms < ?
+             ORDER BY bucket_ms
+            """,
+            (location, int(start_ms), int(end_ms))
+        )
+        return [
+            {
+                'bucket_ms': row['bucket_ms'],
+                'timestamp': datetime.fromtimestamp(
+                    row['bucket_ms'] / 1000.0, self.finland_tz).isoformat(),
+                'count': row['n'],
+                'temperature': {
+                    'avg': row['temp_sum'] / row['n'],
+                    'min': row['temp_min'],
+                    'max': row['temp_max'],
+                    'first': row['temp_first'],
+                    'last': row['temp_last'],
+                },
+                'humidity': {
+                    'avg': row['hum_sum'] / row['n'],
+                    'min': row['hum_min'],
+                    'max': row['hum_max'],
+                    'first': row['hum_first'],
+                    'last': row['hum_last'],
+                },
+                'ac_on_fraction': (row['ac_on_n'] / row['ac_known_n']
+                                   if row['ac_known_n'] else None),
+            }
+            for row in rows
+        ]
+
+    def rebuild_esp32_rollups(self, start_ms: int | None = None, end_ms: int | None = None) -> Dict[str, Any]:
+        """Regenerate esp32_temphum rollups from raw rows (default: all history)."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return rebuild_rollups(self.db, start_ms, end_ms)
+
+    def get_esp32_temphum_series(
+        self, date_str: str, location: str,
+        max_points: int | None = None, bucket_ms: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Downsampled day of readings (see ``_downsampled``) as JSON-ready dicts."""
+        start_ms, end_ms = day_range_ms(date_str, self.finland_tz)
+        return self._downsampled(
             """
-            SELECT id, location, timestamp, temperature, humidity, ac_on
+            SELECT timestamp, ts_epoch_ms, temperature, humidity, ac_on
               FROM esp32_temphum
-             WHERE location = ?
-             ORDER BY timestamp DESC, id DESC
-             LIMIT 1
+             WHERE location = ? AND ts_epoch_ms >= ? AND ts_epoch_ms < ?
+             ORDER BY ts_epoch_ms
             """,
-            (location,)
+            (location, start_ms, end_ms), start_ms, end_ms,
+            'temperature', ('temperature', 'humidity'),
+            lambda row: {
+                'timestamp': row['timestamp'],
+                'temperature': row['temperature'],
+                'humidity': row['humidity'],
+                'ac_on': None if row['ac_on'] is None else bool(row['ac_on']),
+            },
+            max_points=max_points, bucket_ms=bucket_ms,
         )
-        if row is None:
-            return None
-        return ESP32TemperatureHumidity(
-            id=row['id'],
-            location=row['location'],
-            timestamp=row['timestamp'],
-            temperature=row['temperature'],
-            humidity=row['humidity'],
-            ac_on=(None if row['ac_on'] is None else bool(row['ac_on']))
+
+    @staticmethod
+    def _cached_from_row(row: sqlite3.Row, source: str = 'db') -> CachedReading:
+        return CachedReading(
+            reading=ESP32TemperatureHumidity(
+                id=row['id'],
+                location=row['location'],
+                timestamp=row['timestamp'],
+                temperature=row['temperature'],
+                humidity=row['humidity'],
+                ac_on=(None if row['ac_on'] is None else bool(row['ac_on']))
+            ),
+            ts_epoch_ms=row['ts_epoch_ms'] or 0,
+            source=source,
         )
 
-    def get_unique_locations(self) -> List[Dict[str, Any]]:
-        """
-        Return the latest (most recent) reading per unique location,
-        as a list of dicts with keys: location, temp, hum.
-        """
+    def _seed_latest_cache(self) -> None:
+        """Load the newest reading of every location into ``self.latest``."""
         try:
             # Fast path: use a window function to rank rows per location
             rows = self.db.fetchall(
                 """
-                SELECT id, location, timestamp, temperature, humidity
+                SELECT id, location, timestamp, temperature, humidity, ac_on, ts_epoch_ms
                 FROM (
                   SELECT e.*, ROW_NUMBER() OVER (
                               PARTITION BY location
-                              ORDER BY timestamp DESC, id DESC
+                              ORDER BY ts_epoch_ms DESC, id DESC
                             ) AS rn
                   FROM esp32_temphum AS e
                 )
                 WHERE rn = 1
-                ORDER BY location
                 """
             )
         except Exception:
             # Fallback for older SQLite versions without window functions
             rows = self.db.fetchall(
                 """
-                SELECT e.id, e.location, e.timestamp, e.temperature, e.humidity
+                SELECT e.id, e.location, e.timestamp, e.temperature, e.humidity,
+                       e.ac_on, e.ts_epoch_ms
                 FROM esp32_temphum AS e
                 WHERE e.id = (
                     SELECT e2.id
                       FROM esp32_temphum AS e2
                      WHERE e2.location = e.location
-                     ORDER BY e2.timestamp DESC, e2.id DESC
+                     ORDER BY e2.ts_epoch_ms DESC
                      LIMIT 1
                 )
-                ORDER BY e.location
                 """
             )
+        self.latest.seed([self._cached_from_row(row) for row in rows])
+
+    def get_latest_reading(self, location: str) -> Optional[CachedReading]:
+        """
+        Latest reading for a location with its epoch time, served from the
+        write-through cache. Falls back to the DB (and fills the cache) on a
+        miss, e.g. for rows written by another process.
+        """
+        entry = self.latest.get(location)
+        if entry is not None:
+            return entry
+        row = self.db.fetchone(
+            """
+            SELECT id, location, timestamp, temperature, humidity, ac_on, ts_epoch_ms
+              FROM esp32_temphum
+             WHERE location = ?
+             ORDER BY ts_epoch_ms DESC
+             LIMIT 1
+            """,
+            (location,)
+        )
+        if row is None:
+            return None
+        entry = self._cached_from_row(row)
+        self.latest.update(entry.reading, entry.ts_epoch_ms, source='db')
+        return entry
 
+    def get_last_esp32_temphum_for_location(self, location: str) -> Optional[ESP32TemperatureHumidity]:
+        """Return the most recent ESP32TemperatureHumidity row for a given location, or None."""
+        entry = self.get_latest_reading(location)
+        return entry.reading if entry is not None else None
+
+    def get_unique_locations(self) -> List[Dict[str, Any]]:
+        """
+        Return the latest (most recent) reading per unique location,
+        as a list of dicts with keys: location, temperature, humidity,
+        timestamp and age_s.
+        """
+        if not self.latest.seeded:
+            self._seed_latest_cache()
         return [
             {
-                "location": row["location"],
-                "temperature": float(row["temperature"]) if row["temperature"] is not None else None,
-                "humidity": float(row["humidity"]) if row["humidity"] is not None else None,
-                "timestamp": row["timestamp"],
+                "location": e.reading.location,
+                "temperature": float(e.reading.temperature) if e.reading.temperature is not None else None,
+                "humidity": float(e.reading.humidity) if e.reading.humidity is not None else None,
+                "timestamp": e.reading.timestamp,
+                "age_s": round(e.age_s(), 1),
             }
-            for row in rows
+            for e in self.latest.all()
         ]
 
     def update_status(self, status: str) -> Status:
         now = datetime.now(self.finland_tz).isoformat()
-        self.db.execute_query(
-            "UPDATE status SET timestamp = ?, status = ?",
-            (now, status)
-        )
-        row = self.db.fetchone(
-            "SELECT id, timestamp, status FROM status"
-        )
+        with self.db.transaction():
+            self.db.execute_query(
+                "UPDATE status SET timestamp = ?, status = ?",
+                (now, status)
+            )
+            row = self.db.fetchone(
+                "SELECT id, timestamp, status FROM status"
+            )
         if row is None:
             raise RuntimeError("Failed to retrieve inserted status record")
         return Status(id=row['id'], timestamp=row['timestamp'], status=row['status'])
@@ -444,26 +886,38 @@ class Controller:
             return None
         return Status(id=row['id'], timestamp=row['timestamp'], status=row['status'])
 
-    def record_image(self, image_base64: str) -> ImageData:
-        now = datetime.now(self.finland_tz).isoformat()
-        self.db.execute_query(
-            "INSERT INTO images (timestamp, image) VALUES (?, ?)",
-            (now, image_base64)
-        )
-        row = self.db.fetchone(
-            "SELECT id, timestamp, image FROM images ORDER BY id DESC LIMIT 1"
-        )
-        if row is None:
-            raise RuntimeError("Failed to retrieve inserted image record")
-        return ImageData(id=row['id'], timestamp=row['timestamp'], image=row['image'])
+    def record_image(self, image: bytes | str, mime: str = 'image/jpeg') -> ImageData:
+        """Store a frame (raw bytes, or base64 from older clients) in the frame store."""
+        if isinstance(image, str):
+            return self.frames.put_base64(image, mime)
+        return self.frames.put(bytes(image), mime)
 
-    def get_last_image(self) -> Optional[ImageData]:
-        row = self.db.fetchone(
-            "SELECT id, timestamp, image FROM images ORDER BY id DESC LIMIT 1"
-        )
-        if row is None:
+    @property
+    def preview_path(self) -> str:
+        """Where the printer client writes its newest frame before signalling."""
+        return os.path.join(tempfile.gettempdir(), 'preview.jpg')
+
+    def record_preview_file(self) -> Optional[ImageData]:
+        """Store preview.jpg in the frame store, stamped with its mtime.
+
+        Returns None if the file does not exist or is empty.
+        """
+        try:
+            with open(self.preview_path, 'rb') as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data:
             return None
-        return ImageData(id=row['id'], timestamp=row['timestamp'], image=row['image'])
+        ts = datetime.fromtimestamp(mtime, self.finland_tz).isoformat()
+        return self.frames.put(data, timestamp=ts)
+
+    def get_last_image(self) -> Optional[ImageData]:
+        return self.frames.latest()
+
+    def get_image(self, sha256: str) -> Optional[ImageData]:
+        return self.frames.get(sha256)
 
     def get_timelapse_conf(self) -> Optional[TimelapseConf]:
         row = self.db.fetchone(
@@ -508,11 +962,31 @@ class Controller:
         """
         Logs a message with the given type ('info', 'warning', 'error', 'auth', 'ac').
         """
-        now = datetime.now(self.finland_tz).isoformat()
-        self.db.execute_query(
-            "INSERT INTO logs (timestamp, type, message) VALUES (?, ?, ?)",
-            (now, log_type, message)
-        )
+        now_dt = datetime.now(self.finland_tz)
+        query = "INSERT INTO logs (timestamp, ts_epoch_ms, type, message) VALUES (?, ?, ?, ?)"
+        params = (now_dt.isoformat(), to_epoch_ms(now_dt, self.finland_tz),
+                  log_type, message)
+        if self.write_behind is not None:
+            self.write_behind.submit(query, params)
+            return
+        self.db.execute_query(query, params)
+
+    def log_messages(self, entries: Sequence[tuple[str, str, float]]) -> None:
+        """
+        Insert several log rows in one transaction.
+
+        :param entries: (message, log_type, created) tuples; ``created`` is a
+            UNIX timestamp such as ``LogRecord.created``
+        """
+        rows = []
+        for message, log_type, created in entries:
+            when = datetime.fromtimestamp(created, self.finland_tz)
+            rows.append((when.isoformat(), int(round(created * 1000)),
+                         log_type, message))
+        if rows:
+            self.db.executemany(
+                "INSERT INTO logs (timestamp, ts_epoch_ms, type, message) VALUES (?, ?, ?, ?)",
+                rows)
 
     def get_logs(self, limit: int = 100) -> List[dict]:
         """
@@ -524,6 +998,89 @@ class Controller:
         )
         return [dict(row) for row in rows]
 
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """
+        Turn free text into a safe FTS5 query: every word is matched as a
+        quoted token (AND-ed); a trailing ``*`` keeps prefix matching.
+        """
+        terms = []
+        for word in text.split():
+            prefix = word.endswith('*')
+            word = word.rstrip('*').replace('"', '""')
+            if word:
+                terms.append(f'"{word}"' + ('*' if prefix else ''))
+        return ' '.join(terms)
+
+    def search_logs(
+        self,
+        query: str | None = None,
+        types: Sequence[str] | None = None,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[List[dict], str | None]:
+        """
+        Newest-first log page with optional full-text ``query``, ``types``
+        filter and [start_ms, end_ms) range.
+
+        Pagination is keyset-based: pass the returned cursor to get the next
+        (older) page; it is None when there are no more rows. Cost per page
+        is independent of how deep the user has paged.
+        """
+        limit = max(1, min(int(limit), 500))
+        where: List[str] = []
+        params: List[Any] = []
+        if types:
+            where.append(f"type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if start_ms is not None:
+            where.append("ts_epoch_ms >= ?")
+            params.append(int(start_ms))
+        if end_ms is not None:
+            where.append("ts_epoch_ms < ?")
+            params.append(int(end_ms))
+        if cursor:
+            try:
+                cur_ts, cur_id = (int(x) for x in cursor.split('_', 1))
+            except ValueError:
+                raise ValueError("Invalid cursor") from None
+            where.append("(ts_epoch_ms, id) < (?, ?)")
+            params.extend((cur_ts, cur_id))
+        if query and query.strip():
+            if self.db.has_logs_fts:
+                fts = self._fts_query(query)
+                if fts:
+                    where.append(
+                        "id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)")
+                    params.append(fts)
+            else:
+                escaped = query.strip().replace('\\', '\\\\').replace(
+                    '%', '\\%').replace('_', '\\_')
+                where.append("message LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+        sql = "SELECT id, timestamp, ts_epoch_ms, type, message FROM logs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts_epoch_ms DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = self.db.fetchall(sql, tuple(params))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last['ts_epoch_ms']}_{last['id']}"
+        return [
+            {
+                'id': row['id'],
+                'timestamp': row['timestamp'],
+                'type': row['type'],
+                'message': row['message'],
+            }
+            for row in rows
+        ], next_cursor
+
     # --- API key management ---
     def create_api_key(self, name: str, created_by: str | None = None) -> tuple[ApiKey, str]:
         """Create a new API key. Stores only a salted hash; returns the full token once.
@@ -538,15 +1095,12 @@ class Controller:
         secret = secrets.token_urlsafe(32)
         token = f"sk_{key_id}_{secret}"
         # Use a password hash to store the secret (includes salt and iterations)
-        secret_hash = generate_password_hash(secret)
+        secret_hash = self.kdf.hash(secret)
         now = datetime.now(self.finland_tz).isoformat()
-        self.db.execute_query(
+        row = self.db.insert_returning(
             "INSERT INTO api_keys (key_id, name, secret_hash, created_at, created_by, revoked, last_used_at) VALUES (?, ?, ?, ?, ?, 0, NULL)",
-            (key_id, name.strip(), secret_hash, now, created_by)
-        )
-        row = self.db.fetchone(
-            "SELECT id, key_id, name, created_at, created_by, revoked, last_used_at FROM api_keys WHERE key_id = ?",
-            (key_id,)
+            (key_id, name.strip(), secret_hash, now, created_by),
+            "id, key_id, name, created_at, created_by, revoked, last_used_at"
         )
         if row is None:
             raise RuntimeError("Failed to create API key")
@@ -561,26 +1115,39 @@ class Controller:
             "SELECT id, key_id, name, created_at, created_by, revoked, last_used_at FROM api_keys ORDER BY id DESC",
             ()
         )
+        # Touches not flushed yet are newer than the stored value
+        pending = self.api_key_touches.pending()
         return [
             ApiKey(
                 id=row['id'], key_id=row['key_id'], name=row['name'], created_at=row['created_at'],
-                created_by=row['created_by'], revoked=bool(row['revoked']), last_used_at=row['last_used_at']
+                created_by=row['created_by'], revoked=bool(row['revoked']),
+                last_used_at=pending.get(row['id'], row['last_used_at'])
             )
             for row in rows
         ]
 
     def delete_api_key(self, key_id: str) -> None:
-        self.db.execute_query(
-            "DELETE FROM api_keys WHERE key_id = ?", (key_id,))
+        with self.db.transaction():
+            self.db.execute_query(
+                "DELETE FROM api_keys WHERE key_id = ?", (key_id,))
+            self.db.bump_revision('api_keys')
+        self.api_key_cache.invalidate(key_id)
 
     def revoke_api_key(self, key_id: str) -> None:
-        self.db.execute_query(
-            "UPDATE api_keys SET revoked = 1 WHERE key_id = ?", (key_id,))
+        with self.db.transaction():
+            self.db.execute_query(
+                "UPDATE api_keys SET revoked = 1 WHERE key_id = ?", (key_id,))
+            self.db.bump_revision('api_keys')
+        self.api_key_cache.invalidate(key_id)
 
     def verify_api_key_token(self, token: str) -> dict | None:
         """Verify a presented API key token and return key metadata on success.
 
-        On success, updates last_used_at. Returns dict with key fields; otherwise None.
+        On success, records last_used_at (written in batches by
+        ``api_key_touches``). Returns dict with key fields; otherwise None.
+        Verified tokens are kept in ``api_key_cache`` so repeat requests skip
+        the password hash; the shared ``api_keys`` revision is checked first,
+        so a revoke or delete in any process takes effect on the next request.
         """
         try:
             if not token or not token.startswith('sk_'):
@@ -596,22 +1163,34 @@ class Controller:
         except Exception:
             return None
 
+        cache = self.api_key_cache
+        revision: int | None = None
+        if cache.enabled:
+            try:
+                # Read before the row so a revoke committed meanwhile
+                # makes the put below a no-op
+                revision = self.db.revision('api_keys')
+                cache.sync(revision)
+            except Exception as e:
+                logger.warning("API key cache revision check failed: %s", e)
+                revision = None
+                cache.invalidate()
+            else:
+                meta = cache.get(token)
+                if meta is not None:
+                    self._touch_api_key(meta['id'])
+                    return meta
+
         row = self.db.fetchone(
             "SELECT id, key_id, name, secret_hash, created_at, created_by, revoked, last_used_at FROM api_keys WHERE key_id = ?",
             (key_id,)
         )
         if row is None or bool(row['revoked']):
             return None
-        if not check_password_hash(row['secret_hash'], secret):
+        if not self.kdf.check(row['secret_hash'], secret):
             return None
-        # Update last_used_at best-effort
-        try:
-            now = datetime.now(self.finland_tz).isoformat()
-            self.db.execute_query(
-                "UPDATE api_keys SET last_used_at = ? WHERE id = ?", (now, row['id']))
-        except Exception:
-            pass
-        return {
+        self._touch_api_key(row['id'])
+        meta = {
             'id': row['id'],
             'key_id': row['key_id'],
             'name': row['name'],
@@ -620,6 +1199,21 @@ class Controller:
             'revoked': bool(row['revoked']),
             'last_used_at': row['last_used_at'],
         }
+        cache.put(token, meta, revision)
+        return meta
+
+    def _touch_api_key(self, row_id: int) -> None:
+        # last_used_at is coalesced in memory and written in batches
+        self.api_key_touches.touch(row_id, datetime.now(self.finland_tz).isoformat())
+
+    def _write_api_key_touches(self, touches: Dict[Any, str]) -> None:
+        self.db.executemany(
+            "UPDATE api_keys SET last_used_at = ? WHERE id = ?",
+            [(ts, row_id) for row_id, ts in touches.items()])
+
+    def flush_api_key_touches(self) -> None:
+        """Write pending last_used_at values (called at shutdown)."""
+        self.api_key_touches.stop()
 
     # --- Thermostat configuration operations ---
     def get_thermostat_conf(self) -> ThermostatConf | None:
@@ -687,54 +1281,55 @@ class Controller:
         current_phase: str | None = None,
         phase_started_at: str | None = None,
     ) -> ThermostatConf:
-        self.db.execute_query(
-            """
-            INSERT INTO thermostat_conf (id, sleep_active, sleep_start, sleep_stop, sleep_weekly, control_locations, target_temp, pos_hysteresis, neg_hysteresis, thermo_active,
-                                         total_on_s, total_off_s, min_on_s, min_off_s, poll_interval_s, smooth_window, max_stale_s,
-                                         current_phase, phase_started_at)
-            VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                sleep_active = excluded.sleep_active,
-                sleep_start = excluded.sleep_start,
-                sleep_stop = excluded.sleep_stop,
-                sleep_weekly = excluded.sleep_weekly,
-                control_locations = excluded.control_locations,
-                target_temp = excluded.target_temp,
-                pos_hysteresis = excluded.pos_hysteresis,
-                neg_hysteresis = excluded.neg_hysteresis,
-                thermo_active = excluded.thermo_active,
-                total_on_s = excluded.total_on_s,
-                total_off_s = excluded.total_off_s,
-                min_on_s = excluded.min_on_s,
-                min_off_s = excluded.min_off_s,
-                poll_interval_s = excluded.poll_interval_s,
-                smooth_window = excluded.smooth_window,
-                max_stale_s = excluded.max_stale_s,
-                current_phase = excluded.current_phase,
-                phase_started_at = excluded.phase_started_at
-            """,
-            (
-                1 if sleep_active else 0,
-                sleep_start,
-                sleep_stop,
-                sleep_weekly,
-                control_locations,
-                float(target_temp),
-                float(pos_hysteresis),
-                float(neg_hysteresis),
-                1 if thermo_active else 0,
-                int(total_on_s),
-                int(total_off_s),
-                int(min_on_s),
-                int(min_off_s),
-                int(poll_interval_s),
-                int(smooth_window),
-                None if max_stale_s is None else int(max_stale_s),
-                current_phase,
-                phase_started_at,
-            ),
-        )
-        conf = self.get_thermostat_conf()
+        with self.db.transaction():
+            self.db.execute_query(
+                """
+                INSERT INTO thermostat_conf (id, sleep_active, sleep_start, sleep_stop, sleep_weekly, control_locations, target_temp, pos_hysteresis, neg_hysteresis, thermo_active,
+                                             total_on_s, total_off_s, min_on_s, min_off_s, poll_interval_s, smooth_window, max_stale_s,
+                                             current_phase, phase_started_at)
+                VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    sleep_active = excluded.sleep_active,
+                    sleep_start = excluded.sleep_start,
+                    sleep_stop = excluded.sleep_stop,
+                    sleep_weekly = excluded.sleep_weekly,
+                    control_locations = excluded.control_locations,
+                    target_temp = excluded.target_temp,
+                    pos_hysteresis = excluded.pos_hysteresis,
+                    neg_hysteresis = excluded.neg_hysteresis,
+                    thermo_active = excluded.thermo_active,
+                    total_on_s = excluded.total_on_s,
+                    total_off_s = excluded.total_off_s,
+                    min_on_s = excluded.min_on_s,
+                    min_off_s = excluded.min_off_s,
+                    poll_interval_s = excluded.poll_interval_s,
+                    smooth_window = excluded.smooth_window,
+                    max_stale_s = excluded.max_stale_s,
+                    current_phase = excluded.current_phase,
+                    phase_started_at = excluded.phase_started_at
+                """,
+                (
+                    1 if sleep_active else 0,
+                    sleep_start,
+                    sleep_stop,
+                    sleep_weekly,
+                    control_locations,
+                    float(target_temp),
+                    float(pos_hysteresis),
+                    float(neg_hysteresis),
+                    1 if thermo_active else 0,
+                    int(total_on_s),
+                    int(total_off_s),
+                    int(min_on_s),
+                    int(min_off_s),
+                    int(poll_interval_s),
+                    int(smooth_window),
+                    None if max_stale_s is None else int(max_stale_s),
+                    current_phase,
+                    phase_started_at,
+                ),
+            )
+            conf = self.get_thermostat_conf()
         if conf is None:
             # This should never happen after UPSERT
             raise RuntimeError("Failed to save thermostat configuration")
@@ -746,9 +1341,15 @@ class Controller:
         that provides attributes: setpoint_c, pos_hysteresis, neg_hysteresis, sleep_enabled,
         sleep_start, sleep_stop. If a row already exists, it is returned as-is.
         """
-        existing = self.get_thermostat_conf()
-        if existing is not None:
-            return existing
+        # One transaction: a row saved between the check and the insert
+        # is never overwritten by the defaults
+        with self.db.transaction():
+            existing = self.get_thermostat_conf()
+            if existing is not None:
+                return existing
+            return self._seed_thermostat_conf(cfg)
+
+    def _seed_thermostat_conf(self, cfg: object | None) -> ThermostatConf:
         # Extract with safe fallbacks (support legacy names too)
 
         def _getattr(name: str, default):
@@ -795,14 +1396,17 @@ class Controller:
         )
 
     def record_bmp_sensor_data(self, temperature: float, pressure: float, altitude: float) -> BMPData:
-        now = datetime.now(self.finland_tz).isoformat()
-        self.db.execute_query(
-            "INSERT INTO bmp_sensor_data (timestamp, temperature, pressure, altitude) VALUES (?, ?, ?, ?)",
-            (now, temperature, pressure, altitude)
-        )
-        row = self.db.fetchone(
-            "SELECT id, timestamp, temperature, pressure, altitude FROM bmp_sensor_data ORDER BY id DESC LIMIT 1"
-        )
+        now_dt = datetime.now(self.finland_tz)
+        now = now_dt.isoformat()
+        query = "INSERT INTO bmp_sensor_data (timestamp, ts_epoch_ms, temperature, pressure, altitude) VALUES (?, ?, ?, ?, ?)"
+        params = (now, to_epoch_ms(now_dt, self.finland_tz),
+                  temperature, pressure, altitude)
+        if self.write_behind is not None:
+            self.write_behind.submit(query, params)
+            return BMPData(id=None, timestamp=now, temperature=temperature,
+                           pressure=pressure, altitude=altitude)
+        row = self.db.insert_returning(
+            query, params, "id, timestamp, temperature, pressure, altitude")
         if row is None:
             raise RuntimeError(
                 "Failed to retrieve inserted bmp_sensor_data record")
@@ -829,14 +1433,15 @@ class Controller:
         )
 
     def get_bmp_sensor_data_for_date(self, date_str: str) -> List[BMPData]:
+        start_ms, end_ms = day_range_ms(date_str, self.finland_tz)
         rows = self.db.fetchall(
             """
             SELECT id, timestamp, temperature, pressure, altitude
               FROM bmp_sensor_data
-             WHERE date(timestamp) = ?
-             ORDER BY timestamp
+             WHERE ts_epoch_ms >= ? AND ts_epoch_ms < ?
+             ORDER BY ts_epoch_ms
             """,
-            (date_str,)
+            (start_ms, end_ms)
         )
         return [
             BMPData(
@@ -849,6 +1454,31 @@ class Controller:
             for row in rows
         ]
 
+    def get_bmp_sensor_series(
+        self, date_str: str,
+        max_points: int | None = None, bucket_ms: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Downsampled day of BMP readings (see ``_downsampled``)."""
+        start_ms, end_ms = day_range_ms(date_str, self.finland_tz)
+        return self._downsampled(
+            """
+            SELECT id, timestamp, ts_epoch_ms, temperature, pressure, altitude
+              FROM bmp_sensor_data
+             WHERE ts_epoch_ms >= ? AND ts_epoch_ms < ?
+             ORDER BY ts_epoch_ms
+            """,
+            (start_ms, end_ms), start_ms, end_ms,
+            'temperature', ('temperature', 'pressure', 'altitude'),
+            lambda row: {
+                'id': row['id'],
+                'timestamp': row['timestamp'],
+                'temperature': row['temperature'],
+                'pressure': row['pressure'],
+                'altitude': row['altitude'],
+            },
+            max_points=max_points, bucket_ms=bucket_ms,
+        )
+
     # --- Car Heater operations ---
     # --- Car Heater operations ---
 
@@ -856,11 +1486,12 @@ class Controller:
         """
         Insert a new car heater status row and return it with id set.
         Uses the timestamp provided in the CarHeaterStatus.
+        With write-behind enabled the row is queued and returned with id=None.
         """
-        self.db.execute_query(
-            """
+        query = """
             INSERT INTO car_heater_status (
                 timestamp,
+                ts_epoch_ms,
                 is_heater_on,
                 instant_power_w,
                 voltage_v,
@@ -873,28 +1504,33 @@ class Controller:
                 ambient_temp,
                 source
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                status.timestamp,
-                1 if status.is_heater_on else 0,
-                float(status.instant_power_w),
-                status.voltage_v,
-                status.current_a,
-                status.energy_total_wh,
-                status.energy_last_min_wh,
-                status.energy_ts,
-                status.device_temp_c,
-                status.device_temp_f,
-                status.ambient_temp,
-                status.source,
-            ),
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+        params = (
+            status.timestamp,
+            to_epoch_ms(status.timestamp, self.finland_tz),
+            1 if status.is_heater_on else 0,
+            float(status.instant_power_w),
+            status.voltage_v,
+            status.current_a,
+            status.energy_total_wh,
+            status.energy_last_min_wh,
+            status.energy_ts,
+            status.device_temp_c,
+            status.device_temp_f,
+            status.ambient_temp,
+            status.source,
         )
-
-        # Fetch the just-inserted row (same pattern as other record_* helpers)
-        row = self.db.fetchone(
+        if self.write_behind is not None:
+            self.write_behind.submit(query, params)
+            saved = replace(status, id=None)
+            self._last_car_heater, self._car_heater_loaded = saved, True
+            return replace(saved)
+        # Single round trip: the stored row comes back from the INSERT itself
+        row = self.db.insert_returning(
+            query,
+            params,
             """
-            SELECT
                 id,
                 timestamp,
                 is_heater_on,
@@ -908,15 +1544,12 @@ class Controller:
                 device_temp_f,
                 ambient_temp,
                 source
-            FROM car_heater_status
-            ORDER BY id DESC
-            LIMIT 1
-            """
+            """,
         )
         if row is None:
             raise RuntimeError("Failed to retrieve inserted car_heater_status record")
 
-        return CarHeaterStatus(
+        saved = CarHeaterStatus(
             id=row["id"],
             timestamp=row["timestamp"],
             is_heater_on=bool(row["is_heater_on"]),
@@ -931,11 +1564,26 @@ class Controller:
             ambient_temp=row["ambient_temp"],
             source=row["source"],
         )
+        self._last_car_heater, self._car_heater_loaded = saved, True
+        return replace(saved)
+
+    def cached_car_heater_status(self) -> CarHeaterStatus | None:
+        """
+        Return the in-memory car heater status without touching the database.
+        Seeded at startup; None if the table was empty or the seed failed.
+        """
+        last = self._last_car_heater
+        return replace(last) if last is not None else None
 
     def get_last_car_heater_status(self) -> CarHeaterStatus | None:
         """
         Return the most recent car heater status row, or None if table is empty.
+        Served from memory once loaded (seeded at startup);
+        record_car_heater_status keeps it current.
         """
+        if self._car_heater_loaded:
+            last = self._last_car_heater
+            return replace(last) if last is not None else None
         row = self.db.fetchone(
             """
             SELECT
@@ -953,28 +1601,31 @@ class Controller:
                 ambient_temp,
                 source
             FROM car_heater_status
-            ORDER BY timestamp DESC, id DESC
+            ORDER BY ts_epoch_ms DESC, id DESC
             LIMIT 1
             """
         )
         if row is None:
-            return None
-
-        return CarHeaterStatus(
-            id=row["id"],
-            timestamp=row["timestamp"],
-            is_heater_on=bool(row["is_heater_on"]),
-            instant_power_w=row["instant_power_w"],
-            voltage_v=row["voltage_v"],
-            current_a=row["current_a"],
-            energy_total_wh=row["energy_total_wh"],
-            energy_last_min_wh=row["energy_last_min_wh"],
-            energy_ts=row["energy_ts"],
-            device_temp_c=row["device_temp_c"],
-            device_temp_f=row["device_temp_f"],
-            ambient_temp=row["ambient_temp"],
-            source=row["source"],
-        )
+            status = None
+        else:
+            status = CarHeaterStatus(
+                id=row["id"],
+                timestamp=row["timestamp"],
+                is_heater_on=bool(row["is_heater_on"]),
+                instant_power_w=row["instant_power_w"],
+                voltage_v=row["voltage_v"],
+                current_a=row["current_a"],
+                energy_total_wh=row["energy_total_wh"],
+                energy_last_min_wh=row["energy_last_min_wh"],
+                energy_ts=row["energy_ts"],
+                device_temp_c=row["device_temp_c"],
+                device_temp_f=row["device_temp_f"],
+                ambient_temp=row["ambient_temp"],
+                source=row["source"],
+            )
+        if not self._car_heater_loaded:
+            self._last_car_heater, self._car_heater_loaded = status, True
+        return replace(status) if status is not None else None
 
     def get_car_heater_status_between(
         self,
@@ -1002,10 +1653,11 @@ class Controller:
                 ambient_temp,
                 source
             FROM car_heater_status
-            WHERE timestamp >= ? AND timestamp <= ?
-            ORDER BY timestamp, id
+            WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ?
+            ORDER BY ts_epoch_ms, id
             """,
-            (start_iso, end_iso),
+            (to_epoch_ms(start_iso, self.finland_tz),
+             to_epoch_ms(end_iso, self.finland_tz)),
         )
 
         return [
@@ -1027,6 +1679,44 @@ class Controller:
             for row in rows
         ]
 
+    def get_car_heater_series(
+        self, start_iso: str, end_iso: str,
+        max_points: int | None = None, bucket_ms: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Downsampled car heater rows between two ISO timestamps (inclusive).
+        LTTB follows ``instant_power_w``; buckets average the electrical and
+        temperature readings.
+        """
+        start_ms = to_epoch_ms(start_iso, self.finland_tz)
+        end_ms = to_epoch_ms(end_iso, self.finland_tz)
+        if start_ms is None or end_ms is None:
+            raise ValueError("start and end must be ISO timestamps")
+        return self._downsampled(
+            """
+            SELECT id, timestamp, ts_epoch_ms, is_heater_on, instant_power_w,
+                   voltage_v, current_a, device_temp_c, ambient_temp
+              FROM car_heater_status
+             WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ?
+             ORDER BY ts_epoch_ms, id
+            """,
+            (start_ms, end_ms), start_ms, end_ms + 1,
+            'instant_power_w',
+            ('instant_power_w', 'voltage_v', 'current_a',
+             'device_temp_c', 'ambient_temp', 'is_heater_on'),
+            lambda row: {
+                'id': row['id'],
+                'timestamp': row['timestamp'],
+                'is_heater_on': bool(row['is_heater_on']),
+                'instant_power_w': row['instant_power_w'],
+                'voltage_v': row['voltage_v'],
+                'current_a': row['current_a'],
+                'device_temp_c': row['device_temp_c'],
+                'ambient_temp': row['ambient_temp'],
+            },
+            max_points=max_points, bucket_ms=bucket_ms,
+        )
+
     def get_recent_car_heater_status(
         self,
         limit: int = 200,
@@ -1052,7 +1742,7 @@ class Controller:
                 ambient_temp,
                 source
             FROM car_heater_status
-            ORDER BY timestamp DESC, id DESC
+            ORDER BY ts_epoch_ms DESC, id DESC
             LIMIT ?
             """,
             (limit,),
@@ -1,301 +1,626 @@
 # database.py
 
+import os
+import queue
+import re
 import sqlite3
+import time
 from sqlite3 import Connection, Cursor
 import threading
-from typing import Any, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from .migrations import LATEST_VERSION, ROLLUP_TABLES, TIME_SERIES_TABLES, migrate
+from .query_stats import QueryStats
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .maintenance import MaintenanceScheduler
+
+
+class _ReadPool:
+    """Bounded pool of read-only SQLite connections.
+
+    Connections are created lazily up to ``size`` and handed out one per
+    caller, so concurrent threads/greenlets never share a cursor. In WAL
+    mode readers see the last committed snapshot and never wait on the
+    writer connection.
+    """
+
+    def __init__(self, factory: Callable[[], Connection], size: int):
+        self._factory = factory
+        self._idle: "queue.LifoQueue[Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._factory()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
 
 
 class DatabaseManager:
+    """SQLite gateway shared by the whole process.
+
+    Writes go through a single writer connection guarded by a lock; reads
+    are served from a small pool of read-only connections. The database is
+    switched to WAL so dashboard reads do not block behind sensor inserts.
+    """
     _instance = None
     _lock = threading.Lock()
 
-    def __new__(cls, db_path: str):
+    # INSERT ... RETURNING landed in SQLite 3.35.0
+    SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+    _INSERT_TABLE_RE = re.compile(
+        r"^\s*INSERT\s+(?:OR\s+\w+\s+)?INTO\s+(\w+)", re.IGNORECASE)
+
+    TIME_SERIES_TABLES = TIME_SERIES_TABLES
+    ROLLUP_TABLES = ROLLUP_TABLES
+
+    def __new__(cls, db_path: str, **kwargs):
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super(DatabaseManager, cls).__new__(cls)
                 cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        read_pool_size: int = 4,
+        busy_timeout_ms: int = 5000,
+    ):
         if getattr(self, '_initialized', False):
             return
         self._initialized = True
         self.db_path = db_path
-        self.conn: Connection = sqlite3.connect(
-            self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor: Cursor = self.conn.cursor()
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._write_lock = threading.RLock()
+        # (monotonic time, ms spent waiting for + holding the writer)
+        self._write_times: "deque[Tuple[float, float]]" = deque(maxlen=1024)
+        self.query_stats = QueryStats(explain=self._explain)
+        # Per-thread (per-greenlet under eventlet) transaction() nesting depth
+        self._tx = threading.local()
+        self.conn: Connection = self._connect()
+        self.maintenance: Optional["MaintenanceScheduler"] = None
+        try:
+            # Only takes effect on a new, empty file (must precede WAL and
+            # the first table); existing files are converted by maintenance.
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL is durable across application crashes in WAL mode and
+            # avoids an fsync per commit on the SD card.
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        # A private in-memory DB is only visible to its own connection,
+        # so readers must share the writer in that case.
+        self._shared_conn = db_path == ':memory:' or db_path.startswith(
+            'file::memory:')
+        self._readers = _ReadPool(
+            lambda: self._connect(read_only=True), read_pool_size)
         self._create_tables()
 
-    def _create_tables(self) -> None:
-        # Ensure all required tables exist
-        tables = {
-            'users': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'username TEXT UNIQUE NOT NULL, '
-                'password_hash TEXT NOT NULL, '
-                'is_admin BOOLEAN NOT NULL DEFAULT FALSE, '
-                'is_root_admin BOOLEAN NOT NULL DEFAULT 0, '
-                'is_temporary BOOLEAN DEFAULT 0, '
-                'expires_at TEXT'
-            ),
-            'api_keys': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'key_id TEXT UNIQUE NOT NULL, '
-                'name TEXT NOT NULL, '
-                'secret_hash TEXT NOT NULL, '
-                'created_at TEXT NOT NULL, '
-                'created_by TEXT, '
-                'revoked BOOLEAN NOT NULL DEFAULT 0, '
-                'last_used_at TEXT'
-            ),
-            'esp32_temphum': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'location TEXT NOT NULL, '
-                'timestamp TEXT NOT NULL, '
-                'temperature REAL NOT NULL, '
-                'humidity REAL NOT NULL, '
-                'ac_on BOOLEAN'
-            ),
-            'ac_events': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'is_on BOOLEAN NOT NULL, '
-                'source TEXT, '
-                'note TEXT'
-            ),
-            'status': (
-                'id INTEGER PRIMARY KEY CHECK (id = 1),'
-                'timestamp TEXT NOT NULL, '
-                'status TEXT NOT NULL'
-            ),
-            'images': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'image TEXT NOT NULL'
-            ),
-            'timelapse_conf': (
-                'id INTEGER PRIMARY KEY CHECK (id = 1),'
-                'image_delay INTEGER NOT NULL,'
-                'temphum_delay INTEGER NOT NULL,'
-                'status_delay INTEGER NOT NULL'
-            ),
-            'thermostat_conf': (
-                'id INTEGER PRIMARY KEY CHECK (id = 1), '
-                'sleep_active BOOLEAN NOT NULL, '
-                'sleep_start TEXT, '
-                'sleep_stop TEXT, '
-                'target_temp REAL NOT NULL, '
-                'pos_hysteresis REAL NOT NULL, '
-                'neg_hysteresis REAL NOT NULL, '
-                'thermo_active BOOLEAN NOT NULL DEFAULT 1, '
-                'total_on_s INTEGER NOT NULL DEFAULT 0, '
-                'total_off_s INTEGER NOT NULL DEFAULT 0, '
-                'min_on_s INTEGER NOT NULL DEFAULT 240, '
-                'min_off_s INTEGER NOT NULL DEFAULT 240, '
-                'poll_interval_s INTEGER NOT NULL DEFAULT 15, '
-                'smooth_window INTEGER NOT NULL DEFAULT 5, '
-                'max_stale_s INTEGER'
-            ),
-            'gcode_commands': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'gcode TEXT NOT NULL'
-            ),
-            'logs': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'type TEXT NOT NULL, '
-                'message TEXT NOT NULL'
-            ),
-            'bmp_sensor_data': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'temperature REAL NOT NULL, '
-                'pressure REAL NOT NULL, '
-                'altitude REAL NOT NULL'
-            ),
-            'car_heater_status': (
-                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
-                'timestamp TEXT NOT NULL, '
-                'is_heater_on BOOLEAN NOT NULL, '
-                'instant_power_w REAL NOT NULL, '
-                'voltage_v REAL, '
-                'current_a REAL, '
-                'energy_total_wh REAL, '
-                'energy_last_min_wh REAL, '
-                'energy_ts INTEGER, '
-                'device_temp_c REAL, '
-                'device_temp_f REAL, '
-                'ambient_temp REAL, '
-                'source TEXT'
-            )
-        }
-        for name, schema in tables.items():
-            self.cursor.execute(
-                f"CREATE TABLE IF NOT EXISTS {name} ({schema})")
-
-        # Clean up test data if present
-        self.cursor.execute(
-            "DELETE FROM esp32_temphum WHERE location='Test' OR location='test'")
-
-        # Insert default values for status and timelapse_conf if they don't exist
-        self.cursor.execute("""
-        INSERT OR IGNORE INTO status (id, timestamp, status)
-        VALUES (1, datetime('now'), 'IDLE')
-        """)
-
-        self.cursor.execute("""
-        INSERT OR IGNORE INTO timelapse_conf (id, image_delay, temphum_delay, status_delay)
-        VALUES (1, 5, 10, 15)
-        """)
-
-        triggers = {
-            'keep_only_last_10_images': """
-            CREATE TRIGGER IF NOT EXISTS keep_only_last_10_images
-            AFTER INSERT ON images
-            FOR EACH ROW
-            BEGIN
-                DELETE FROM images
-                WHERE id NOT IN (
-                    SELECT id
-                    FROM images
-                    ORDER BY timestamp DESC
-                    LIMIT 10
-                );
-            END;
-            """,
-            'cleanup_esp32_temphum_after_insert': """  
-            CREATE TRIGGER IF NOT EXISTS cleanup_esp32_temphum_after_insert
-            AFTER INSERT ON esp32_temphum
-            BEGIN
-                DELETE FROM esp32_temphum
-                WHERE timestamp < datetime('now', '-30 days');
-            END;
-            """,
-            'cleanup_ac_events_after_insert': """
-            CREATE TRIGGER IF NOT EXISTS cleanup_ac_events_after_insert
-            AFTER INSERT ON ac_events
-            BEGIN
-                DELETE FROM ac_events
-                WHERE timestamp < datetime('now', '-30 days');
-            END;
-            """,
-            'cleanup_bmp_sensor_data_after_insert': """
-            CREATE TRIGGER IF NOT EXISTS cleanup_bmp_sensor_data_after_insert
-            AFTER INSERT ON bmp_sensor_data
-            BEGIN
-                DELETE FROM bmp_sensor_data
-                WHERE timestamp < datetime('now', '-7 days');
-            END;
-            """,
-            'cleanup_car_heater_status_after_insert': """
-            CREATE TRIGGER IF NOT EXISTS cleanup_car_heater_status_after_insert
-            AFTER INSERT ON car_heater_status
-            BEGIN
-                DELETE FROM car_heater_status
-                WHERE timestamp < datetime('now', '-30 days');
-            END;
-            """
-        }
-
-        for name, trigger_sql in triggers.items():
-            self.cursor.executescript(trigger_sql)
-
-        # --- Indexes for performance-critical queries ---
-        # Speed up latest-per-location lookups used by Controller.get_unique_locations()
-        # Pattern: WHERE location = ? ORDER BY timestamp DESC, id DESC LIMIT 1
-        # This composite index allows an efficient seek to the newest row per location.
-        try:
-            self.cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_esp32_temphum_loc_ts_id
-                ON esp32_temphum (location, timestamp DESC, id DESC)
-                """
-            )
-        except Exception:
-            # Best-effort: ignore if SQLite version doesn't support DESC in index columns
+    def _connect(self, read_only: bool = False) -> Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000.0,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[Connection]:
+        # Inside transaction() reads must see its uncommitted writes
+        if self._shared_conn or self.in_transaction():
+            with self._write_lock:
+                yield self.conn
+            return
+        with self._readers.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def _writing(self) -> Iterator[Connection]:
+        t0 = time.perf_counter()
+        with self._write_lock:
             try:
-                self.cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_esp32_temphum_loc_ts_id ON esp32_temphum (location, timestamp, id)"
-                )
-            except Exception:
-                pass
+                yield self.conn
+            finally:
+                t1 = time.perf_counter()
+                self._write_times.append((t1, (t1 - t0) * 1000.0))
 
-        # Optional: help date-based reads per location
-        # Pattern: WHERE date(timestamp) = ? AND location = ?
-        # Expression indexes are supported by SQLite; if not, ignore.
-        try:
-            self.cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_esp32_temphum_date_loc
-                ON esp32_temphum (date(timestamp), location)
-                """
-            )
-        except Exception:
-            pass
+    def in_transaction(self) -> bool:
+        """True if the calling thread is inside :meth:`transaction`."""
+        return getattr(self._tx, 'depth', 0) > 0
 
-        # Indexes for ac_events
-        try:
-            self.cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_ac_events_ts ON ac_events (timestamp)"
-            )
-        except Exception:
-            pass
+    @contextmanager
+    def transaction(self) -> Iterator[Connection]:
+        """Group writes into one atomic unit with a single commit.
 
-        # Indexes for API keys
-        try:
-            self.cursor.execute(
-                "CREATE UNIQUE INDEX IF NOT EXISTS idx_api_keys_key_id ON api_keys (key_id)"
-            )
-        except Exception:
-            pass
+        The outermost block takes the writer lock and opens
+        ``BEGIN IMMEDIATE``; ``execute_query``/``insert_returning``/
+        ``executemany``/``execute_batch`` calls inside it skip their own
+        commit, and ``fetchone``/``fetchall``/``iterate`` read through the
+        writer so they see the pending changes. Nested blocks become
+        savepoints: an exception rolls back only that block if the caller
+        catches it. Any exception escaping the outermost block rolls back
+        everything. Keep slow work (password hashing, network) outside.
+        """
+        depth = getattr(self._tx, 'depth', 0)
+        if depth:
+            name = f"sp_{depth}"
+            self.conn.execute(f"SAVEPOINT {name}")
+            self._tx.depth = depth + 1
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute(f"ROLLBACK TO {name}")
+                self.conn.execute(f"RELEASE {name}")
+                raise
+            else:
+                self.conn.execute(f"RELEASE {name}")
+            finally:
+                self._tx.depth = depth
+            return
 
-        # Try to add weekly sleep column for thermostat_conf if missing
-        try:
-            self.cursor.execute(
-                "ALTER TABLE thermostat_conf ADD COLUMN sleep_weekly TEXT")
-        except Exception:
-            # Ignore if already exists
-            pass
-        try:
-            self.cursor.execute(
-                "ALTER TABLE thermostat_conf ADD COLUMN control_locations TEXT")
-        except Exception:
-            pass
+        t0 = time.perf_counter()
+        with self._write_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._tx.depth = 1
+            try:
+                yield self.conn
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+            finally:
+                self._tx.depth = 0
+                t1 = time.perf_counter()
+                self._write_times.append((t1, (t1 - t0) * 1000.0))
+
+    def _commit(self) -> None:
+        if not self.in_transaction():
+            self.conn.commit()
+
+    def _rollback(self) -> None:
+        # Inside transaction() the enclosing block decides
+        if not self.in_transaction():
+            self.conn.rollback()
+
+    def write_latency_ms(self, quantile: float = 0.99, window_s: float = 60.0) -> Optional[float]:
+        """Latency quantile of write calls (lock wait + execute + commit)
+        over the last ``window_s`` seconds, or None without samples."""
+        since = time.perf_counter() - window_s
+        samples = sorted(ms for t, ms in list(self._write_times) if t >= since)
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(len(samples) * quantile))
+        return samples[idx]
+
+    def close(self) -> None:
+        """Close all pooled connections (used on shutdown)."""
+        self._readers.close()
+        with self._write_lock:
+            self.conn.close()
 
-        self.conn.commit()
+    def _create_tables(self) -> None:
+        """Bring the schema up to date (see migrations.py)."""
+        self.schema_version = migrate(self.conn)
+        self.has_logs_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'logs_fts'").fetchone() is not None
 
     def execute_query(
         self,
         query: str,
         params: Tuple[Any, ...] = ()
     ) -> Cursor:
-        self.cursor.execute(query, params)
-        self.conn.commit()
-        return self.cursor
+        t0 = time.perf_counter()
+        with self._writing():
+            t1 = time.perf_counter()
+            try:
+                cursor = self.conn.execute(query, params)
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        self._record(query, params, t0, t1, cursor.rowcount)
+        return cursor
+
+    def insert_returning(
+        self,
+        query: str,
+        params: Tuple[Any, ...] = (),
+        returning: str = '*',
+        followups: Sequence[Tuple[str, Tuple[Any, ...]]] = ()
+    ) -> Optional[sqlite3.Row]:
+        """Insert one row and return the stored row in a single round trip.
+
+        Uses ``INSERT ... RETURNING`` where available. On older SQLite the row
+        is re-read by ``lastrowid`` while the write lock is still held, so a
+        concurrent insert can never be returned instead. ``followups`` are
+        extra write statements committed in the same transaction.
+        """
+        t0 = time.perf_counter()
+        with self._writing():
+            t1 = time.perf_counter()
+            try:
+                if self.SUPPORTS_RETURNING:
+                    rows = self.conn.execute(
+                        f"{query.rstrip().rstrip(';')} RETURNING {returning}",
+                        params).fetchall()
+                    row = rows[0] if rows else None
+                else:
+                    cursor = self.conn.execute(query, params)
+                    match = self._INSERT_TABLE_RE.match(query)
+                    if match is None:
+                        raise ValueError("insert_returning expects an INSERT statement")
+                    row = self.conn.execute(
+                        f"SELECT {returning} FROM {match.group(1)} WHERE rowid = ?",
+                        (cursor.lastrowid,)).fetchone()
+                t2 = time.perf_counter()
+                timings = []
+                for followup, followup_params in followups:
+                    t3 = time.perf_counter()
+                    cursor = self.conn.execute(followup, followup_params)
+                    timings.append((followup, followup_params,
+                                    time.perf_counter() - t3, cursor.rowcount))
+                t3 = time.perf_counter()
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        # Followups are recorded on their own; the insert carries wait + commit
+        self.query_stats.record(
+            query, params, (t2 - t0 + time.perf_counter() - t3) * 1000.0,
+            (t1 - t0) * 1000.0, 0 if row is None else 1)
+        for followup, followup_params, elapsed, rows in timings:
+            self.query_stats.record(followup, followup_params, elapsed * 1000.0, 0.0, rows)
+        return row
 
     def executemany(
         self,
         query: str,
         param_list: List[Tuple[Any, ...]]
     ) -> None:
-        self.cursor.executemany(query, param_list)
-        self.conn.commit()
+        t0 = time.perf_counter()
+        with self._writing():
+            t1 = time.perf_counter()
+            try:
+                cursor = self.conn.executemany(query, param_list)
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        self._record(query, param_list[0] if param_list else (), t0, t1, cursor.rowcount)
+
+    def execute_batch(
+        self,
+        statements: List[Tuple[str, Tuple[Any, ...]]]
+    ) -> None:
+        """Run several write statements in one transaction (one commit)."""
+        t0 = time.perf_counter()
+        with self._writing():
+            wait_ms = (time.perf_counter() - t0) * 1000.0
+            try:
+                timings = []
+                for query, params in statements:
+                    t1 = time.perf_counter()
+                    cursor = self.conn.execute(query, params)
+                    timings.append((query, params, t1, time.perf_counter(), cursor.rowcount))
+                self._commit()
+            except Exception:
+                self._rollback()
+                raise
+        # Per-statement execution time; the lock wait goes to the first one
+        for i, (query, params, t1, t2, rows) in enumerate(timings):
+            self.query_stats.record(
+                query, params, (t2 - t1) * 1000.0 + (wait_ms if i == 0 else 0.0),
+                wait_ms if i == 0 else 0.0, rows)
 
     def fetchone(
         self,
         query: str,
         params: Tuple[Any, ...] = ()
     ) -> Optional[sqlite3.Row]:
-        self.cursor.execute(query, params)
-        return self.cursor.fetchone()
+        t0 = time.perf_counter()
+        with self._reader() as conn:
+            t1 = time.perf_counter()
+            row = conn.execute(query, params).fetchone()
+        self._record(query, params, t0, t1, 0 if row is None else 1)
+        return row
 
     def fetchall(
         self,
         query: str,
         params: Tuple[Any, ...] = ()
     ) -> List[sqlite3.Row]:
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+        t0 = time.perf_counter()
+        with self._reader() as conn:
+            t1 = time.perf_counter()
+            rows = conn.execute(query, params).fetchall()
+        self._record(query, params, t0, t1, len(rows))
+        return rows
+
+    def iterate(
+        self,
+        query: str,
+        params: Tuple[Any, ...] = (),
+        arraysize: int = 500
+    ) -> Iterator[sqlite3.Row]:
+        """Stream rows in chunks of ``arraysize`` instead of materialising
+        the whole result. The reader connection is held until the iterator
+        is exhausted or closed. The recorded latency covers only the time
+        spent inside SQLite, not the consumer's processing."""
+        t0 = t1 = time.perf_counter()
+        n = 0
+        busy = 0.0
+        acquired = False
+        try:
+            with self._reader() as conn:
+                t1 = time.perf_counter()
+                acquired = True
+                cursor = conn.execute(query, params)
+                busy += time.perf_counter() - t1
+                try:
+                    while True:
+                        t2 = time.perf_counter()
+                        rows = cursor.fetchmany(arraysize)
+                        busy += time.perf_counter() - t2
+                        if not rows:
+                            break
+                        n += len(rows)
+                        yield from rows
+                finally:
+                    cursor.close()
+        finally:
+            # Only once the reader is back in the pool: a slow statement is
+            # EXPLAINed on a second reader, which would deadlock a full pool
+            if acquired:
+                wait_ms = (t1 - t0) * 1000.0
+                self.query_stats.record(query, params, wait_ms + busy * 1000.0, wait_ms, n)
+
+    def fetch_columns(
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        columns: Sequence[Tuple[str, str]],
+    ) -> Dict[str, "np.ndarray"]:
+        """Run ``query`` and return its result as one NumPy array per column.
+
+        ``columns`` names the selected columns in order with a NumPy dtype
+        each, e.g. ``(('ts', 'i8'), ('temp', 'f8'), ('on', '?'))``. The
+        cursor's plain tuples are streamed by ``np.fromiter`` into a single
+        structured array, so no ``sqlite3.Row``, model object or per-column
+        list is ever built. NULL becomes NaN in float columns; select
+        NULL-free expressions (``COALESCE``, ``x IS NULL``) for integer and
+        bool columns. Requires numpy.
+        """
+        import numpy as np
+
+        dtype = np.dtype([(name, dt) for name, dt in columns])
+        t0 = time.perf_counter()
+        with self._reader() as conn:
+            t1 = time.perf_counter()
+            cursor = conn.cursor()
+            # Plain tuples are cheaper than sqlite3.Row and all we need here
+            cursor.row_factory = None
+            try:
+                cursor.execute(query, params)
+                if cursor.description is not None and len(cursor.description) != len(columns):
+                    raise ValueError(
+                        f"query returns {len(cursor.description)} columns, "
+                        f"{len(columns)} were described")
+                table = np.fromiter(cursor, dtype=dtype)
+            finally:
+                cursor.close()
+        self._record(query, params, t0, t1, len(table))
+        return {name: np.ascontiguousarray(table[name]) for name in dtype.names}
+
+    def revision(self, name: str) -> int:
+        """Current value of the shared change counter ``name`` (0 if unset)."""
+        row = self.fetchone(
+            "SELECT value FROM cache_revisions WHERE name = ?", (name,))
+        return int(row['value']) if row is not None else 0
+
+    def bump_revision(self, name: str) -> None:
+        """Advance counter ``name`` so in-memory caches derived from it are
+        dropped by every process. Call it inside the transaction that makes
+        the change, so no process can see one without the other."""
+        self.execute_query(
+            "INSERT INTO cache_revisions (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,))
+
+    def _record(self, query: str, params: Any, t0: float, t1: float, rows: int) -> None:
+        """Report one statement: ``t0`` = call start, ``t1`` = connection
+        acquired (lock/pool wait ends)."""
+        now = time.perf_counter()
+        self.query_stats.record(
+            query, params, (now - t0) * 1000.0, (t1 - t0) * 1000.0,
+            rows if rows is not None else -1)
+
+    def _explain(self, query: str, params: Sequence[Any]) -> List[str]:
+        with self._reader() as conn:
+            return [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params))]
+
+    def backup_to(
+        self,
+        dest: Connection,
+        pages: int = 256,
+        progress: Optional[Callable[[int, int, int], object]] = None,
+    ) -> None:
+        """Copy the database into ``dest`` with the online backup API.
+
+        The copy is read from a dedicated connection that holds one read
+        transaction for the whole run, so it is a consistent snapshot and
+        does not restart when the live DB changes between steps. In WAL mode
+        that snapshot never blocks the writer; ``progress`` runs after every
+        ``pages``-page step and may sleep to throttle I/O.
+        """
+        if self._shared_conn:
+            with self._write_lock:
+                self.conn.backup(dest, pages=-1)
+            return
+        src = self._connect(read_only=True)
+        try:
+            src.execute("BEGIN")
+            # The snapshot is taken by the first read, not by BEGIN
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            src.backup(dest, pages=max(1, int(pages)), progress=progress)
+            src.rollback()
+        finally:
+            src.close()
+
+    def restore_from(self, src: Connection) -> None:
+        """Replace the whole database with the contents of ``src``.
+
+        Runs through the writer connection in one step, so the swap is a
+        single transaction for other connections and processes. An older
+        snapshot is migrated to the current schema before the writer lock is
+        released; one written by newer code is refused.
+        """
+        version = src.execute("PRAGMA user_version").fetchone()[0]
+        if version > LATEST_VERSION:
+            raise sqlite3.DatabaseError(
+                f"snapshot schema version {version} is newer than this code ({LATEST_VERSION})")
+        with self._writing() as conn:
+            src.backup(conn, pages=-1)
+            self._create_tables()
+
+    # --- Maintenance (scheduled by maintenance.MaintenanceScheduler) ---
+    _AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+
+    def maintenance_scheduler(self, tz, **kwargs: Any) -> "MaintenanceScheduler":
+        """The shared :class:`MaintenanceScheduler`, created on first use
+        with ``kwargs``. It only runs on its own once started."""
+        if self.maintenance is None:
+            from .maintenance import MaintenanceScheduler
+            self.maintenance = MaintenanceScheduler(self, tz, **kwargs)
+        return self.maintenance
+
+    def start_maintenance(self, tz, **kwargs: Any) -> "MaintenanceScheduler":
+        """Start the off-peak maintenance thread (idempotent)."""
+        scheduler = self.maintenance_scheduler(tz, **kwargs)
+        scheduler.start()
+        return scheduler
+
+    def health(self, include_tables: bool = False) -> Dict[str, Any]:
+        """File size, fragmentation and planner-statistics state.
+
+        ``fragmentation_pct`` is freelist pages / total pages, i.e. the share
+        of the file that incremental vacuum could hand back to the OS.
+        ``include_tables`` adds per-table sizes from ``dbstat`` (full scan;
+        only if this SQLite build has it).
+        """
+        with self._reader() as conn:
+            def pragma(name: str) -> Any:
+                row = conn.execute(f"PRAGMA {name}").fetchone()
+                return row[0] if row is not None else None
+
+            page_size = pragma('page_size') or 0
+            page_count = pragma('page_count') or 0
+            freelist = pragma('freelist_count') or 0
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+            out: Dict[str, Any] = {
+                'sqlite_version': sqlite3.sqlite_version,
+                'journal_mode': pragma('journal_mode'),
+                'auto_vacuum': self._AUTO_VACUUM_MODES.get(pragma('auto_vacuum'), 'unknown'),
+                'page_size': page_size,
+                'page_count': page_count,
+                'freelist_count': freelist,
+                'fragmentation_pct': round(100.0 * freelist / page_count, 2) if page_count else 0.0,
+                'reclaimable_bytes': freelist * page_size,
+                'db_bytes': page_count * page_size,
+                'wal_bytes': _file_size(f"{self.db_path}-wal"),
+                'has_planner_stats': has_stats,
+            }
+            if include_tables:
+                try:
+                    out['tables'] = [
+                        {'name': r[0], 'bytes': r[1], 'unused_bytes': r[2]}
+                        for r in conn.execute(
+                            "SELECT name, SUM(pgsize), SUM(unused) FROM dbstat "
+                            "GROUP BY name ORDER BY 2 DESC")
+                    ]
+                except sqlite3.OperationalError:
+                    out['tables'] = None
+        return out
+
+    def optimize(self, analysis_limit: int = 1000) -> None:
+        """``PRAGMA optimize``: re-analyze only tables whose stats are stale.
+        ``analysis_limit`` bounds the rows sampled per index."""
+        with self._writing() as conn:
+            conn.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+
+    def analyze(self, analysis_limit: int = 1000) -> None:
+        """Bounded ``ANALYZE`` of every table (used when no stats exist yet)."""
+        with self._writing() as conn:
+            conn.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+            conn.execute("ANALYZE")
+            conn.commit()
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """Return up to ``pages`` free pages to the OS. Returns pages freed."""
+        with self._writing() as conn:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # executescript steps the pragma to completion; a plain execute()
+            # frees only one page per step.
+            conn.executescript(f"PRAGMA incremental_vacuum({max(1, int(pages))});")
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return max(0, before - after)
+
+    def checkpoint(self, mode: str = 'TRUNCATE') -> Dict[str, int]:
+        """Checkpoint the WAL; TRUNCATE also shrinks the -wal file to zero.
+        ``busy`` is 1 if a reader kept it from completing."""
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        with self._writing() as conn:
+            busy, log, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return {'busy': busy, 'wal_pages': log, 'checkpointed': done}
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing file to ``auto_vacuum=INCREMENTAL``.
+
+        This needs a full ``VACUUM`` (rewrites the file while holding the
+        writer), so callers should only do it off-peak. Returns True if the
+        file was converted, False if it already was incremental.
+        """
+        with self._writing() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.executescript("VACUUM;")
+        return True
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
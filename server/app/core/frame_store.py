@@ -0,0 +1,141 @@
+"""Content-addressed on-disk store for camera frames.
+
+Frames are written once as raw bytes to ``<root>/<sha[:2]>/<sha>`` and
+indexed in the ``image_frames`` table (timestamp, hash, size, mime). Only
+the newest ``keep`` rows are retained; files no longer referenced by any
+row are unlinked, so the directory works as a ring buffer. Reads are plain
+files, which lets the web layer stream them with ``sendfile`` and use the
+hash as a strong ETag.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, tzinfo
+from typing import List, Optional, TYPE_CHECKING
+
+from .models import ImageData
+from .timeutil import to_epoch_ms
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "id, timestamp, sha256, size, mime"
+
+
+class FrameStore:
+    def __init__(
+        self,
+        db: "DatabaseManager",
+        root: str,
+        tz: tzinfo,
+        keep: int = 10,
+    ) -> None:
+        self.db = db
+        self.root = root
+        self.tz = tz
+        self.keep = max(1, int(keep))
+        self._lock = threading.Lock()
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def put(self, data: bytes, mime: str = 'image/jpeg', timestamp: str | None = None) -> ImageData:
+        """Store one frame and return its row. Identical bytes share a file."""
+        sha = hashlib.sha256(data).hexdigest()
+        path = self.path_for(sha)
+        ts = timestamp or datetime.now(self.tz).isoformat()
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write to a temp file and rename so readers never see a partial frame
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp, path)
+                except Exception:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+                    raise
+            row = self.db.insert_returning(
+                "INSERT INTO image_frames (timestamp, ts_epoch_ms, sha256, size, mime) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (ts, to_epoch_ms(ts, self.tz), sha, len(data), mime),
+                _COLUMNS,
+            )
+            self._prune()
+        if row is None:
+            raise RuntimeError("Failed to retrieve inserted image frame")
+        return self._to_image(row)
+
+    def put_base64(self, image_base64: str, mime: str = 'image/jpeg') -> ImageData:
+        try:
+            data = base64.b64decode(image_base64, validate=False)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Invalid base64 image: {e}") from None
+        return self.put(data, mime)
+
+    def latest(self) -> Optional[ImageData]:
+        row = self.db.fetchone(
+            f"SELECT {_COLUMNS} FROM image_frames ORDER BY id DESC LIMIT 1")
+        return self._to_image(row) if row is not None else None
+
+    def get(self, sha256: str) -> Optional[ImageData]:
+        row = self.db.fetchone(
+            f"SELECT {_COLUMNS} FROM image_frames WHERE sha256 = ? ORDER BY id DESC LIMIT 1",
+            (sha256,))
+        return self._to_image(row) if row is not None else None
+
+    def migrate_legacy(self) -> int:
+        """Move base64 rows from the old ``images`` table into the store."""
+        rows = self.db.fetchall(
+            "SELECT id, timestamp, image FROM images ORDER BY id")
+        moved = 0
+        for row in rows:
+            try:
+                self.put(base64.b64decode(row['image']), timestamp=row['timestamp'])
+                moved += 1
+            except Exception as e:
+                logger.warning("Skipping legacy image %s: %s", row['id'], e)
+        if rows:
+            self.db.execute_query(
+                "DELETE FROM images WHERE id <= ?", (rows[-1]['id'],))
+            logger.info("Migrated %d legacy base64 images to %s", moved, self.root)
+        return moved
+
+    def _prune(self) -> None:
+        old = self.db.fetchall(
+            "SELECT id, sha256 FROM image_frames ORDER BY id DESC LIMIT -1 OFFSET ?",
+            (self.keep,))
+        if not old:
+            return
+        self.db.execute_query(
+            "DELETE FROM image_frames WHERE id <= ?", (old[0]['id'],))
+        shas: List[str] = sorted({r['sha256'] for r in old})
+        for sha in shas:
+            if self.db.fetchone("SELECT 1 FROM image_frames WHERE sha256 = ? LIMIT 1", (sha,)):
+                continue
+            try:
+                os.unlink(self.path_for(sha))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Failed to remove frame %s: %s", sha, e)
+
+    def _to_image(self, row) -> ImageData:
+        return ImageData(
+            id=row['id'], timestamp=row['timestamp'], sha256=row['sha256'],
+            size=row['size'], mime=row['mime'] or 'image/jpeg',
+            path=self.path_for(row['sha256']),
+        )
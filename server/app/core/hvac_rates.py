@@ -0,0 +1,93 @@
+"""Average HVAC cooling / heating rates from columnar readings.
+
+Works on the NumPy arrays returned by ``DatabaseManager.fetch_columns``:
+reading timestamps (epoch ms) and temperatures, plus AC event timestamps
+and on/off flags. Every reading takes the state of the last event at or
+before it (``init_state`` before the first event); each pair of
+consecutive readings then contributes its time and temperature delta to
+the "on" or "off" sums, unless the earlier state is unknown or the gap is
+non-positive or longer than ``max_gap_s``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import numpy as np
+
+MAX_GAP_S = 15 * 60
+
+
+def avg_rates(
+    ts_ms: np.ndarray,
+    temperature: np.ndarray,
+    event_ms: np.ndarray,
+    event_on: np.ndarray,
+    init_state: bool | None,
+    max_gap_s: float = MAX_GAP_S,
+) -> Dict[str, Any]:
+    """Rates in °C/h while the AC was on (cooling) and off (heating).
+
+    ``ts_ms``/``event_ms`` must be sorted ascending. Readings whose
+    temperature is NaN are dropped after their state is assigned.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    temperature = np.asarray(temperature, dtype=np.float64)
+    event_ms = np.asarray(event_ms, dtype=np.int64)
+    event_on = np.asarray(event_on, dtype=bool)
+
+    # Index of the last event at or before each reading (-1: none yet)
+    idx = np.searchsorted(event_ms, ts_ms, side='right') - 1
+    has_event = idx >= 0
+    if event_on.size:
+        state_on = np.where(has_event, event_on[np.maximum(idx, 0)], bool(init_state))
+    else:
+        state_on = np.full(ts_ms.shape, bool(init_state))
+    known = has_event if init_state is None else np.ones_like(has_event)
+
+    keep = ~np.isnan(temperature)
+    ts_ms, temperature = ts_ms[keep], temperature[keep]
+    state_on, known = state_on[keep], known[keep]
+
+    if ts_ms.size < 2:
+        return _result(0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0, 0)
+
+    dt = np.diff(ts_ms) / 1000.0
+    d_temp = np.diff(temperature)
+    known0 = known[:-1]
+    on0 = state_on[:-1]
+    positive = dt > 0
+    in_gap = dt <= max_gap_s
+    valid = known0 & positive & in_gap
+    on = valid & on0
+    off = valid & ~on0
+    return _result(
+        float(dt[on].sum()), float(d_temp[on].sum()),
+        float(dt[off].sum()), float(d_temp[off].sum()),
+        int(on.sum()), int(off.sum()),
+        int((~known0).sum()),
+        int((known0 & ~positive).sum()),
+        int((known0 & positive & ~in_gap).sum()),
+    )
+
+
+def _result(
+    dt_on: float, d_temp_on: float, dt_off: float, d_temp_off: float,
+    pairs_on: int, pairs_off: int,
+    skipped_no_state: int, skipped_nonpos_dt: int, skipped_big_gap: int,
+) -> Dict[str, Any]:
+    cooling_per_s = d_temp_on / dt_on if dt_on > 0 else None
+    heating_per_s = d_temp_off / dt_off if dt_off > 0 else None
+    return {
+        'cooling_rate_c_per_s': cooling_per_s,
+        'heating_rate_c_per_s': heating_per_s,
+        'cooling_rate_c_per_h': cooling_per_s * 3600.0 if cooling_per_s is not None else None,
+        'heating_rate_c_per_h': heating_per_s * 3600.0 if heating_per_s is not None else None,
+        'time_on_s': dt_on,
+        'time_off_s': dt_off,
+        'pairs_on': pairs_on,
+        'pairs_off': pairs_off,
+        'skipped_no_state': skipped_no_state,
+        'skipped_nonpos_dt': skipped_nonpos_dt,
+        'skipped_big_gap': skipped_big_gap,
+    }
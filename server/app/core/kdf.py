@@ -0,0 +1,121 @@
+"""Password hashing off the eventlet hub.
+
+werkzeug's ``generate_password_hash``/``check_password_hash`` run a
+deliberately slow KDF (scrypt/PBKDF2). Called from a greenlet they block
+the hub, freezing every Socket.IO connection and sensor POST for the
+duration. :class:`KdfPool` runs them through ``eventlet.tpool`` on native
+threads instead (hashlib releases the GIL), so only the calling greenlet
+waits.
+
+At most ``max_concurrency`` hashes run at once; up to ``max_waiting``
+further callers queue (cooperatively) for a slot, and anything beyond that
+is rejected with :class:`KdfBusy` before any hashing starts. Without
+eventlet monkey patching (CLI, scripts) the calls run inline.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, TypeVar
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+T = TypeVar('T')
+
+
+class KdfBusy(RuntimeError):
+    """Too many password hashes are already running or queued."""
+
+
+def _tpool_execute() -> Callable[..., Any] | None:
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return None
+    if not patcher.is_monkey_patched('thread'):
+        return None
+    return tpool.execute
+
+
+class KdfPool:
+    def __init__(self, max_concurrency: int = 2, max_waiting: int = 8) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_waiting = max(0, int(max_waiting))
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._calls = 0
+        self._rejected = 0
+        # (queue ms, run ms) of recent calls
+        self._recent: "deque[tuple[float, float]]" = deque(maxlen=256)
+        self._max_queue_ms = 0.0
+
+    def configure(self, max_concurrency: int | None = None, max_waiting: int | None = None) -> None:
+        if max_concurrency is not None:
+            self.max_concurrency = max(1, int(max_concurrency))
+            self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        if max_waiting is not None:
+            self.max_waiting = max(0, int(max_waiting))
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password)
+
+    def check(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self._recent)
+            out: Dict[str, Any] = {
+                'offloaded': _tpool_execute() is not None,
+                'max_concurrency': self.max_concurrency,
+                'max_waiting': self.max_waiting,
+                'running': self._running,
+                'waiting': self._waiting,
+                'calls': self._calls,
+                'rejected': self._rejected,
+                'max_queue_ms': round(self._max_queue_ms, 2),
+            }
+        if recent:
+            queue_ms = sorted(q for q, _ in recent)
+            out['queue_ms_p50'] = round(queue_ms[len(queue_ms) // 2], 2)
+            out['queue_ms_p95'] = round(queue_ms[min(len(queue_ms) - 1, int(len(queue_ms) * 0.95))], 2)
+            out['run_ms_mean'] = round(sum(r for _, r in recent) / len(recent), 2)
+        return out
+
+    def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        slots = self._slots
+        t0 = time.perf_counter()
+        # Fast path: a free slot means no queueing at all
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                if self._waiting >= self.max_waiting:
+                    self._rejected += 1
+                    raise KdfBusy(
+                        f"{self._running} password hashes running, {self._waiting} queued")
+                self._waiting += 1
+            try:
+                slots.acquire()
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        t1 = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            execute = _tpool_execute()
+            result = execute(fn, *args) if execute is not None else fn(*args)
+        finally:
+            t2 = time.perf_counter()
+            slots.release()
+            queue_ms = (t1 - t0) * 1000.0
+            with self._lock:
+                self._running -= 1
+                self._calls += 1
+                self._recent.append((queue_ms, (t2 - t1) * 1000.0))
+                if queue_ms > self._max_queue_ms:
+                    self._max_queue_ms = queue_ms
+        return result
@@ -0,0 +1,93 @@
+"""Write-through cache of the latest ESP32 reading per location.
+
+``Controller.record_esp32_temphum`` updates it on every reading and the
+controller seeds it from the DB at startup, so "latest value" lookups
+(thermostat polls, the temperatures page, socket snapshots) are dict reads
+instead of queries. Entries carry the reading's epoch time so callers can
+judge staleness themselves.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .models import ESP32TemperatureHumidity
+
+
+@dataclass(frozen=True)
+class CachedReading:
+    reading: ESP32TemperatureHumidity
+    ts_epoch_ms: int
+    source: str  # 'ingest' or 'db'
+
+    def age_s(self, now: float | None = None) -> float:
+        """Seconds since the reading was taken."""
+        return (time.time() if now is None else now) - self.ts_epoch_ms / 1000.0
+
+
+class LatestReadingCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CachedReading] = {}
+        self._seeded = False
+        self._hits = 0
+        self._misses = 0
+        self._updates = 0
+
+    @property
+    def seeded(self) -> bool:
+        return self._seeded
+
+    def seed(self, entries: List[CachedReading]) -> None:
+        """Load DB state without overwriting newer ingested readings."""
+        with self._lock:
+            for entry in entries:
+                loc = entry.reading.location
+                current = self._entries.get(loc)
+                if current is None or current.ts_epoch_ms < entry.ts_epoch_ms:
+                    self._entries[loc] = entry
+            self._seeded = True
+
+    def update(self, reading: ESP32TemperatureHumidity, ts_epoch_ms: int, source: str = 'ingest') -> None:
+        entry = CachedReading(reading, int(ts_epoch_ms), source)
+        with self._lock:
+            current = self._entries.get(reading.location)
+            # Out-of-order arrivals must not replace a newer value
+            if current is None or current.ts_epoch_ms <= entry.ts_epoch_ms:
+                self._entries[reading.location] = entry
+            self._updates += 1
+
+    def get(self, location: str) -> Optional[CachedReading]:
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return entry
+
+    def all(self) -> List[CachedReading]:
+        """All entries, ordered by location."""
+        with self._lock:
+            return [self._entries[k] for k in sorted(self._entries)]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                'seeded': self._seeded,
+                'hits': self._hits,
+                'misses': self._misses,
+                'updates': self._updates,
+                'locations': {
+                    loc: {
+                        'timestamp': e.reading.timestamp,
+                        'age_s': round(e.age_s(now), 1),
+                        'source': e.source,
+                    }
+                    for loc, e in sorted(self._entries.items())
+                },
+            }
@@ -0,0 +1,184 @@
+"""Off-peak database maintenance.
+
+Once a day, inside the configured off-peak hour, the scheduler:
+
+- converts files created before ``auto_vacuum=INCREMENTAL`` was the default
+  (one full ``VACUUM``) if they are at most ``convert_max_mb``,
+- refreshes planner statistics with ``PRAGMA optimize`` (a bounded
+  ``ANALYZE`` if the DB has never been analyzed),
+- returns free pages to the OS with ``PRAGMA incremental_vacuum`` in small
+  steps, pausing between them so sensor inserts interleave, until the
+  freelist is under ``freelist_target_pct`` or ``vacuum_max_steps`` is hit,
+- checkpoints and truncates the WAL.
+
+Planner statistics are also created shortly after startup if missing, so a
+fresh deployment does not wait a day for its first ``ANALYZE``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, tzinfo
+from typing import Any, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    def __init__(
+        self,
+        db: "DatabaseManager",
+        tz: tzinfo,
+        offpeak_hour: int = 4,
+        check_interval_s: float = 600,
+        vacuum_pages: int = 256,
+        vacuum_max_steps: int = 400,
+        pause_s: float = 0.05,
+        freelist_target_pct: float = 1.0,
+        convert_max_mb: float = 256,
+    ) -> None:
+        self.db = db
+        self.tz = tz
+        self.offpeak_hour = int(offpeak_hour) % 24
+        self.check_interval_s = max(10.0, float(check_interval_s))
+        self.vacuum_pages = max(1, int(vacuum_pages))
+        self.vacuum_max_steps = max(1, int(vacuum_max_steps))
+        self.pause_s = max(0.0, float(pause_s))
+        self.freelist_target_pct = max(0.0, float(freelist_target_pct))
+        self.convert_max_mb = float(convert_max_mb)
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._last_run_day: str | None = None
+        self._last_run_at: str | None = None
+        self._last_result: Dict[str, Any] | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="DBMaintenance", daemon=True)
+        self._thread.start()
+        logger.info("DB maintenance scheduled daily at %02d:00 (%s)",
+                    self.offpeak_hour, self.tz)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run every maintenance task now, regardless of the clock."""
+        with self._run_lock:
+            t0 = time.perf_counter()
+            before = self.db.health()
+            result: Dict[str, Any] = {
+                'fragmentation_pct_before': before['fragmentation_pct']}
+
+            if before['auto_vacuum'] != 'incremental':
+                result['auto_vacuum'] = self._convert(before)
+
+            t = time.perf_counter()
+            try:
+                if before['has_planner_stats']:
+                    self.db.optimize()
+                    result['stats'] = 'optimize'
+                else:
+                    self.db.analyze()
+                    result['stats'] = 'analyze'
+            except Exception as e:
+                logger.warning("DB maintenance: statistics refresh failed: %s", e)
+                result['stats'] = f'failed: {e}'
+            result['stats_ms'] = round((time.perf_counter() - t) * 1000.0, 1)
+
+            result.update(self._vacuum())
+            try:
+                result['checkpoint'] = self.db.checkpoint('TRUNCATE')
+            except Exception as e:
+                logger.warning("DB maintenance: WAL checkpoint failed: %s", e)
+
+            after = self.db.health()
+            result['fragmentation_pct_after'] = after['fragmentation_pct']
+            result['elapsed_ms'] = round((time.perf_counter() - t0) * 1000.0, 1)
+            now = datetime.now(self.tz)
+            self._runs += 1
+            self._last_run_day = now.date().isoformat()
+            self._last_run_at = now.isoformat()
+            self._last_result = result
+        logger.info("DB maintenance done in %.0f ms: %s", result['elapsed_ms'], result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self._runs,
+            'last_run_at': self._last_run_at,
+            'last_result': self._last_result,
+            'offpeak_hour': self.offpeak_hour,
+        }
+
+    def _convert(self, health: Dict[str, Any]) -> str:
+        size_mb = health['db_bytes'] / (1024 * 1024)
+        if size_mb > self.convert_max_mb:
+            logger.warning(
+                "DB maintenance: auto_vacuum is %s and the DB is %.0f MB "
+                "(> %.0f MB); run `flask --app run vacuum-db` in a quiet window",
+                health['auto_vacuum'], size_mb, self.convert_max_mb)
+            return 'skipped (too large)'
+        t = time.perf_counter()
+        try:
+            self.db.enable_incremental_vacuum()
+        except Exception as e:
+            logger.warning("DB maintenance: auto_vacuum conversion failed: %s", e)
+            return f'failed: {e}'
+        return f'converted in {(time.perf_counter() - t) * 1000.0:.0f} ms'
+
+    def _vacuum(self) -> Dict[str, Any]:
+        freed = 0
+        steps = 0
+        t = time.perf_counter()
+        while steps < self.vacuum_max_steps and not self._stop.is_set():
+            health = self.db.health()
+            if (health['auto_vacuum'] != 'incremental'
+                    or health['freelist_count'] == 0
+                    or health['fragmentation_pct'] <= self.freelist_target_pct):
+                break
+            try:
+                n = self.db.incremental_vacuum(self.vacuum_pages)
+            except Exception as e:
+                logger.warning("DB maintenance: incremental_vacuum failed: %s", e)
+                break
+            steps += 1
+            freed += n
+            if n == 0:
+                break
+            # Release the writer so inserts are not held up
+            time.sleep(self.pause_s)
+        return {
+            'vacuum_steps': steps,
+            'pages_freed': freed,
+            'vacuum_ms': round((time.perf_counter() - t) * 1000.0, 1),
+        }
+
+    def _due(self, now: datetime) -> bool:
+        return now.hour == self.offpeak_hour and self._last_run_day != now.date().isoformat()
+
+    def _run(self) -> None:
+        # Fresh DBs get planner statistics right away instead of at night
+        if not self._stop.wait(timeout=min(120.0, self.check_interval_s)):
+            try:
+                if not self.db.health()['has_planner_stats']:
+                    self.db.analyze()
+                    logger.info("DB maintenance: created initial planner statistics")
+            except Exception as e:
+                logger.warning("DB maintenance: initial ANALYZE failed: %s", e)
+        while not self._stop.is_set():
+            try:
+                if self._due(datetime.now(self.tz)):
+                    self.run_once()
+            except Exception:
+                logger.exception("DB maintenance run crashed")
+            self._stop.wait(timeout=self.check_interval_s)
@@ -0,0 +1,387 @@
+"""Versioned schema migrations keyed on ``PRAGMA user_version``.
+
+Each :class:`Migration` runs once, in order, inside its own transaction
+together with the ``user_version`` bump, so a crash mid-step leaves the
+previous version in place. Steps are idempotent (``IF NOT EXISTS``, column
+checks) because databases created before this runner existed start at
+version 0 with most of the schema already present. An up-to-date database
+only pays for one ``PRAGMA user_version`` read at startup.
+
+To change the schema, append a new step; never edit a released one.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from sqlite3 import Connection, Cursor
+from typing import Callable, List
+
+from .rollups import ROLLUPS, rebuild_statements
+
+logger = logging.getLogger(__name__)
+
+TIME_SERIES_TABLES = (
+    'esp32_temphum', 'ac_events', 'bmp_sensor_data', 'car_heater_status', 'logs')
+ROLLUP_TABLES = ('esp32_temphum_rollup_1m', 'esp32_temphum_rollup_1h')
+
+# Shared by the esp32_temphum 1-minute / 1-hour rollup tables (see rollups.py)
+_ROLLUP_SCHEMA = (
+    'location TEXT NOT NULL, '
+    'bucket_ms INTEGER NOT NULL, '
+    'n INTEGER NOT NULL, '
+    'temp_sum REAL NOT NULL, '
+    'temp_min REAL NOT NULL, '
+    'temp_max REAL NOT NULL, '
+    'temp_first REAL NOT NULL, '
+    'temp_last REAL NOT NULL, '
+    'hum_sum REAL NOT NULL, '
+    'hum_min REAL NOT NULL, '
+    'hum_max REAL NOT NULL, '
+    'hum_first REAL NOT NULL, '
+    'hum_last REAL NOT NULL, '
+    'first_ms INTEGER NOT NULL, '
+    'last_ms INTEGER NOT NULL, '
+    'ac_on_n INTEGER NOT NULL DEFAULT 0, '
+    'ac_known_n INTEGER NOT NULL DEFAULT 0, '
+    'PRIMARY KEY (location, bucket_ms)'
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Cursor], None]
+
+
+def _ensure_column(cur: Cursor, table: str, column: str, decl: str) -> bool:
+    """Add a column if missing. Returns True if it was added."""
+    cols = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    if column in cols:
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
+
+def _baseline(cur: Cursor) -> None:
+    """Tables, seed rows and columns that predate versioned migrations."""
+    tables = {
+        'users': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'username TEXT UNIQUE NOT NULL, '
+            'password_hash TEXT NOT NULL, '
+            'is_admin BOOLEAN NOT NULL DEFAULT FALSE, '
+            'is_root_admin BOOLEAN NOT NULL DEFAULT 0, '
+            'is_temporary BOOLEAN DEFAULT 0, '
+            'expires_at TEXT'
+        ),
+        'api_keys': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key_id TEXT UNIQUE NOT NULL, '
+            'name TEXT NOT NULL, '
+            'secret_hash TEXT NOT NULL, '
+            'created_at TEXT NOT NULL, '
+            'created_by TEXT, '
+            'revoked BOOLEAN NOT NULL DEFAULT 0, '
+            'last_used_at TEXT'
+        ),
+        'esp32_temphum': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'location TEXT NOT NULL, '
+            'timestamp TEXT NOT NULL, '
+            'temperature REAL NOT NULL, '
+            'humidity REAL NOT NULL, '
+            'ac_on BOOLEAN, '
+            'ts_epoch_ms INTEGER'
+        ),
+        'ac_events': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'is_on BOOLEAN NOT NULL, '
+            'source TEXT, '
+            'note TEXT, '
+            'ts_epoch_ms INTEGER'
+        ),
+        'status': (
+            'id INTEGER PRIMARY KEY CHECK (id = 1),'
+            'timestamp TEXT NOT NULL, '
+            'status TEXT NOT NULL'
+        ),
+        'images': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'image TEXT NOT NULL'
+        ),
+        'timelapse_conf': (
+            'id INTEGER PRIMARY KEY CHECK (id = 1),'
+            'image_delay INTEGER NOT NULL,'
+            'temphum_delay INTEGER NOT NULL,'
+            'status_delay INTEGER NOT NULL'
+        ),
+        'thermostat_conf': (
+            'id INTEGER PRIMARY KEY CHECK (id = 1), '
+            'sleep_active BOOLEAN NOT NULL, '
+            'sleep_start TEXT, '
+            'sleep_stop TEXT, '
+            'target_temp REAL NOT NULL, '
+            'pos_hysteresis REAL NOT NULL, '
+            'neg_hysteresis REAL NOT NULL, '
+            'thermo_active BOOLEAN NOT NULL DEFAULT 1, '
+            'total_on_s INTEGER NOT NULL DEFAULT 0, '
+            'total_off_s INTEGER NOT NULL DEFAULT 0, '
+            'min_on_s INTEGER NOT NULL DEFAULT 240, '
+            'min_off_s INTEGER NOT NULL DEFAULT 240, '
+            'poll_interval_s INTEGER NOT NULL DEFAULT 15, '
+            'smooth_window INTEGER NOT NULL DEFAULT 5, '
+            'max_stale_s INTEGER'
+        ),
+        'gcode_commands': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'gcode TEXT NOT NULL'
+        ),
+        'logs': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'type TEXT NOT NULL, '
+            'message TEXT NOT NULL, '
+            'ts_epoch_ms INTEGER'
+        ),
+        'bmp_sensor_data': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'temperature REAL NOT NULL, '
+            'pressure REAL NOT NULL, '
+            'altitude REAL NOT NULL, '
+            'ts_epoch_ms INTEGER'
+        ),
+        'car_heater_status': (
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'timestamp TEXT NOT NULL, '
+            'is_heater_on BOOLEAN NOT NULL, '
+            'instant_power_w REAL NOT NULL, '
+            'voltage_v REAL, '
+            'current_a REAL, '
+            'energy_total_wh REAL, '
+            'energy_last_min_wh REAL, '
+            'energy_ts INTEGER, '
+            'device_temp_c REAL, '
+            'device_temp_f REAL, '
+            'ambient_temp REAL, '
+            'source TEXT, '
+            'ts_epoch_ms INTEGER'
+        ),
+    }
+    for name, schema in tables.items():
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {name} ({schema})")
+    _ensure_column(cur, 'thermostat_conf', 'sleep_weekly', 'TEXT')
+    _ensure_column(cur, 'thermostat_conf', 'control_locations', 'TEXT')
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_api_keys_key_id ON api_keys (key_id)")
+
+    cur.execute("""
+    INSERT OR IGNORE INTO status (id, timestamp, status)
+    VALUES (1, datetime('now'), 'IDLE')
+    """)
+    cur.execute("""
+    INSERT OR IGNORE INTO timelapse_conf (id, image_delay, temphum_delay, status_delay)
+    VALUES (1, 5, 10, 15)
+    """)
+    # Used to run on every start; once is enough
+    cur.execute(
+        "DELETE FROM esp32_temphum WHERE location='Test' OR location='test'")
+
+
+def _epoch_timestamps(cur: Cursor) -> None:
+    # ISO `timestamp` stays for display; all range/order queries use
+    # `ts_epoch_ms` (UTC milliseconds), which is immune to DST offsets.
+    for table in TIME_SERIES_TABLES:
+        if _ensure_column(cur, table, 'ts_epoch_ms', 'INTEGER'):
+            # julianday() honours the stored UTC offset
+            cur.execute(
+                f"UPDATE {table} SET ts_epoch_ms = "
+                "CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER) "
+                "WHERE ts_epoch_ms IS NULL"
+            )
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_epoch ON {table} (ts_epoch_ms)")
+    # Latest-per-location and per-location day ranges:
+    # WHERE location = ? AND ts_epoch_ms BETWEEN ? AND ? / ORDER BY ts_epoch_ms DESC
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_esp32_temphum_loc_epoch "
+        "ON esp32_temphum (location, ts_epoch_ms)"
+    )
+    # Superseded text-timestamp indexes (extra write cost, no readers left)
+    for name in (
+        'idx_esp32_temphum_loc_ts_id',
+        'idx_esp32_temphum_date_loc',
+        'idx_esp32_temphum_ts',
+        'idx_bmp_sensor_data_ts',
+        'idx_car_heater_status_ts',
+        'idx_ac_events_ts',
+    ):
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _scheduled_retention(cur: Cursor) -> None:
+    # Per-insert cleanup triggers were replaced by RetentionEngine
+    for name in (
+        'cleanup_esp32_temphum_after_insert',
+        'cleanup_ac_events_after_insert',
+        'cleanup_bmp_sensor_data_after_insert',
+        'cleanup_car_heater_status_after_insert',
+    ):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def _esp32_rollups(cur: Cursor) -> None:
+    for table in ROLLUP_TABLES:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({_ROLLUP_SCHEMA})")
+        # Rollup retention purges by bucket time across all locations
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket_ms)")
+
+
+def _frame_store(cur: Cursor) -> None:
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS image_frames ("
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+        'timestamp TEXT NOT NULL, '
+        'ts_epoch_ms INTEGER, '
+        'sha256 TEXT NOT NULL, '
+        'size INTEGER NOT NULL, '
+        'mime TEXT'
+        ")"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_image_frames_sha ON image_frames (sha256)")
+
+
+def _logs_search(cur: Cursor) -> None:
+    # Log browsing: type filter + newest-first keyset on (ts_epoch_ms, id)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_type_epoch ON logs (type, ts_epoch_ms)")
+    try:
+        # External-content table: the text lives only in `logs`
+        cur.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5("
+            "message, content='logs', content_rowid='id')"
+        )
+    except sqlite3.OperationalError:
+        logger.warning("SQLite has no FTS5; log search falls back to LIKE")
+        return
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN
+            INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF message ON logs BEGIN
+            INSERT INTO logs_fts (logs_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+            INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    """)
+    cur.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+
+
+def _thermostat_phase(cur: Cursor) -> None:
+    # Read and written by Controller.get/save_thermostat_conf
+    _ensure_column(cur, 'thermostat_conf', 'current_phase', 'TEXT')
+    _ensure_column(cur, 'thermostat_conf', 'phase_started_at', 'TEXT')
+
+
+def _cache_revisions(cur: Cursor) -> None:
+    # Change counters shared by worker processes (see DatabaseManager.revision)
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS cache_revisions ("
+        'name TEXT PRIMARY KEY, '
+        'value INTEGER NOT NULL'
+        ")"
+    )
+
+
+def _drop_insert_cleanup_triggers(cur: Cursor) -> None:
+    # keep_only_last_10_images (baseline) was missed by _scheduled_retention;
+    # images are pruned by FrameStore now. Also sweep any other per-insert
+    # cleanup trigger still present.
+    rows = cur.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND "
+        "(name = 'keep_only_last_10_images' OR name LIKE 'cleanup_%_after_insert')"
+    ).fetchall()
+    for (name,) in rows:
+        cur.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+
+
+def _backfill_esp32_rollups(cur: Cursor) -> None:
+    # _esp32_rollups created empty tables and only new readings were folded
+    # in, so history recorded before it never reached the charts. Rebuild
+    # the hours that still have raw rows; older buckets are left as they are.
+    lo, hi = cur.execute(
+        "SELECT MIN(ts_epoch_ms), MAX(ts_epoch_ms) FROM esp32_temphum").fetchone()
+    if lo is None:
+        return
+    try:
+        # Window functions need SQLite 3.25+; probe before deleting anything
+        cur.execute("SELECT ROW_NUMBER() OVER ()").fetchone()
+    except sqlite3.OperationalError as e:
+        logger.warning("Rollup backfill skipped (%s); run `flask rebuild-rollups`", e)
+        return
+    hour = ROLLUPS['1h'][1]
+    for query, params in rebuild_statements((lo // hour) * hour, (hi // hour + 1) * hour):
+        cur.execute(query, params)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'baseline', _baseline),
+    Migration(2, 'epoch_timestamps', _epoch_timestamps),
+    Migration(3, 'scheduled_retention', _scheduled_retention),
+    Migration(4, 'esp32_rollups', _esp32_rollups),
+    Migration(5, 'frame_store', _frame_store),
+    Migration(6, 'logs_search', _logs_search),
+    Migration(7, 'thermostat_phase', _thermostat_phase),
+    Migration(8, 'cache_revisions', _cache_revisions),
+    Migration(9, 'drop_insert_cleanup_triggers', _drop_insert_cleanup_triggers),
+    Migration(10, 'backfill_esp32_rollups', _backfill_esp32_rollups),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def migrate(conn: Connection) -> int:
+    """Apply pending migrations. Returns the resulting schema version."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current > LATEST_VERSION:
+        logger.warning("DB schema version %d is newer than this code (%d)",
+                       current, LATEST_VERSION)
+        return current
+    pending = [m for m in MIGRATIONS if m.version > current]
+    if not pending:
+        return current
+    total = time.perf_counter()
+    for m in pending:
+        t0 = time.perf_counter()
+        conn.execute("BEGIN")
+        try:
+            m.apply(conn.cursor())
+            # Part of the same transaction: the bump commits with the step
+            conn.execute(f"PRAGMA user_version = {int(m.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception("DB migration %d (%s) failed", m.version, m.name)
+            raise
+        logger.info("DB migration %d (%s) applied in %.1f ms",
+                    m.version, m.name, (time.perf_counter() - t0) * 1000.0)
+    logger.info("DB schema migrated %d -> %d in %.1f ms", current,
+                LATEST_VERSION, (time.perf_counter() - total) * 1000.0)
+    return LATEST_VERSION
@@ -47,7 +47,7 @@ class TemperatureHumidity:
 
 @dataclass
 class ESP32TemperatureHumidity:
-    id: int
+    id: int | None
     location: str
     timestamp: str
     temperature: float
@@ -66,7 +66,10 @@ class Status:
 class ImageData:
     id: int
     timestamp: str
-    image: str  # base64-encoded image data
+    sha256: str  # content hash; also the file name in the frame store
+    size: int
+    mime: str = 'image/jpeg'
+    path: str | None = None  # on-disk location of the frame bytes
 
 
 @dataclass
@@ -116,7 +119,7 @@ class ApiKey:
 
 @dataclass
 class BMPData:
-    id: int
+    id: int | None
     timestamp: str
     temperature: float
     pressure: float
@@ -0,0 +1,217 @@
+"""Per-statement latency statistics and a slow-query log.
+
+``DatabaseManager`` reports every statement it runs to :class:`QueryStats`
+with its total latency, the time spent waiting for a connection (writer
+lock or read-pool slot) and the number of rows returned or changed.
+Statements are grouped by normalized SQL (literals replaced by ``?``,
+whitespace collapsed, ``IN (...)`` lists folded), and each group keeps a
+fixed-bucket latency histogram. Statements slower than ``slow_ms`` are also
+kept in a bounded slow log together with their ``EXPLAIN QUERY PLAN``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in ms; the last bucket is open-ended
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+_NORMALIZED_CACHE_MAX = 2048
+
+Explainer = Callable[[str, Sequence[Any]], List[str]]
+
+
+def normalize_sql(sql: str) -> str:
+    """Group key for ``sql``: literals and IN lists replaced by ``?``."""
+    s = _STRING_RE.sub('?', sql)
+    s = _NUMBER_RE.sub('?', s)
+    s = _SPACE_RE.sub(' ', s).strip().rstrip(';').strip()
+    return _IN_LIST_RE.sub('IN (...)', s)
+
+
+class _Entry:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'wait_ms', 'max_wait_ms',
+                 'rows', 'hist', 'last_at')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.rows = 0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+        self.last_at = 0.0
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding quantile ``q`` (None if open)."""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= target and n:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+        return None
+
+
+class QueryStats:
+    def __init__(
+        self,
+        slow_ms: float = 100.0,
+        slow_log_size: int = 100,
+        explain: Optional[Explainer] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.slow_ms = float(slow_ms)
+        self.enabled = enabled
+        self._explain = explain
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._normalized: Dict[str, str] = {}
+        self._plans: Dict[str, List[str]] = {}
+        self._slow: "deque[Dict[str, Any]]" = deque(maxlen=max(1, int(slow_log_size)))
+        self._since = time.time()
+
+    def configure(self, slow_ms: float | None = None, enabled: bool | None = None) -> None:
+        if slow_ms is not None:
+            self.slow_ms = float(slow_ms)
+        if enabled is not None:
+            self.enabled = enabled
+
+    def record(
+        self,
+        sql: str,
+        params: Sequence[Any],
+        total_ms: float,
+        wait_ms: float,
+        rows: int,
+    ) -> None:
+        if not self.enabled:
+            return
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._normalized) >= _NORMALIZED_CACHE_MAX:
+                self._normalized.clear()
+            self._normalized[sql] = key
+        now = time.time()
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None:
+                e = self._entries[key] = _Entry()
+            e.count += 1
+            e.total_ms += total_ms
+            e.wait_ms += wait_ms
+            e.rows += max(0, rows)
+            e.last_at = now
+            if total_ms > e.max_ms:
+                e.max_ms = total_ms
+            if wait_ms > e.max_wait_ms:
+                e.max_wait_ms = wait_ms
+            e.hist[bisect.bisect_left(BUCKETS_MS, total_ms)] += 1
+        if total_ms >= self.slow_ms:
+            self._record_slow(key, sql, params, total_ms, wait_ms, rows, now)
+
+    def top(self, n: int = 20, sort: str = 'total') -> List[Dict[str, Any]]:
+        """The ``n`` statements with the largest ``sort`` value
+        (``total``, ``max``, ``mean``, ``p99``, ``wait`` or ``count``)."""
+        keyfns: Dict[str, Callable[[_Entry], float]] = {
+            'total': lambda e: e.total_ms,
+            'max': lambda e: e.max_ms,
+            'mean': lambda e: e.total_ms / e.count,
+            'p99': lambda e: e.quantile(0.99) or float('inf'),
+            'wait': lambda e: e.wait_ms,
+            'count': lambda e: e.count,
+        }
+        if sort not in keyfns:
+            raise ValueError(f"sort must be one of {', '.join(keyfns)}")
+        with self._lock:
+            items = sorted(self._entries.items(),
+                           key=lambda kv: keyfns[sort](kv[1]), reverse=True)[:max(1, int(n))]
+            return [self._describe(sql, e) for sql, e in items]
+
+    def slow_log(self) -> List[Dict[str, Any]]:
+        """Recent slow statements, newest first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+            self._slow.clear()
+            self._since = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'slow_ms': self.slow_ms,
+                'since': self._since,
+                'statements': len(self._entries),
+                'executions': sum(e.count for e in self._entries.values()),
+                'slow_logged': len(self._slow),
+            }
+
+    def _record_slow(
+        self,
+        key: str,
+        sql: str,
+        params: Sequence[Any],
+        total_ms: float,
+        wait_ms: float,
+        rows: int,
+        now: float,
+    ) -> None:
+        # Plans are cached per statement; EXPLAIN runs outside every lock
+        plan = self._plans.get(key)
+        if plan is None and self._explain is not None:
+            try:
+                plan = self._explain(sql, params)
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {e}"]
+            self._plans[key] = plan
+        entry = {
+            'sql': key,
+            'ms': round(total_ms, 2),
+            'wait_ms': round(wait_ms, 2),
+            'rows': rows,
+            'at': now,
+            'plan': plan,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        logger.warning("Slow query (%.1f ms, wait %.1f ms, %d rows): %s | plan: %s",
+                       total_ms, wait_ms, rows, key, '; '.join(plan or []))
+
+    @staticmethod
+    def _describe(sql: str, e: _Entry) -> Dict[str, Any]:
+        return {
+            'sql': sql,
+            'count': e.count,
+            'total_ms': round(e.total_ms, 2),
+            'mean_ms': round(e.total_ms / e.count, 3),
+            'max_ms': round(e.max_ms, 2),
+            'p50_ms': e.quantile(0.50),
+            'p95_ms': e.quantile(0.95),
+            'p99_ms': e.quantile(0.99),
+            'wait_ms': round(e.wait_ms, 2),
+            'max_wait_ms': round(e.max_wait_ms, 2),
+            'rows': e.rows,
+            'rows_per_call': round(e.rows / e.count, 2),
+            'last_at': e.last_at,
+            'histogram': dict(zip([f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"], e.hist)),
+        }
@@ -0,0 +1,158 @@
+"""Scheduled, chunked retention for time-series tables.
+
+Replaces the per-insert ``cleanup_*_after_insert`` triggers: instead of a
+range-scan DELETE on every write, a background thread periodically purges
+rows per table policy (max age and/or max row count). Deletes run in small
+batches, each its own short transaction, so inserts interleave freely.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from typing import Any, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    table: str
+    max_age_days: float | None = None
+    max_rows: int | None = None
+    ts_column: str = 'ts_epoch_ms'
+
+
+DEFAULT_POLICIES: List[RetentionPolicy] = [
+    RetentionPolicy('esp32_temphum', max_age_days=30),
+    RetentionPolicy('ac_events', max_age_days=30),
+    RetentionPolicy('bmp_sensor_data', max_age_days=7),
+    RetentionPolicy('car_heater_status', max_age_days=30),
+    RetentionPolicy('esp32_temphum_rollup_1m', max_age_days=90, ts_column='bucket_ms'),
+    RetentionPolicy('esp32_temphum_rollup_1h', max_age_days=730, ts_column='bucket_ms'),
+]
+
+
+class RetentionEngine:
+    def __init__(
+        self,
+        db: "DatabaseManager",
+        tz: tzinfo,
+        policies: List[RetentionPolicy] | None = None,
+        interval_s: float = 600,
+        batch_size: int = 500,
+        pause_s: float = 0.05,
+    ) -> None:
+        self.db = db
+        self.tz = tz
+        self.policies = list(policies or DEFAULT_POLICIES)
+        self.interval_s = max(1.0, float(interval_s))
+        self.batch_size = max(1, int(batch_size))
+        self.pause_s = max(0.0, float(pause_s))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._total_purged: Dict[str, int] = {}
+        self._last_run: Dict[str, Dict[str, Any]] = {}
+        self._last_run_at: str | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="RetentionEngine", daemon=True)
+        self._thread.start()
+        logger.info("Retention engine started (interval=%.0fs, tables=%s)",
+                    self.interval_s, [p.table for p in self.policies])
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> Dict[str, Dict[str, Any]]:
+        """Apply every policy once. Returns per-table purge counts and timings."""
+        results: Dict[str, Dict[str, Any]] = {}
+        for policy in self.policies:
+            t0 = time.perf_counter()
+            purged = 0
+            try:
+                if policy.max_age_days is not None:
+                    purged += self._purge_older_than(policy)
+                if policy.max_rows is not None:
+                    purged += self._purge_over_count(policy)
+            except Exception as e:
+                logger.warning("Retention for %s failed: %s", policy.table, e)
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            results[policy.table] = {
+                'purged': purged, 'elapsed_ms': round(elapsed_ms, 1)}
+            self._total_purged[policy.table] = self._total_purged.get(
+                policy.table, 0) + purged
+            if purged:
+                logger.info("Retention: purged %d rows from %s in %.1f ms",
+                            purged, policy.table, elapsed_ms)
+        self._runs += 1
+        self._last_run = results
+        self._last_run_at = datetime.now(self.tz).isoformat()
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self._runs,
+            'last_run_at': self._last_run_at,
+            'last_run': self._last_run,
+            'total_purged': dict(self._total_purged),
+            'interval_s': self.interval_s,
+            'batch_size': self.batch_size,
+        }
+
+    def _delete_batches(self, query: str, params: tuple) -> int:
+        purged = 0
+        while not self._stop.is_set():
+            cur = self.db.execute_query(query, params + (self.batch_size,))
+            n = cur.rowcount if cur.rowcount is not None else 0
+            purged += max(0, n)
+            if n < self.batch_size:
+                break
+            # Yield the writer between batches so inserts are not delayed
+            time.sleep(self.pause_s)
+        return purged
+
+    def _purge_older_than(self, policy: RetentionPolicy) -> int:
+        cutoff_ms = int(
+            (time.time() - float(policy.max_age_days) * 86400.0) * 1000)
+        t, ts = policy.table, policy.ts_column
+        return self._delete_batches(
+            f"DELETE FROM {t} WHERE rowid IN ("
+            f"SELECT rowid FROM {t} WHERE {ts} < ? ORDER BY {ts} LIMIT ?)",
+            (cutoff_ms,),
+        )
+
+    def _purge_over_count(self, policy: RetentionPolicy) -> int:
+        t = policy.table
+        # rowid of the newest row that falls outside the keep window
+        row = self.db.fetchone(
+            f"SELECT rowid AS rid FROM {t} ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (int(policy.max_rows),),
+        )
+        if row is None:
+            return 0
+        return self._delete_batches(
+            f"DELETE FROM {t} WHERE rowid IN ("
+            f"SELECT rowid FROM {t} WHERE rowid <= ? ORDER BY rowid LIMIT ?)",
+            (row['rid'],),
+        )
+
+    def _run(self) -> None:
+        # First pass shortly after startup, then on the regular interval
+        delay = min(60.0, self.interval_s)
+        while not self._stop.wait(timeout=delay):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Retention engine run crashed")
+            delay = self.interval_s
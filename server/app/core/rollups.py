@@ -0,0 +1,160 @@
+"""Per-location 1-minute / 1-hour rollups of ``esp32_temphum``.
+
+Each bucket row holds count, sum, min, max, first and last of temperature
+and humidity plus the number of readings with the AC on. Buckets are
+upserted next to every raw insert (see ``Controller.record_esp32_temphum``)
+and can be regenerated from raw history with :func:`rebuild_rollups`.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Statement = Tuple[str, Tuple[Any, ...]]
+
+# resolution -> (table, bucket width in ms)
+ROLLUPS: Dict[str, Tuple[str, int]] = {
+    '1m': ('esp32_temphum_rollup_1m', 60_000),
+    '1h': ('esp32_temphum_rollup_1h', 3_600_000),
+}
+
+_COLUMNS = (
+    'location, bucket_ms, n, temp_sum, temp_min, temp_max, temp_first, temp_last, '
+    'hum_sum, hum_min, hum_max, hum_first, hum_last, first_ms, last_ms, '
+    'ac_on_n, ac_known_n'
+)
+
+# All right-hand column references in DO UPDATE see the pre-update row.
+_UPSERT_SQL = f"""
+INSERT INTO {{table}} ({_COLUMNS})
+VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(location, bucket_ms) DO UPDATE SET
+    n = n + 1,
+    temp_sum = temp_sum + excluded.temp_sum,
+    temp_min = min(temp_min, excluded.temp_min),
+    temp_max = max(temp_max, excluded.temp_max),
+    temp_first = CASE WHEN excluded.first_ms < first_ms THEN excluded.temp_first ELSE temp_first END,
+    temp_last = CASE WHEN excluded.last_ms >= last_ms THEN excluded.temp_last ELSE temp_last END,
+    hum_sum = hum_sum + excluded.hum_sum,
+    hum_min = min(hum_min, excluded.hum_min),
+    hum_max = max(hum_max, excluded.hum_max),
+    hum_first = CASE WHEN excluded.first_ms < first_ms THEN excluded.hum_first ELSE hum_first END,
+    hum_last = CASE WHEN excluded.last_ms >= last_ms THEN excluded.hum_last ELSE hum_last END,
+    first_ms = min(first_ms, excluded.first_ms),
+    last_ms = max(last_ms, excluded.last_ms),
+    ac_on_n = ac_on_n + excluded.ac_on_n,
+    ac_known_n = ac_known_n + excluded.ac_known_n
+"""
+
+# Aggregate raw rows in [?, ?) into buckets; FIRST/LAST_VALUE pick the
+# earliest/latest reading per bucket.
+_REBUILD_SQL = f"""
+INSERT INTO {{table}} ({_COLUMNS})
+SELECT location, bucket_ms, COUNT(*),
+       SUM(temperature), MIN(temperature), MAX(temperature), MAX(t_first), MAX(t_last),
+       SUM(humidity), MIN(humidity), MAX(humidity), MAX(h_first), MAX(h_last),
+       MIN(ts_epoch_ms), MAX(ts_epoch_ms),
+       COALESCE(SUM(ac_on = 1), 0), COUNT(ac_on)
+  FROM (
+    SELECT location, temperature, humidity, ac_on, ts_epoch_ms,
+           (ts_epoch_ms / {{ms}}) * {{ms}} AS bucket_ms,
+           FIRST_VALUE(temperature) OVER w AS t_first,
+           LAST_VALUE(temperature) OVER w AS t_last,
+           FIRST_VALUE(humidity) OVER w AS h_first,
+           LAST_VALUE(humidity) OVER w AS h_last
+      FROM esp32_temphum
+     WHERE ts_epoch_ms >= ? AND ts_epoch_ms < ?
+    WINDOW w AS (PARTITION BY location, ts_epoch_ms / {{ms}}
+                 ORDER BY ts_epoch_ms, id
+                 ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+  )
+ GROUP BY location, bucket_ms
+"""
+
+
+def rollup_statements(
+    location: str,
+    ts_ms: int,
+    temperature: float,
+    humidity: float,
+    ac_on: bool | None,
+) -> List[Statement]:
+    """Upserts that fold one raw reading into every rollup table."""
+    on_n = 1 if ac_on else 0
+    known_n = 0 if ac_on is None else 1
+    statements: List[Statement] = []
+    for table, width in ROLLUPS.values():
+        bucket = (ts_ms // width) * width
+        statements.append((
+            _UPSERT_SQL.format(table=table),
+            (location, bucket,
+             temperature, temperature, temperature, temperature, temperature,
+             humidity, humidity, humidity, humidity, humidity,
+             ts_ms, ts_ms, on_n, known_n),
+        ))
+    return statements
+
+
+def rebuild_statements(start_ms: int, end_ms: int) -> List[Statement]:
+    """Delete and re-aggregate every bucket in ``[start_ms, end_ms)``.
+
+    Both bounds must be whole hours so no bucket is cut in half.
+    """
+    statements: List[Statement] = []
+    for table, width in ROLLUPS.values():
+        statements.append((
+            f"DELETE FROM {table} WHERE bucket_ms >= ? AND bucket_ms < ?",
+            (start_ms, end_ms)))
+        statements.append((
+            _REBUILD_SQL.format(table=table, ms=width), (start_ms, end_ms)))
+    return statements
+
+
+def rebuild_rollups(
+    db: "DatabaseManager",
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+    chunk_hours: int = 24,
+) -> Dict[str, Any]:
+    """Regenerate rollup buckets from raw ``esp32_temphum`` rows.
+
+    The range (default: all raw history) is widened to whole hours and
+    processed in ``chunk_hours`` slices. Each slice deletes and re-inserts
+    its buckets in one short write transaction, so live ingestion keeps
+    running and never sees a half-built bucket.
+    """
+    hour = ROLLUPS['1h'][1]
+    if start_ms is None or end_ms is None:
+        row = db.fetchone(
+            "SELECT MIN(ts_epoch_ms) AS lo, MAX(ts_epoch_ms) AS hi FROM esp32_temphum")
+        if row is None or row['lo'] is None:
+            return {'chunks': 0, 'rows': {}, 'elapsed_ms': 0.0}
+        start_ms = row['lo'] if start_ms is None else start_ms
+        end_ms = row['hi'] + 1 if end_ms is None else end_ms
+    lo = (int(start_ms) // hour) * hour
+    hi = -(-int(end_ms) // hour) * hour
+    step = max(1, int(chunk_hours)) * hour
+
+    t0 = time.perf_counter()
+    chunks = 0
+    while lo < hi:
+        chunk_end = min(lo + step, hi)
+        db.execute_batch(rebuild_statements(lo, chunk_end))
+        chunks += 1
+        lo = chunk_end
+
+    counts = {
+        res: db.fetchone(f"SELECT COUNT(*) AS n FROM {table}")['n']
+        for res, (table, _) in ROLLUPS.items()
+    }
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    logger.info("Rebuilt esp32_temphum rollups in %d chunks (%.0f ms): %s",
+                chunks, elapsed_ms, counts)
+    return {'chunks': chunks, 'rows': counts, 'elapsed_ms': round(elapsed_ms, 1)}
@@ -0,0 +1,200 @@
+"""Streaming downsampling for time-series reads.
+
+Both reducers consume rows one at a time (e.g. from
+``DatabaseManager.iterate``) and keep at most a couple of buckets in
+memory, so a day of 10 s readings never has to be materialised:
+
+- :func:`lttb` — Largest-Triangle-Three-Buckets over time buckets; returns
+  a subset of the original rows that preserves the visual shape (peaks).
+- :func:`bucket_aggregate` — fixed-width time buckets with mean/min/max
+  per field.
+"""
+
+from __future__ import annotations
+
+import re
+from itertools import chain, islice
+from datetime import datetime, tzinfo
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+MAX_POINTS_LIMIT = 10_000
+MIN_BUCKET_MS = 1_000
+
+_BUCKET_RE = re.compile(r'^\s*(\d+)\s*(ms|s|m|h|d)?\s*$', re.IGNORECASE)
+_UNIT_MS = {'ms': 1, 's': 1_000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+
+# (x, y, row)
+_Point = Tuple[float, float, Any]
+
+
+def parse_downsample_args(args: Mapping[str, Any]) -> Tuple[int | None, int | None]:
+    """Read ``max_points`` / ``bucket`` from request args.
+
+    ``bucket`` accepts a number with an optional unit (``ms``, ``s``, ``m``,
+    ``h``, ``d``; default seconds), e.g. ``300`` or ``5m``. Raises
+    ValueError on bad input or when both are given.
+    """
+    raw_points = args.get('max_points')
+    raw_bucket = args.get('bucket')
+    if raw_points not in (None, '') and raw_bucket not in (None, ''):
+        raise ValueError("use either max_points or bucket, not both")
+    max_points = bucket_ms = None
+    if raw_points not in (None, ''):
+        try:
+            max_points = int(raw_points)
+        except (TypeError, ValueError):
+            raise ValueError("max_points must be an integer") from None
+        if not 3 <= max_points <= MAX_POINTS_LIMIT:
+            raise ValueError(
+                f"max_points must be between 3 and {MAX_POINTS_LIMIT}")
+    if raw_bucket not in (None, ''):
+        m = _BUCKET_RE.match(str(raw_bucket))
+        if m is None:
+            raise ValueError("bucket must look like 300, 30s, 5m or 1h")
+        bucket_ms = int(m.group(1)) * _UNIT_MS[(m.group(2) or 's').lower()]
+        if bucket_ms < MIN_BUCKET_MS:
+            raise ValueError("bucket must be at least 1s")
+    return max_points, bucket_ms
+
+
+def _select(bucket: List[_Point], a: _Point, cx: float, cy: float) -> _Point:
+    # Point of ``bucket`` forming the largest triangle with ``a`` and (cx, cy)
+    ax, ay = a[0], a[1]
+    best = bucket[0]
+    best_area = -1.0
+    for p in bucket:
+        area = abs((ax - cx) * (p[1] - ay) - (ax - p[0]) * (cy - ay))
+        if area > best_area:
+            best, best_area = p, area
+    return best
+
+
+def _mean(bucket: List[_Point]) -> Tuple[float, float]:
+    n = len(bucket)
+    return sum(p[0] for p in bucket) / n, sum(p[1] for p in bucket) / n
+
+
+def lttb(
+    rows: Iterable[Any],
+    x_key: str,
+    y_key: str,
+    start_ms: int,
+    end_ms: int,
+    max_points: int,
+) -> Iterator[Any]:
+    """Yield at most ``max_points`` rows chosen by LTTB.
+
+    Buckets split ``[start_ms, end_ms)`` evenly by time; the first and last
+    rows are always kept. Rows whose ``y_key`` is NULL are skipped. Series
+    that already fit in ``max_points`` are returned unchanged.
+    """
+    rows = iter(rows)
+    head = list(islice(rows, max_points + 1))
+    if len(head) <= max_points:
+        yield from head
+        return
+    rows = chain(head, rows)
+
+    n_buckets = max(1, int(max_points) - 2)
+    width = max(1.0, (end_ms - start_ms) / n_buckets)
+
+    a: _Point | None = None          # last selected point
+    pending: List[_Point] = []       # complete bucket awaiting its neighbour
+    current: List[_Point] = []       # bucket being filled
+    current_idx = -1
+    for row in rows:
+        y = row[y_key]
+        if y is None:
+            continue
+        p = (float(row[x_key]), float(y), row)
+        if a is None:
+            a = p
+            yield row
+            continue
+        idx = min(n_buckets - 1, max(0, int((p[0] - start_ms) // width)))
+        if idx != current_idx and current:
+            if pending:
+                cx, cy = _mean(current)
+                a = _select(pending, a, cx, cy)
+                yield a[2]
+            pending = current
+            current = []
+        current_idx = idx
+        current.append(p)
+
+    if a is None:
+        return
+    if not current:
+        # Only one usable row in total
+        return
+    last = current.pop()
+    if pending:
+        cx, cy = _mean(current) if current else (last[0], last[1])
+        a = _select(pending, a, cx, cy)
+        yield a[2]
+    if current:
+        a = _select(current, a, last[0], last[1])
+        yield a[2]
+    yield last[2]
+
+
+def bucket_aggregate(
+    rows: Iterable[Any],
+    x_key: str,
+    fields: Sequence[str],
+    bucket_ms: int,
+    tz: tzinfo | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per non-empty ``bucket_ms`` window, oldest first.
+
+    Each dict has ``ts_epoch_ms`` (bucket start), ``timestamp`` (ISO in
+    ``tz``, if given), ``count`` and ``<field>``/``<field>_min``/
+    ``<field>_max`` for every field. Rows must arrive ordered by ``x_key``.
+    """
+    width = max(1, int(bucket_ms))
+    bucket_start: int | None = None
+    count = 0
+    sums: Dict[str, float] = {}
+    ns: Dict[str, int] = {}
+    mins: Dict[str, float] = {}
+    maxs: Dict[str, float] = {}
+
+    def emit() -> Dict[str, Any]:
+        out: Dict[str, Any] = {'ts_epoch_ms': bucket_start}
+        if tz is not None:
+            out['timestamp'] = datetime.fromtimestamp(
+                bucket_start / 1000.0, tz).isoformat()
+        out['count'] = count
+        for f in fields:
+            n = ns.get(f, 0)
+            out[f] = sums[f] / n if n else None
+            out[f'{f}_min'] = mins.get(f)
+            out[f'{f}_max'] = maxs.get(f)
+        return out
+
+    for row in rows:
+        x = int(row[x_key])
+        start = (x // width) * width
+        if start != bucket_start:
+            if bucket_start is not None:
+                yield emit()
+            bucket_start = start
+            count = 0
+            sums, ns, mins, maxs = {}, {}, {}, {}
+        count += 1
+        for f in fields:
+            v = row[f]
+            if v is None:
+                continue
+            v = float(v)
+            if f in ns:
+                sums[f] += v
+                ns[f] += 1
+                if v < mins[f]:
+                    mins[f] = v
+                if v > maxs[f]:
+                    maxs[f] = v
+            else:
+                sums[f], ns[f], mins[f], maxs[f] = v, 1, v, v
+    if bucket_start is not None:
+        yield emit()
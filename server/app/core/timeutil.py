@@ -0,0 +1,54 @@
+"""Timestamp helpers for the integer ``ts_epoch_ms`` columns.
+
+Time-series rows keep their human-readable ISO ``timestamp`` but are
+queried through ``ts_epoch_ms`` (UTC milliseconds), which is indexed and
+unaffected by DST offset changes.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Tuple
+
+
+def _localize(naive: datetime, tz: tzinfo) -> datetime:
+    # pytz zones need localize(); zoneinfo/timezone accept replace()
+    localize = getattr(tz, 'localize', None)
+    if localize is not None:
+        return localize(naive)
+    return naive.replace(tzinfo=tz)
+
+
+def to_epoch_ms(value: datetime | str | None, tz: tzinfo) -> int | None:
+    """Convert a datetime or ISO string to UTC epoch milliseconds.
+
+    Naive values are interpreted in ``tz``. Returns None if unparsable.
+    """
+    if value is None:
+        return None
+    dt = value
+    if isinstance(dt, str):
+        s = dt.strip()
+        if s.endswith('Z'):
+            s = s[:-1] + '+00:00'
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            return None
+    if not isinstance(dt, datetime):
+        return None
+    if dt.tzinfo is None:
+        dt = _localize(dt, tz)
+    return int(round(dt.timestamp() * 1000))
+
+
+def day_range_ms(day: str | date, tz: tzinfo) -> Tuple[int, int]:
+    """Return the half-open [start, end) epoch-ms range of a local calendar day.
+
+    Computed from local midnights, so 23- and 25-hour DST days are exact.
+    """
+    d = date.fromisoformat(day) if isinstance(day, str) else day
+    start = _localize(datetime(d.year, d.month, d.day), tz)
+    nxt = d + timedelta(days=1)
+    end = _localize(datetime(nxt.year, nxt.month, nxt.day), tz)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
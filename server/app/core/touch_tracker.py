@@ -0,0 +1,118 @@
+"""Coalesced "last used" bookkeeping.
+
+Authenticated requests used to write ``last_used_at`` (plus a commit and
+an fsync) on every call. :class:`TouchTracker` keeps only the newest value
+per key in memory and hands all changed keys to ``flush_fn`` in one batch
+every ``interval_s`` seconds, and on :meth:`TouchTracker.stop` at shutdown.
+Readers that need fresh values merge :meth:`TouchTracker.pending` into
+what they load from the DB. ``interval_s=0`` writes every touch through.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+FlushFn = Callable[[Dict[Hashable, Any]], None]
+
+
+class TouchTracker:
+    def __init__(self, flush_fn: FlushFn, interval_s: float = 30, name: str = 'TouchTracker') -> None:
+        self.flush_fn = flush_fn
+        self.interval_s = max(0.0, float(interval_s))
+        self.name = name
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Hashable, Any] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._touches = 0
+        self._flushes = 0
+        self._written = 0
+        self._failures = 0
+        self._last_flush_ms = 0.0
+
+    def configure(self, interval_s: float) -> None:
+        self.interval_s = max(0.0, float(interval_s))
+
+    def touch(self, key: Hashable, value: Any) -> None:
+        """Record that ``key`` was used at ``value`` (newest value wins)."""
+        with self._lock:
+            self._pending[key] = value
+            self._touches += 1
+        if self.interval_s <= 0:
+            self.flush()
+        elif self._thread is None:
+            self.start()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._pending.get(key)
+
+    def pending(self) -> Dict[Hashable, Any]:
+        """Touches not written yet."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Write every pending touch now; returns the number of keys."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            t0 = time.perf_counter()
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                with self._lock:
+                    # Keep them for the next round unless touched again since
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                    self._failures += 1
+                logger.warning("%s flush of %d key(s) failed: %s", self.name, len(batch), e)
+                return 0
+            self._flushes += 1
+            self._written += len(batch)
+            self._last_flush_ms = (time.perf_counter() - t0) * 1000.0
+            return len(batch)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write what is still pending."""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'touches': self._touches,
+                'flushes': self._flushes,
+                'written': self._written,
+                'coalesced': max(0, self._touches - self._written - len(self._pending)),
+                'failures': self._failures,
+                'interval_s': self.interval_s,
+                'last_flush_ms': round(self._last_flush_ms, 2),
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(timeout=self.interval_s or 1.0):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush crashed", self.name)
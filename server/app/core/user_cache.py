@@ -0,0 +1,117 @@
+"""Short-lived cache of user principals for per-request authentication.
+
+Flask-Login's ``load_user``, the ``kick_if_expired`` hook and the admin
+guards look the current user up on every request. ``Controller`` serves
+those password-less lookups from :class:`UserCache`: entries live for
+``ttl_s`` seconds, but never past the account's ``expires_at``, so a
+temporary user is re-read (and then purged or kicked) as soon as it
+expires. The controller invalidates entries whenever it changes a user;
+``ttl_s`` bounds how long another worker process can serve a stale one.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, tzinfo
+from typing import Any, Dict, Optional, Tuple
+
+from .models import User
+
+
+def _expiry_epoch(user: User, tz: tzinfo) -> float | None:
+    if not user.is_temporary or not user.expires_at:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(user.expires_at))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        localize = getattr(tz, 'localize', None)
+        dt = localize(dt) if localize is not None else dt.replace(tzinfo=tz)
+    return dt.timestamp()
+
+
+class UserCache:
+    def __init__(self, tz: tzinfo, ttl_s: float = 30, max_entries: int = 1024) -> None:
+        self.tz = tz
+        self.ttl_s = max(0.0, float(ttl_s))
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        # username -> (valid until, principal without password hash)
+        self._entries: Dict[str, Tuple[float, User]] = {}
+        # Bumped by invalidate(); a put() for a read that started before an
+        # invalidation is ignored so it cannot re-insert stale data
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    def configure(self, ttl_s: float) -> None:
+        with self._lock:
+            self.ttl_s = max(0.0, float(ttl_s))
+            self._entries.clear()
+
+    def get(self, username: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[username]
+                self._misses += 1
+                return None
+            self._hits += 1
+            # Callers may modify what they get back
+            return replace(entry[1])
+
+    def generation(self) -> int:
+        """Token to pass to :meth:`put`; take it before reading the DB."""
+        return self._generation
+
+    def put(self, user: User, generation: int) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        until = now + self.ttl_s
+        expires = _expiry_epoch(user, self.tz)
+        if expires is not None and now < expires < until:
+            until = expires
+        with self._lock:
+            if generation != self._generation:
+                return
+            if len(self._entries) >= self.max_entries and user.username not in self._entries:
+                self._entries.clear()
+            self._entries[user.username] = (until, user)
+
+    def invalidate(self, *usernames: str | None) -> None:
+        """Drop the given users (every user if called without arguments)."""
+        with self._lock:
+            self._generation += 1
+            if not usernames:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            for username in usernames:
+                if username is not None and self._entries.pop(username, None) is not None:
+                    self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'ttl_s': self.ttl_s,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'invalidations': self._invalidations,
+            }
@@ -0,0 +1,158 @@
+"""Write-behind queue that group-commits fire-and-forget inserts.
+
+Producers (HTTP handlers, Socket.IO events, sensor threads) enqueue
+statements and return immediately. A background thread drains the queue
+every ``flush_interval_ms`` or as soon as ``max_batch`` rows are waiting
+and writes them in a single transaction, i.e. one fsync per batch instead
+of one per row. Statements submitted together with ``submit_many`` form a
+unit that is written or dropped as a whole, also when a failed batch is
+retried piece by piece.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Statement = Tuple[str, Tuple[Any, ...]]
+Unit = Tuple[Statement, ...]
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        db: "DatabaseManager",
+        flush_interval_ms: int = 250,
+        max_batch: int = 200,
+        max_queue: int = 10000,
+    ) -> None:
+        self.db = db
+        self.flush_interval_s = max(1, int(flush_interval_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._q: "queue.Queue[Unit]" = queue.Queue(maxsize=max(1, max_queue))
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Metrics
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._errors = 0
+        self._inline_flushes = 0
+        self._last_batch_rows = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="WriteBehindQueue", daemon=True)
+        self._thread.start()
+        logger.info("Write-behind queue started (interval=%.0f ms, max_batch=%d)",
+                    self.flush_interval_s * 1000, self.max_batch)
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def submit(self, query: str, params: Tuple[Any, ...] = ()) -> None:
+        """Queue a write. Blocks only if the queue is full (flushes inline)."""
+        self.submit_many([(query, params)])
+
+    def submit_many(self, statements: Sequence[Statement]) -> None:
+        """Queue statements that must commit together (e.g. a row and its rollups)."""
+        unit: Unit = tuple(statements)
+        if not unit:
+            return
+        try:
+            self._q.put_nowait(unit)
+        except queue.Full:
+            # Never drop sensor data; apply backpressure to the producer.
+            self._inline_flushes += 1
+            self.flush()
+            self._q.put(unit)
+        self._enqueued += len(unit)
+        if self._q.qsize() >= self.max_batch:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write all queued statements. Returns the number of rows written."""
+        total = 0
+        with self._flush_lock:
+            while True:
+                units: List[Unit] = []
+                batch: List[Statement] = []
+                while len(batch) < self.max_batch:
+                    try:
+                        unit = self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                    units.append(unit)
+                    batch.extend(unit)
+                if not batch:
+                    break
+                t0 = time.perf_counter()
+                written = len(batch)
+                try:
+                    self.db.execute_batch(batch)
+                except Exception as e:
+                    logger.warning(
+                        "Write-behind batch of %d rows failed (%s); retrying unit by unit",
+                        len(batch), e)
+                    # Isolate the bad unit so one row cannot sink the batch;
+                    # each unit still commits (or rolls back) as a whole
+                    for unit in units:
+                        try:
+                            self.db.execute_batch(list(unit))
+                        except Exception as unit_err:
+                            written -= len(unit)
+                            self._errors += 1
+                            logger.warning(
+                                "Write-behind unit of %d rows dropped: %s", len(unit), unit_err)
+                elapsed_ms = (time.perf_counter() - t0) * 1000.0
+                self._batches += 1
+                self._written += written
+                self._last_batch_rows = written
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                total += written
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'depth': self._q.qsize(),
+            'enqueued': self._enqueued,
+            'written': self._written,
+            'batches': self._batches,
+            'errors': self._errors,
+            'inline_flushes': self._inline_flushes,
+            'last_batch_rows': self._last_batch_rows,
+            'last_flush_ms': round(self._last_flush_ms, 3),
+            'max_flush_ms': round(self._max_flush_ms, 3),
+            'flush_interval_ms': int(self.flush_interval_s * 1000),
+            'max_batch': self.max_batch,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind queue flush crashed")
@@ -0,0 +1,125 @@
+"""Compiled IP whitelist for the rate-limit request filter.
+
+Entries are compiled once into prefix tables instead of being re-parsed on
+every request:
+
+- exact addresses, e.g. ``"127.0.0.1"`` or ``"::1"`` (host prefixes),
+- wildcards over whole octets/hextets, e.g. ``"192.168.10.*"`` or
+  ``"2001:db8:*"`` (the fixed leading part becomes a prefix),
+- CIDR ranges, e.g. ``"192.168.10.0/24"`` or ``"fd00::/8"``.
+
+For each address family, networks are grouped by prefix length into sets
+of the masked network integers. A lookup shifts the address once per
+distinct prefix length and probes the set, so it costs at most
+prefix-length steps (32 for IPv4, 128 for IPv6) and in practice a handful.
+IPv4-mapped IPv6 addresses are matched as IPv4. Entries that are not IP
+addresses (e.g. hostnames) are matched as exact strings, as before.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from ipaddress import IPv6Address, ip_address, ip_network
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MEMO_MAX = 4096
+
+
+class _PrefixTable:
+    def __init__(self, bits: int) -> None:
+        self.bits = bits
+        self._by_len: Dict[int, Set[int]] = {}
+        # (shift, networks) for each prefix length in use, shortest first
+        self._probes: List[Tuple[int, Set[int]]] = []
+
+    def add(self, network: int, prefixlen: int) -> None:
+        self._by_len.setdefault(prefixlen, set()).add(network >> (self.bits - prefixlen))
+        self._probes = [(self.bits - plen, self._by_len[plen]) for plen in sorted(self._by_len)]
+
+    def __contains__(self, addr: int) -> bool:
+        for shift, networks in self._probes:
+            if (addr >> shift) in networks:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._by_len.values())
+
+
+def _wildcard_network(entry: str) -> str | None:
+    # "192.168.10.*" -> "192.168.10.0/24"; "2001:db8:*" -> "2001:db8::/32"
+    if '.' in entry and ':' not in entry:
+        parts = entry.split('.')
+        fixed = [p for p in parts if p != '*']
+        if len(parts) > 4 or parts[:len(fixed)] != fixed or not fixed:
+            return None
+        return '.'.join(fixed + ['0'] * (4 - len(fixed))) + f"/{8 * len(fixed)}"
+    if ':' in entry and '::' not in entry:
+        parts = entry.split(':')
+        fixed = [p for p in parts if p != '*']
+        if len(parts) > 8 or parts[:len(fixed)] != fixed or not fixed:
+            return None
+        return ':'.join(fixed) + ('::' if len(fixed) < 8 else '') + f"/{16 * len(fixed)}"
+    return None
+
+
+class IPWhitelist:
+    def __init__(self, entries: Iterable[object] = ()) -> None:
+        self._v4 = _PrefixTable(32)
+        self._v6 = _PrefixTable(128)
+        self._strings: Set[str] = set()
+        self._memo: Dict[str, bool] = {}
+        self._memo_lock = threading.Lock()
+        self.invalid: List[str] = []
+        for item in entries:
+            self._add(str(item).strip())
+
+    def __len__(self) -> int:
+        return len(self._v4) + len(self._v6) + len(self._strings)
+
+    def _add(self, entry: str) -> None:
+        if not entry:
+            return
+        spec = entry
+        if '*' in entry:
+            spec = _wildcard_network(entry)
+            if spec is None:
+                logger.warning("Ignoring unsupported whitelist wildcard %r", entry)
+                self.invalid.append(entry)
+                return
+        try:
+            net = ip_network(spec, strict=False)
+        except ValueError:
+            # Not an address: keep the old exact-string behaviour
+            self._strings.add(entry)
+            return
+        table = self._v4 if net.version == 4 else self._v6
+        table.add(int(net.network_address), net.prefixlen)
+
+    def __contains__(self, addr: str) -> bool:
+        hit = self._memo.get(addr)
+        if hit is not None:
+            return hit
+        hit = self._lookup(addr)
+        with self._memo_lock:
+            if len(self._memo) >= _MEMO_MAX:
+                self._memo.clear()
+            self._memo[addr] = hit
+        return hit
+
+    def _lookup(self, addr: str) -> bool:
+        if addr in self._strings:
+            return True
+        try:
+            ip = ip_address(addr)
+        except ValueError:
+            return False
+        if isinstance(ip, IPv6Address):
+            mapped = ip.ipv4_mapped
+            if mapped is None:
+                return int(ip) in self._v6
+            return int(mapped) in self._v4
+        return int(ip) in self._v4
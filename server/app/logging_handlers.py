@@ -1,28 +1,61 @@
 """Logging handlers used by the application.
 
 Provides a handler that mirrors ERROR-level logs (and above)
-into the application's DB using Controller.log_message().
+into the application's DB using Controller.log_messages().
 """
 
 from __future__ import annotations
 
 import logging
+import queue
+import threading
+import time
 from logging import LogRecord
+from typing import Any, Dict, List, Tuple
 
 from .core import Controller
 
+# (message, log type, record.created)
+_Entry = Tuple[str, str, float]
+
 
 class DBLogHandler(logging.Handler):
-    """Persist log records to the DB via Controller.log_message().
+    """Persist log records to the DB in background batches.
+
+    ``emit`` only formats the record and puts it on a bounded queue, so the
+    logging thread (or eventlet hub) never waits on SQLite. A writer thread
+    drains the queue and inserts up to ``batch_size`` rows per transaction
+    via ``Controller.log_messages``. When the queue is full, records are
+    dropped and counted; the count is written to the DB as a warning once
+    there is room again.
 
     Attach this handler to the root logger (or specific loggers)
     after the Controller has been created. By default, it only
     handles ERROR and CRITICAL records; adjust the level as needed.
     """
 
-    def __init__(self, controller: Controller, level: int = logging.ERROR) -> None:
+    def __init__(
+        self,
+        controller: Controller,
+        level: int = logging.ERROR,
+        max_queue: int = 1000,
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+    ) -> None:
         super().__init__(level=level)
         self.controller = controller
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = max(0.05, float(flush_interval_s))
+        self._q: "queue.Queue[_Entry]" = queue.Queue(maxsize=max(1, max_queue))
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._dropped_reported = 0
+        self._failed = 0
+        self._thread = threading.Thread(
+            target=self._run, name="DBLogHandler", daemon=True)
+        self._thread.start()
 
     def emit(self, record: LogRecord) -> None:
         try:
@@ -31,12 +64,75 @@ class DBLogHandler(logging.Handler):
             log_type = 'error' if record.levelno >= logging.ERROR else (
                 'warning' if record.levelno >= logging.WARNING else 'info'
             )
-            self.controller.log_message(message, log_type)
-        except Exception as e:  # pragma: no cover - avoid recursion on logging failures
+            self._q.put_nowait((message, log_type, record.created))
+        except queue.Full:
+            # Never block the caller; account for the loss instead
+            self._dropped += 1
+        except Exception:  # pragma: no cover - avoid recursion on logging failures
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write everything queued so far (called on shutdown)."""
+        while not self._q.empty():
+            if not self._write_batch():
+                break
+        if self._dropped > self._dropped_reported:
+            self._write_batch()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        try:
+            self.flush()
+        finally:
+            super().close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'depth': self._q.qsize(),
+            'written': self._written,
+            'dropped': self._dropped,
+            'failed': self._failed,
+            'batch_size': self.batch_size,
+        }
+
+    def _write_batch(self, first: _Entry | None = None) -> int:
+        batch: List[_Entry] = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        dropped = self._dropped - self._dropped_reported
+        if dropped:
+            batch.append((
+                f"DBLogHandler queue full: {dropped} log record(s) dropped",
+                'warning', time.time()))
+        if not batch:
+            return 0
+        with self._write_lock:
+            try:
+                self.controller.log_messages(batch)
+                self._written += len(batch)
+                self._dropped_reported += dropped
+            except Exception as e:
+                self._failed += len(batch)
+                try:
+                    # Best-effort: don't re-emit ERROR to avoid loops
+                    logging.getLogger(__name__).warning(
+                        "DBLogHandler write failed: %s", e
+                    )
+                except Exception:
+                    pass
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
             try:
-                # Best-effort: don't re-emit ERROR to avoid loops
-                logging.getLogger(__name__).warning(
-                    "DBLogHandler emit failed: %s", e
-                )
-            except Exception:
-                pass
+                first = self._q.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                if self._dropped > self._dropped_reported:
+                    self._write_batch()
+                continue
+            self._write_batch(first)
@@ -6,6 +6,8 @@ import logging
 from flask import request, current_app, jsonify, g
 from functools import wraps
 from .extensions import limiter
+from .core.kdf import KdfBusy
+from .ip_whitelist import IPWhitelist
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +15,17 @@ logger = logging.getLogger(__name__)
 def configure_rate_limiting(app) -> None:
     """Initialize Flask-Limiter and register a whitelist request filter.
 
-    Whitelist supports:
+    Whitelist supports (IPv4 and IPv6):
       - Exact IP match, e.g. "127.0.0.1"
       - Wildcard suffix, e.g. "192.168.10.*"
       - CIDR ranges, e.g. "192.168.10.0/24"
+
+    The list is compiled once into an IPWhitelist; it is recompiled when
+    ``app.config['whitelist']`` is replaced or reload_rate_limit_whitelist()
+    is called.
     """
     limiter.init_app(app)
-
-    try:
-        from ipaddress import ip_address, ip_network
-    except Exception:
-        ip_address = ip_network = None  # type: ignore
+    reload_rate_limit_whitelist(app)
 
     def _rate_limit_whitelist_filter() -> bool:
         try:
@@ -32,25 +34,11 @@ def configure_rate_limiting(app) -> None:
             if not addr_raw:
                 return False
             addr = str(addr_raw).split(',')[0].strip()
-            wl = current_app.config.get('whitelist', []) or []
-            for item in wl:
-                s = str(item).strip()
-                if not s:
-                    continue
-                if s.endswith('.*'):
-                    if addr.startswith(s[:-1]):
-                        return True
-                    continue
-                if '/' in s and ip_address and ip_network:
-                    try:
-                        if ip_address(addr) in ip_network(s, strict=False):
-                            return True
-                        continue
-                    except Exception:
-                        pass
-                if addr == s:
-                    return True
-            return False
+            app_ = current_app._get_current_object()  # type: ignore[attr-defined]
+            source, matcher = app_.rate_limit_whitelist
+            if app_.config.get('whitelist') is not source:
+                matcher = reload_rate_limit_whitelist(app_)
+            return addr in matcher
         except Exception:
             return False
 
@@ -66,6 +54,14 @@ def configure_rate_limiting(app) -> None:
     )
 
 
+def reload_rate_limit_whitelist(app) -> IPWhitelist:
+    """Compile ``app.config['whitelist']`` for the rate-limit filter."""
+    source = app.config.get('whitelist')
+    matcher = IPWhitelist(source or [])
+    app.rate_limit_whitelist = (source, matcher)
+    return matcher
+
+
 def require_api_key(view_func):
     """Decorator to protect endpoints with an API key.
 
@@ -95,7 +91,10 @@ def require_api_key(view_func):
             ctrl = getattr(current_app, 'ctrl', None)
             if ctrl is None:
                 return jsonify({'ok': False, 'error': 'server_not_ready'}), 503
-            meta = ctrl.verify_api_key_token(token)
+            try:
+                meta = ctrl.verify_api_key_token(token)
+            except KdfBusy:
+                return jsonify({'ok': False, 'error': 'busy'}), 503, {'Retry-After': '1'}
             if not meta:
                 return jsonify({'ok': False, 'error': 'invalid_api_key'}), 401
             g.api_key = meta
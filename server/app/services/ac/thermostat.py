@@ -1,7 +1,7 @@
 import logging
 from collections import deque
 import time
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from datetime import datetime, timedelta
 import pytz
 from ...core import Controller
@@ -328,39 +328,22 @@ class ACThermostat:
         latest_ts: Optional[str] = None
         max_stale = self.cfg.max_stale_s
 
-        def _parse_iso_to_epoch(ts: Optional[str]) -> Optional[float]:
-            if not ts:
-                return None
-            s = str(ts).strip()
-            try:
-                if s.endswith('Z'):
-                    s = s[:-1]
-                dt = datetime.fromisoformat(s)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=self.tz)
-                return dt.timestamp()
-            except Exception:
-                try:
-                    return float(s)
-                except Exception:
-                    return None
-
         for loc in locs:
-            rec = self.ctrl.get_last_esp32_temphum_for_location(loc)
-            if rec is None or rec.temperature is None:
+            # Served from the controller's latest-reading cache (no DB query)
+            entry = self.ctrl.get_latest_reading(loc)
+            if entry is None or entry.reading.temperature is None:
                 continue
-            ts_epoch = _parse_iso_to_epoch(getattr(rec, 'timestamp', None))
-            if max_stale is not None and ts_epoch is not None:
-                age = self._now() - ts_epoch
+            if max_stale is not None and entry.ts_epoch_ms:
+                age = entry.age_s(self._now())
                 if age > max_stale:
                     logger.debug(
                         "thermo: skipping stale reading for %s age=%.1fs > %ss", loc, age, max_stale)
                     continue
             try:
-                temps.append(float(rec.temperature))
+                temps.append(float(entry.reading.temperature))
                 used_locs.append(loc)
                 if latest_ts is None:
-                    latest_ts = getattr(rec, 'timestamp', None)
+                    latest_ts = entry.reading.timestamp
             except Exception:
                 continue
 
@@ -405,55 +388,74 @@ class ACThermostat:
         except Exception as e:
             logger.debug("thermo: notify thermo failed: %s", e)
 
+    def _sleep_status_payload(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "sleep_enabled": bool(getattr(self.cfg, 'sleep_active', True)),
+            "sleep_start": getattr(self.cfg, 'sleep_start', None),
+            "sleep_stop": getattr(self.cfg, 'sleep_stop', None),
+            "sleep_time_active": bool(self._is_sleep_time_window_now()),
+        }
+        # Attach weekly schedule (as dict) if present
+        weekly = getattr(self.cfg, 'sleep_weekly', None)
+        if weekly:
+            try:
+                import json
+                payload["sleep_schedule"] = json.loads(
+                    weekly) if isinstance(weekly, str) else weekly
+            except Exception:
+                payload["sleep_schedule"] = None
+        # Attach temporary override info if active
+        if self._sleep_override_until is not None:
+            payload["sleep_override_until"] = self._parse_epoch_to_hhmm(
+                float(self._sleep_override_until))
+        return payload
+
     def _emit_sleep_status(self) -> None:
         try:
             if self.notify:
-                payload: Dict[str, Any] = {
-                    "sleep_enabled": bool(getattr(self.cfg, 'sleep_active', True)),
-                    "sleep_start": getattr(self.cfg, 'sleep_start', None),
-                    "sleep_stop": getattr(self.cfg, 'sleep_stop', None),
-                    "sleep_time_active": bool(self._is_sleep_time_window_now()),
-                }
-                # Attach weekly schedule (as dict) if present
-                weekly = getattr(self.cfg, 'sleep_weekly', None)
-                if weekly:
-                    try:
-                        import json
-                        payload["sleep_schedule"] = json.loads(
-                            weekly) if isinstance(weekly, str) else weekly
-                    except Exception:
-                        payload["sleep_schedule"] = None
-                # Attach temporary override info if active
-                if self._sleep_override_until is not None:
-                    payload["sleep_override_until"] = self._parse_epoch_to_hhmm(
-                        float(self._sleep_override_until))
-
-                self.notify('sleep_status', payload)
+                self.notify('sleep_status', self._sleep_status_payload())
         except Exception as e:
             logger.debug("thermo: notify sleep failed: %s", e)
 
+    def _config_payload(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "setpoint_c": float(self.cfg.target_temp),
+            "pos_hysteresis": float(self.cfg.pos_hysteresis),
+            "neg_hysteresis": float(self.cfg.neg_hysteresis),
+            "min_on_s": int(self.cfg.min_on_s),
+            "min_off_s": int(self.cfg.min_off_s),
+            "poll_interval_s": int(self.cfg.poll_interval_s),
+            "smooth_window": int(self.cfg.smooth_window),
+            "max_stale_s": None if self.cfg.max_stale_s is None else int(self.cfg.max_stale_s),
+        }
+        try:
+            payload["control_locations"] = getattr(
+                self.cfg, 'control_locations', None)
+        except Exception:
+            pass
+        return payload
+
     def _emit_config(self) -> None:
         try:
             if self.notify:
-                payload: Dict[str, Any] = {
-                    "setpoint_c": float(self.cfg.target_temp),
-                    "pos_hysteresis": float(self.cfg.pos_hysteresis),
-                    "neg_hysteresis": float(self.cfg.neg_hysteresis),
-                    "min_on_s": int(self.cfg.min_on_s),
-                    "min_off_s": int(self.cfg.min_off_s),
-                    "poll_interval_s": int(self.cfg.poll_interval_s),
-                    "smooth_window": int(self.cfg.smooth_window),
-                    "max_stale_s": None if self.cfg.max_stale_s is None else int(self.cfg.max_stale_s),
-                }
-                try:
-                    payload["control_locations"] = getattr(
-                        self.cfg, 'control_locations', None)
-                except Exception:
-                    pass
-                self.notify('thermo_config', payload)
+                self.notify('thermo_config', self._config_payload())
         except Exception as e:
             logger.debug("thermo: notify config failed: %s", e)
 
+    def state_events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Current state as the (event, payload) pairs the notify hooks send.
+
+        Built from memory only (last polled mode/fan, no device request).
+        """
+        return [
+            ('ac_status', {"is_on": bool(self._is_on)}),
+            ('ac_state', {"mode": self.mode, "fan_speed": self.fan_speed}),
+            ('thermostat_status', {"enabled": bool(self._enabled),
+                                   "thermo_active": bool(self._enabled)}),
+            ('sleep_status', self._sleep_status_payload()),
+            ('thermo_config', self._config_payload()),
+        ]
+
     def set_control_locations(self, locs: List[str]) -> None:
         try:
             import json
@@ -0,0 +1,166 @@
+"""Coalesced live-update frames for dashboard views.
+
+Sensor readings and thermostat steps used to reach every browser view as
+separate events, as soon as they happened. :class:`DashboardFrames` keeps
+only the newest payload per key (one per event, per location for
+``esp32_temphum``) and, every ``interval_ms``, sends each view a single
+``dashboard_frame``::
+
+    {"seq": 42, "base": 40, "full": false,
+     "updates": [["esp32_temphum", {...}], ["ac_status", {...}]]}
+
+``updates`` holds every key that changed after frame ``base``, the last
+frame the view acknowledged with ``dashboard_ack`` (``base`` 0 means the
+frame carries the whole state). Views on the same ``base`` get the same
+frame, so the common case is one emit to a process-local room; views that
+lag behind are sent their larger delta individually. Events that are not
+coalesced (``flash``, ``server_shutdown``, ...) never pass through here.
+``interval_ms=0`` disables coalescing and callers emit directly.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from typing import Any, Dict, Hashable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, Hashable]
+
+
+class _View:
+    __slots__ = ('acked', 'sent')
+
+    def __init__(self) -> None:
+        self.acked = 0  # last frame seq the browser confirmed
+        self.sent = 0   # last frame seq sent to it
+
+
+class DashboardFrames:
+    def __init__(self, socketio, interval_ms: int = 500, name: str = 'DashboardFrames') -> None:
+        self.socketio = socketio
+        self.interval_ms = max(0, int(interval_ms))
+        self.name = name
+        # Only views tracked by this process may receive its frames
+        self.room = f"frames-{uuid.uuid4().hex[:12]}"
+        self._lock = threading.Lock()
+        self._values: Dict[Key, Any] = {}
+        self._changed_at: Dict[Key, int] = {}
+        self._dirty: Set[Key] = set()
+        self._views: Dict[str, _View] = {}
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_ms > 0
+
+    def configure(self, interval_ms: int) -> None:
+        self.interval_ms = max(0, int(interval_ms))
+        if not self.enabled:
+            self.stop()
+
+    def add_view(self, sid: str, synced: bool = False) -> None:
+        """Track a connected view.
+
+        Its first frame carries the full state, unless ``synced`` says the
+        view was just sent the current state another way (the connect
+        snapshot); then only changes from here on are sent.
+        """
+        with self._lock:
+            view = self._views[sid] = _View()
+            if synced:
+                view.acked = view.sent = self._seq
+            self.socketio.server.enter_room(sid, self.room, namespace='/')
+        if self.enabled and self._thread is None:
+            self.start()
+
+    def remove_view(self, sid: str) -> None:
+        with self._lock:
+            self._views.pop(sid, None)
+
+    def ack(self, sid: str, seq: Any) -> None:
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            view = self._views.get(sid)
+            if view is not None and view.acked < seq <= view.sent:
+                view.acked = seq
+
+    def update(self, event: str, payload: Any, key: Hashable = None) -> None:
+        """Replace the pending value of ``(event, key)``."""
+        with self._lock:
+            self._values[(event, key)] = payload
+            self._dirty.add((event, key))
+        if self._thread is None:
+            self.start()
+
+    def flush(self) -> int:
+        """Send pending changes now; returns the number of emits."""
+        with self._lock:
+            if self._dirty:
+                self._seq += 1
+                for key in self._dirty:
+                    self._changed_at[key] = self._seq
+                self._dirty.clear()
+            seq = self._seq
+            groups: Dict[int, List[str]] = {}
+            idle: List[str] = []
+            for sid, view in self._views.items():
+                if view.sent >= seq:
+                    # Already has everything up to the newest change
+                    idle.append(sid)
+                    continue
+                groups.setdefault(view.acked, []).append(sid)
+                view.sent = seq
+            if not groups:
+                return 0
+            frames = []
+            for base, sids in groups.items():
+                updates = [[key[0], self._values[key]]
+                           for key, at in self._changed_at.items() if at > base]
+                frames.append((sids, {'seq': seq, 'base': base, 'full': base == 0, 'updates': updates}))
+        frames.sort(key=lambda f: len(f[0]), reverse=True)
+        emits = 0
+        for i, (sids, frame) in enumerate(frames):
+            if i == 0 and len(sids) > 1:
+                others = idle + [sid for s, _ in frames[1:] for sid in s]
+                emits += self._emit(frame, to=self.room, skip_sid=others or None)
+                continue
+            for sid in sids:
+                emits += self._emit(frame, to=sid)
+        return emits
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None or not self.enabled:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def _emit(self, frame: Dict[str, Any], **kwargs: Any) -> int:
+        try:
+            self.socketio.emit('dashboard_frame', frame, **kwargs)
+            return 1
+        except Exception as e:
+            logger.warning("%s emit failed: %s", self.name, e)
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop.wait(timeout=(self.interval_ms or 500) / 1000.0):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush crashed", self.name)
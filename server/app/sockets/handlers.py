@@ -1,11 +1,26 @@
 import logging
+from dataclasses import asdict
 from flask import request, current_app
-from flask_socketio import SocketIO
-from typing import Set, Any
+from flask_socketio import SocketIO, join_room
+from typing import Any, List, Set
 from flask_login import current_user
 
 from ..core import Controller
 from ..services.ac import ACThermostat
+from .frames import DashboardFrames
+
+# Socket.IO rooms per connection role; a broadcast is one emit to the room
+# instead of one emit (and one message-queue publish) per sid
+VIEWS_ROOM = 'views'
+CLIENTS_ROOM = 'clients'
+ESP32_ROOM = 'esp32'
+
+# View events merged into the periodic dashboard_frame (latest value per
+# key); everything else, e.g. flash, is emitted immediately
+COALESCED_VIEW_EVENTS = frozenset({
+    'esp32_temphum', 'ac_status', 'ac_state', 'thermostat_status',
+    'sleep_status', 'thermo_config',
+})
 
 
 class SocketEventHandler:
@@ -23,10 +38,11 @@ class SocketEventHandler:
         self.socketio = socketio
         self.ctrl = ctrl
         self.logger = logging.getLogger(__name__)
-        # Track currently connected sids by role
+        # Track currently connected sids by role (delivery goes via rooms)
         self.view_sids: Set[str] = set()
         self.client_sids: Set[str] = set()
         self.esp32_sids: Set[str] = set()
+        self.frames = DashboardFrames(socketio)
         self._initialized = True
         socketio.on_event('connect',    self.handle_connect)
         socketio.on_event('disconnect', self.handle_disconnect)
@@ -37,6 +53,7 @@ class SocketEventHandler:
         socketio.on_event('ac_control',   self.handle_ac_control)
         socketio.on_event('car_heater_control',
                           self.handle_car_heater_control)
+        socketio.on_event('dashboard_ack', self.handle_dashboard_ack)
 
     def handle_connect(self, auth):
         # Use Flask-Login session cookie for auth instead of API key
@@ -46,10 +63,13 @@ class SocketEventHandler:
         sid = request.sid  # type: ignore
         # Classify this connection
         role = None
+        wants_frames = False
         try:
             if isinstance(auth, dict):
                 role = (auth.get('role') or auth.get(
                     'type') or auth.get('client'))
+                # Only dashboard pages (init_sio.js) replay and ack frames
+                wants_frames = auth.get('frames') is True
         except Exception:
             pass
         # Heuristic: consider browsers as view when UA looks like one
@@ -65,12 +85,21 @@ class SocketEventHandler:
         role_l = str(role).lower() if role is not None else None
         if sid:
             if role_l == 'view' or is_view:
+                join_room(VIEWS_ROOM)
                 self.view_sids.add(sid)
                 self.logger.info("View connected: %s (tracked)", sid)
+                if wants_frames:
+                    if self.frames.enabled:
+                        # Registered before the snapshot is built, so nothing
+                        # changed in between can be missed
+                        self.frames.add_view(sid, synced=True)
+                    self._emit_snapshot(sid)
             elif role_l in {'client', 'raspi', 'pi', 'printer', 'timelapse'}:
+                join_room(CLIENTS_ROOM)
                 self.client_sids.add(sid)
                 self.logger.info("Client connected: %s (tracked)", sid)
             elif role_l == 'esp32':
+                join_room(ESP32_ROOM)
                 self.esp32_sids.add(sid)
                 self.logger.info("ESP32 server connected: %s (tracked)", sid)
             else:
@@ -84,6 +113,7 @@ class SocketEventHandler:
         removed = False
         if sid in self.view_sids:
             self.view_sids.discard(sid)
+            self.frames.remove_view(sid)
             removed = True
             self.logger.info("View disconnected: %s (untracked)", sid)
         if sid in self.client_sids:
@@ -97,34 +127,82 @@ class SocketEventHandler:
         if not removed:
             self.logger.info("Client disconnected: %s", sid)
 
-    def emit_to_views(self, event: str, payload: Any = None) -> None:
-        """Emit event only to currently connected browser views (by sid)."""
-        # Iterate over a copy to avoid mutation during iteration
-        for sid in list(self.view_sids):
+    def _emit_snapshot(self, sid: str) -> None:
+        """Send a new view the current dashboard state as one message.
+
+        ``dashboard_snapshot`` has the dashboard_frame shape, ``{updates:
+        [[event, payload], ...]}``, built from memory only: the latest
+        reading per location, the thermostat's AC/config/sleep state (last
+        polled mode and fan, no device request) and the car heater status
+        the controller cached at startup and on every record.
+        """
+        updates: List[list] = []
+        try:
+            for entry in self.ctrl.latest.all():
+                r = entry.reading
+                updates.append(['esp32_temphum', {
+                    'location': r.location,
+                    'temperature': r.temperature,
+                    'humidity': r.humidity,
+                    'ac_on': r.ac_on,
+                    'timestamp': r.timestamp,
+                    'age_s': round(entry.age_s(), 1),
+                }])
+        except Exception as e:
+            self.logger.warning("Snapshot readings failed: %s", e)
+        ac_thermo: ACThermostat | None = getattr(
+            current_app, 'ac_thermostat', None)  # type: ignore
+        if ac_thermo is not None:
             try:
-                self.socketio.emit(event, payload, to=sid)
-            except Exception:
-                # If emit fails (e.g., stale sid), drop it
-                self.view_sids.discard(sid)
-                self.logger.debug("Removed stale view sid: %s", sid)
+                updates.extend([event, payload]
+                               for event, payload in ac_thermo.state_events())
+            except Exception as e:
+                self.logger.warning("Snapshot thermostat state failed: %s", e)
+        try:
+            last = self.ctrl.cached_car_heater_status()
+            if last is not None:
+                status = asdict(last)
+                if hasattr(status['timestamp'], 'isoformat'):
+                    status['timestamp'] = status['timestamp'].isoformat()
+                car: dict = {'status': status, 'snapshot': True}
+                svc = current_app.config.get('CAR_HEATER_SERVICE')
+                if svc is not None:
+                    car['command_status'] = asdict(svc.get_command_status())
+                updates.append(['car_heater_status', car])
+        except Exception as e:
+            self.logger.warning("Snapshot car heater status failed: %s", e)
+        self.socketio.emit('dashboard_snapshot', {'updates': updates}, to=sid)
+
+    def _emit_to_room(self, room: str, event: str, payload: Any = None) -> None:
+        try:
+            self.socketio.emit(event, payload, to=room)
+        except Exception as e:
+            self.logger.warning("Emit of '%s' to room %s failed: %s", event, room, e)
+
+    def emit_to_views(self, event: str, payload: Any = None) -> None:
+        """Emit event only to connected browser views (the views room).
+
+        State events in COALESCED_VIEW_EVENTS go into the next
+        dashboard_frame instead, unless frames are disabled.
+        """
+        if event in COALESCED_VIEW_EVENTS and self.frames.enabled:
+            key = payload.get('location') if event == 'esp32_temphum' and isinstance(payload, dict) else None
+            self.frames.update(event, payload, key)
+            return
+        self._emit_to_room(VIEWS_ROOM, event, payload)
 
     def emit_to_clients(self, event: str, payload: Any = None) -> None:
         """Emit event only to timelapse/pi clients (not views or esp32)."""
-        for sid in list(self.client_sids):
-            try:
-                self.socketio.emit(event, payload, to=sid)
-            except Exception:
-                self.client_sids.discard(sid)
-                self.logger.debug("Removed stale client sid: %s", sid)
+        self._emit_to_room(CLIENTS_ROOM, event, payload)
 
     def emit_to_esp32(self, event: str, payload: Any = None) -> None:
         """Emit event only to esp32_server connections."""
-        for sid in list(self.esp32_sids):
-            try:
-                self.socketio.emit(event, payload, to=sid)
-            except Exception:
-                self.esp32_sids.discard(sid)
-                self.logger.debug("Removed stale esp32 sid: %s", sid)
+        self._emit_to_room(ESP32_ROOM, event, payload)
+
+    def handle_dashboard_ack(self, data):
+        """A view applied dashboard_frame ``seq``; later deltas build on it."""
+        if isinstance(data, dict):
+            self.frames.ack(request.sid, data.get('seq'))  # type: ignore[attr-defined]
 
     def flash(self, message, category):
         """Emit a flash message to the client."""
@@ -132,8 +210,30 @@ class SocketEventHandler:
         self.logger.info("Flash message: %s (%s)", category, message)
 
     def handle_image(self, *args):
-        self.emit_to_views('image')
-        self.logger.debug("Emitted 'image' event")
+        """
+        Notify views of a new frame and store it with its URL. The frame is
+        either sent by the client (raw bytes, or ``{image: <base64>}``) or,
+        for a bare event, read from the preview.jpg it just wrote.
+        """
+        data = args[0] if args else None
+        image = data.get('image') if isinstance(data, dict) else data
+        has_payload = isinstance(image, (bytes, bytearray, str)) and bool(image)
+        try:
+            saved = self.ctrl.record_image(image) if has_payload else self.ctrl.record_preview_file()
+        except Exception as e:
+            self.logger.warning("Failed to store image frame: %s", e)
+            self.emit_to_views('image')
+            return
+        if saved is None:
+            self.emit_to_views('image')
+            self.logger.debug("Emitted 'image' event without a frame")
+            return
+        self.emit_to_views('image', {
+            'sha256': saved.sha256,
+            'timestamp': saved.timestamp,
+            'url': f"/api/frames/{saved.sha256}",
+        })
+        self.logger.debug("Stored frame %s (%d bytes)", saved.sha256, saved.size)
 
     def handle_esp32_temphum(self, data):
         location, temp, hum = data.get('location'), data.get(
@@ -50,9 +50,13 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     socket.on('image', data => {
-      // If server ever includes base64 image in payload, render it.
+      // Stored frames arrive as a URL to the content-addressed frame;
+      // a base64 payload is still rendered if one is ever sent.
       try {
-        if (data && data.image) {
+        if (data && data.url) {
+          document.querySelector('.image-tile img').src = data.url;
+          console.log('🖼️ Image tile updated from frame store');
+        } else if (data && data.image) {
           document.querySelector('.image-tile img').src = 'data:image/jpeg;base64,' + data.image;
           console.log('🖼️ Image tile updated from payload');
         } else {
@@ -249,7 +249,10 @@ document.addEventListener('DOMContentLoaded', () => {
         updateCommandStatusUI(data.command_status || data.commandStatus);
       }
       // When a new status arrives, assume commands were delivered
-      setQueueStatus('queue-sent', 'Last command sent to car');
+      // (the connect snapshot only repeats the last known status)
+      if (!(data && data.snapshot)) {
+        setQueueStatus('queue-sent', 'Last command sent to car');
+      }
     });
 
     window.socket.on('car_heater_action_result', data => {
@@ -262,5 +265,11 @@ document.addEventListener('DOMContentLoaded', () => {
         updateSingleCommandStatus(data.action, 'queued');
       }
     });
+
+    // The connect snapshot may have arrived before these handlers existed;
+    // frames after it only carry later changes, so replay it now
+    if (window.dashboardSnapshot && window.applyDashboardUpdates) {
+      window.applyDashboardUpdates(window.dashboardSnapshot.updates);
+    }
   }
 });
@@ -118,12 +118,22 @@
     titleTempEl.textContent = 'Lämpötila';
     titleHumEl.textContent  = 'Kosteus';
 
-    const url = `/api/esp32_temphum?date=${encodeURIComponent(dateStr)}&location=${encodeURIComponent(location)}`;
+    // 1-minute server-side rollups: one row per minute instead of every raw reading
+    const url = `/api/esp32_temphum/rollup?resolution=1m&start=${encodeURIComponent(dateStr)}&end=${encodeURIComponent(dateStr)}&location=${encodeURIComponent(location)}`;
 
     fetch(url, { method: 'GET', headers: { 'Accept': 'application/json' } })
       .then(r => r.json())
-      .then(data => {
-        // Expected shape: [{ temperature:Number, humidity:Number, timestamp:ISO }, ...]
+      .then(buckets => {
+        // Bucket shape: { timestamp:ISO, count, temperature:{avg,min,max,...}, humidity:{...} }
+        const data = (Array.isArray(buckets) ? buckets : []).map(b => ({
+          timestamp: b.timestamp,
+          temperature: b?.temperature?.avg,
+          humidity: b?.humidity?.avg,
+          temperature_min: b?.temperature?.min,
+          temperature_max: b?.temperature?.max,
+          humidity_min: b?.humidity?.min,
+          humidity_max: b?.humidity?.max,
+        }));
         const effectiveAggregationMinutes = AGGREGATION_ENABLED ? averagingMinutes : 0;
         const { labels, temps, hums } = aggregateByMinutes(data, effectiveAggregationMinutes);
 
@@ -136,14 +146,15 @@
         avgTempEl.textContent = temps.length ? `Lämpötila: ${avgT.toFixed(1)}°C` : 'Lämpötila: –';
         avgHumEl.textContent  = hums.length  ? `Kosteus: ${avgH.toFixed(1)}%`    : 'Kosteus: –';
 
-        // Daily min/max from raw values (preserve extremes even if aggregation is enabled)
+        // Daily min/max from per-minute extremes (preserved even if aggregation is enabled)
         try {
-          const rawTemps = (Array.isArray(data) ? data : []).map(r => Number(r?.temperature ?? r?.temperature_c)).filter(Number.isFinite);
-          const rawHums  = (Array.isArray(data) ? data : []).map(r => Number(r?.humidity ?? r?.humidity_pct)).filter(Number.isFinite);
-          const tMin = rawTemps.length ? Math.min(...rawTemps) : NaN;
-          const tMax = rawTemps.length ? Math.max(...rawTemps) : NaN;
-          const hMin = rawHums.length  ? Math.min(...rawHums)  : NaN;
-          const hMax = rawHums.length  ? Math.max(...rawHums)  : NaN;
+          const finite = key => data.map(r => Number(r?.[key])).filter(Number.isFinite);
+          const tMins = finite('temperature_min'), tMaxs = finite('temperature_max');
+          const hMins = finite('humidity_min'),    hMaxs = finite('humidity_max');
+          const tMin = tMins.length ? Math.min(...tMins) : NaN;
+          const tMax = tMaxs.length ? Math.max(...tMaxs) : NaN;
+          const hMin = hMins.length ? Math.min(...hMins) : NaN;
+          const hMax = hMaxs.length ? Math.max(...hMaxs) : NaN;
           if (minTempEl) minTempEl.textContent = Number.isFinite(tMin) ? `Min: ${tMin.toFixed(1)}°C` : 'Min: –';
           if (maxTempEl) maxTempEl.textContent = Number.isFinite(tMax) ? `Max: ${tMax.toFixed(1)}°C` : 'Max: –';
           if (minHumEl)  minHumEl.textContent  = Number.isFinite(hMin) ? `Min: ${Math.round(hMin)}%` : 'Min: –';
@@ -3,7 +3,8 @@ console.log('🛠️ Initializing Socket.IO with session cookie');
 // Expose a single shared socket instance on window
 window.socket = io('/', {
     transports: ['websocket'],
-    auth: { role: 'view' }
+    // frames: this page applies dashboard snapshots/frames and acks them
+    auth: { role: 'view', frames: true }
 });
 
 window.addEventListener('beforeunload', () => {
@@ -18,6 +19,37 @@ window.socket.on('connect', () => {
     console.log('✅ Yhdistetty palvelimeen');
 })
 
+// Replay [event, payload] pairs to the page's usual handlers for each event
+function applyDashboardUpdates(updates) {
+    for (const [event, payload] of updates || []) {
+        for (const handler of window.socket.listeners(event)) {
+            try {
+                handler(payload);
+            } catch (err) {
+                console.error(`dashboard update ${event} handler failed:`, err);
+            }
+        }
+    }
+}
+window.applyDashboardUpdates = applyDashboardUpdates;
+
+// Current state, sent once per connect. Kept so pages that register their
+// handlers later (DOMContentLoaded) can replay it.
+window.dashboardSnapshot = null;
+window.socket.on('dashboard_snapshot', snapshot => {
+    if (!snapshot) return;
+    window.dashboardSnapshot = snapshot;
+    applyDashboardUpdates(snapshot.updates);
+});
+
+// Coalesced state updates; acknowledge so the next frame only carries
+// newer changes
+window.socket.on('dashboard_frame', frame => {
+    if (!frame) return;
+    applyDashboardUpdates(frame.updates);
+    window.socket.emit('dashboard_ack', { seq: frame.seq });
+});
+
 window.socket.on('server_shutdown', () => {
     console.log('🔒 Server is shutting down...');
     window.socket && window.socket.disconnect();
@@ -1,45 +1,110 @@
 // logs.js
-// Simple auto-refresh and filter (expand as needed)
+// Paged log browser backed by /api/logs (full-text search, type and date
+// filters, keyset "load more"). The first page refreshes every 30s unless
+// the user has paged further back.
 document.addEventListener('DOMContentLoaded', function() {
-  // Auto-refresh every 30s
-  setInterval(function() {
-    window.location.reload();
-  }, 30000);
+  const grid     = document.getElementById('logsGrid');
+  const emptyEl  = document.getElementById('logsEmpty');
+  const moreBtn  = document.getElementById('logsMore');
+  const form     = document.getElementById('logsSearch');
+  const queryEl  = document.getElementById('logsQuery');
+  const fromEl   = document.getElementById('logsFrom');
+  const toEl     = document.getElementById('logsTo');
+  const buttons  = document.querySelectorAll('.logs-toolbar .filter-btn');
+  const PAGE_SIZE = 100;
 
-  // Toolbar filter
-  const buttons = document.querySelectorAll('.filter-btn');
-  function applyFilter(filter) {
-    document.querySelectorAll('.log-row').forEach(function(row) {
-      if (filter === 'all') {
-        row.style.display = '';
-      } else {
-        row.style.display = row.classList.contains(filter) ? '' : 'none';
-      }
-    });
-    buttons.forEach(b => b.classList.toggle('active', b.dataset.filter === filter));
-  }
-  buttons.forEach(btn => btn.addEventListener('click', () => applyFilter(btn.dataset.filter)));
-
-  // Still allow clicking the type badge to filter
-  document.querySelectorAll('.log-type .badge').forEach(function(badge) {
-    badge.addEventListener('click', function() {
-      const type = Array.from(badge.classList).find(c => ['info','warning','error'].includes(c));
-      if (type) applyFilter(type);
-    });
-  });
-
-  // Timestamp formatting
-  document.querySelectorAll('.log-timestamp').forEach(function(tsElem) {
-    const iso = tsElem.dataset.raw || tsElem.textContent;
-    if (!iso) return;
+  let filter = 'all';
+  let nextCursor = null;
+  let pagesLoaded = 0;
+  let loading = false;
+
+  function formatTimestamp(iso) {
     try {
       const date = new Date(iso);
       if (!isNaN(date.getTime())) {
-        tsElem.textContent = date.toLocaleString('fi-FI', {
+        return date.toLocaleString('fi-FI', {
           year: 'numeric', month: '2-digit', day: '2-digit',
           hour: '2-digit', minute: '2-digit', second: '2-digit'
         });
       }
     } catch (e) {}
-  });
+    return iso || '';
+  }
+
+  function renderRow(log) {
+    const row = document.createElement('div');
+    row.className = `log-row ${log.type}`;
+
+    const ts = document.createElement('span');
+    ts.className = 'log-timestamp';
+    ts.dataset.raw = log.timestamp;
+    ts.textContent = formatTimestamp(log.timestamp);
+
+    const type = document.createElement('span');
+    type.className = 'log-type';
+    const badge = document.createElement('span');
+    badge.className = `badge ${log.type}`;
+    badge.textContent = log.type;
+    badge.addEventListener('click', () => setFilter(log.type));
+    type.appendChild(badge);
+
+    const msg = document.createElement('span');
+    msg.className = 'log-message';
+    msg.textContent = log.message;
+
+    row.append(ts, type, msg);
+    return row;
+  }
+
+  function buildUrl(cursor) {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (filter !== 'all') params.set('type', filter);
+    if (queryEl.value.trim()) params.set('q', queryEl.value.trim());
+    if (fromEl.value) params.set('from', fromEl.value);
+    if (toEl.value) params.set('to', toEl.value);
+    if (cursor) params.set('cursor', cursor);
+    return `/api/logs?${params.toString()}`;
+  }
+
+  async function load(reset) {
+    if (loading) return;
+    loading = true;
+    try {
+      const resp = await fetch(buildUrl(reset ? null : nextCursor), { headers: { 'Accept': 'application/json' } });
+      const data = await resp.json();
+      if (!resp.ok || !data.ok) throw new Error(data.message || resp.status);
+      if (reset) {
+        grid.querySelectorAll('.log-row').forEach(r => r.remove());
+        pagesLoaded = 0;
+      }
+      const frag = document.createDocumentFragment();
+      data.logs.forEach(log => frag.appendChild(renderRow(log)));
+      grid.appendChild(frag);
+      pagesLoaded += 1;
+      nextCursor = data.next_cursor;
+      moreBtn.hidden = !nextCursor;
+      emptyEl.hidden = grid.querySelector('.log-row') !== null;
+    } catch (e) {
+      console.error('logs fetch failed:', e);
+    } finally {
+      loading = false;
+    }
+  }
+
+  function setFilter(value) {
+    filter = value;
+    buttons.forEach(b => b.classList.toggle('active', b.dataset.filter === filter));
+    load(true);
+  }
+
+  buttons.forEach(btn => btn.addEventListener('click', () => setFilter(btn.dataset.filter)));
+  form.addEventListener('submit', ev => { ev.preventDefault(); load(true); });
+  moreBtn.addEventListener('click', () => load(false));
+
+  // Auto-refresh the newest page every 30s
+  setInterval(function() {
+    if (pagesLoaded <= 1 && !document.hidden) load(true);
+  }, 30000);
+
+  load(true);
 });
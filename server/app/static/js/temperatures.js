@@ -316,7 +316,15 @@ document.addEventListener('DOMContentLoaded', () => {
   renderItems(state.items);
   updateSummary(state.items);
   initSIO();
-  fetchACStatus();
+  // AC/thermostat/sleep state arrives in the connect snapshot; fall back to
+  // the REST status only if it does not show up
+  if (window.dashboardSnapshot) {
+    window.applyDashboardUpdates(window.dashboardSnapshot.updates);
+  } else {
+    let snapshotSeen = false;
+    socket.once('dashboard_snapshot', () => { snapshotSeen = true; });
+    setTimeout(() => { if (!snapshotSeen) fetchACStatus(); }, 3000);
+  }
   fetchAvgRates();
   fetchOutsideToday();
   // Periodic refresh every 5 minutes
@@ -701,7 +709,8 @@ function refreshOutsideStatsSoon(){
 
 async function fetchOutsideToday(){
   try{
-    const url = `/api/esp32_temphum?location=${encodeURIComponent(OUTSIDE_LOCATION_NAME)}`;
+    // Hourly buckets carry min/max, so today's range needs ~24 rows, not every reading
+    const url = `/api/esp32_temphum?location=${encodeURIComponent(OUTSIDE_LOCATION_NAME)}&bucket=1h`;
     const resp = await fetch(url);
     if(!resp.ok){
       console.warn('outside stats fetch failed:', resp.status);
@@ -731,14 +740,12 @@ function setOutsideStats(rows){
   for (const r of rows){
     const t = Number(r && (r.temperature_c ?? r.temperature));
     const h = Number(r && (r.humidity_pct ?? r.humidity));
-    if (Number.isFinite(t)){
-      if (t < tMin) tMin = t;
-      if (t > tMax) tMax = t;
-    }
-    if (Number.isFinite(h)){
-      if (h < hMin) hMin = h;
-      if (h > hMax) hMax = h;
-    }
+    const tLo = Number(r?.temperature_min ?? t), tHi = Number(r?.temperature_max ?? t);
+    const hLo = Number(r?.humidity_min ?? h),    hHi = Number(r?.humidity_max ?? h);
+    if (Number.isFinite(tLo) && tLo < tMin) tMin = tLo;
+    if (Number.isFinite(tHi) && tHi > tMax) tMax = tHi;
+    if (Number.isFinite(hLo) && hLo < hMin) hMin = hLo;
+    if (Number.isFinite(hHi) && hHi > hMax) hMax = hHi;
   }
   const tOk = Number.isFinite(tMin) && Number.isFinite(tMax);
   const hOk = Number.isFinite(hMin) && Number.isFinite(hMax);
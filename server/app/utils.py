@@ -110,6 +110,11 @@ def flash_error(message: str):
     flash(message, 'error')
 
 
+def flash_busy():
+    """Password hashing is saturated (KdfBusy); the user should retry."""
+    flash('Palvelin on kiireinen, yritä hetken päästä uudelleen.', 'error')
+
+
 def flash_warning(message: str):
     flash(message, 'warning')
 
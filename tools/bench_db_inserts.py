@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-insert cost of the Controller record_* write path.
+
+Compares, on a throwaway SQLite file using the real DatabaseManager:
+  - legacy:    INSERT, then SELECT ... ORDER BY id DESC LIMIT 1 (two statements)
+  - returning: INSERT ... RETURNING (one statement)
+  - lastrowid: INSERT + re-read by rowid under the write lock (SQLite < 3.35)
+
+Usage:
+  python tools/bench_db_inserts.py [--rows 2000]
+
+Only needs the standard library; app.core is registered as a bare package
+and database.py imported from it, so app/core/__init__.py (and with it
+Flask, eventlet and the rest of the app) is never executed.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CORE_DIR = REPO_ROOT / 'server' / 'app' / 'core'
+
+INSERT = ("INSERT INTO esp32_temphum (location, timestamp, ts_epoch_ms, temperature, humidity, ac_on) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+COLUMNS = "id, location, timestamp, temperature, humidity, ac_on"
+
+
+def load_database_module():
+    # database.py uses relative imports (migrations, query_stats), so it
+    # needs a parent package; register one without running its __init__.
+    package = types.ModuleType('bench_core')
+    package.__path__ = [str(CORE_DIR)]
+    sys.modules['bench_core'] = package
+    spec = importlib.util.spec_from_file_location(
+        'bench_core.database', CORE_DIR / 'database.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def params(i: int) -> tuple:
+    return ('Bench', f'2025-01-01T00:00:{i % 60:02d}+02:00', 1735682400000 + i,
+            21.0 + (i % 10) / 10, 40.0, 0)
+
+
+def run(label: str, fn, rows: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(rows):
+        fn(i)
+    per_insert_us = (time.perf_counter() - t0) / rows * 1e6
+    print(f"{label:<10} {per_insert_us:9.1f} µs/insert")
+    return per_insert_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark record_* insert paths")
+    parser.add_argument("--rows", type=int, default=2000,
+                        help="Inserts per variant (default: 2000)")
+    args = parser.parse_args()
+
+    module = load_database_module()
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = module.DatabaseManager(path)
+        print(f"SQLite {sqlite3.sqlite_version}, {args.rows} inserts per variant\n")
+
+        def legacy(i: int) -> None:
+            db.execute_query(INSERT, params(i))
+            db.fetchone(f"SELECT {COLUMNS} FROM esp32_temphum ORDER BY id DESC LIMIT 1")
+
+        def returning(i: int) -> None:
+            db.insert_returning(INSERT, params(i), COLUMNS)
+
+        def lastrowid(i: int) -> None:
+            db.SUPPORTS_RETURNING = False
+            try:
+                db.insert_returning(INSERT, params(i), COLUMNS)
+            finally:
+                del db.SUPPORTS_RETURNING
+
+        base = run("legacy", legacy, args.rows)
+        results = {"returning": run("returning", returning, args.rows)}
+        if module.DatabaseManager.SUPPORTS_RETURNING:
+            results["lastrowid"] = run("lastrowid", lastrowid, args.rows)
+        print()
+        for label, value in results.items():
+            print(f"{label}: {base / value:.2f}x vs legacy")
+        db.close()
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+
+
+if __name__ == '__main__':
+    main()
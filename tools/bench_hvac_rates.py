@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HVAC average-rate computation over 30 days of readings.
+
+Fills a throwaway SQLite file (real DatabaseManager and schema) with one
+ESP32 reading every --interval seconds plus AC on/off events, then times
+two ways of computing the cooling/heating rates over the whole range:
+
+  - rows:     fetchall -> ESP32TemperatureHumidity-style dataclasses,
+              datetime.fromisoformat per row, Python loop (the previous
+              /hvac/avg_rates_today implementation)
+  - columnar: DatabaseManager.fetch_columns -> NumPy arrays,
+              hvac_rates.avg_rates (searchsorted + vectorised sums)
+
+Both must produce the same result; the script exits non-zero otherwise.
+
+Usage:
+  python tools/bench_hvac_rates.py [--days 30] [--interval 10] [--repeat 5]
+
+Needs numpy (server/requirements.txt); Flask and eventlet are not imported.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from bench_db_inserts import load_database_module
+
+LOCATION = 'Bench'
+TZ = timezone(timedelta(hours=2))
+START = datetime(2025, 1, 1, tzinfo=TZ)
+MAX_GAP_S = 15 * 60
+
+
+@dataclass
+class Reading:
+    id: int | None
+    location: str
+    timestamp: str
+    temperature: float
+    humidity: float
+    ac_on: bool | None = None
+
+
+def populate(db, days: int, interval_s: int) -> tuple[int, int]:
+    rng = random.Random(1)
+    readings = []
+    events = []
+    on = False
+    temp = 24.0
+    next_switch = 0
+    for i in range(days * 86400 // interval_s):
+        t = START + timedelta(seconds=i * interval_s)
+        if i * interval_s >= next_switch:
+            on = not on
+            next_switch = i * interval_s + rng.randint(600, 2400)
+            events.append((t.isoformat(), int(t.timestamp() * 1000), int(on), 'bench'))
+        temp += (-0.004 if on else 0.002) * interval_s / 10 + rng.gauss(0, 0.01)
+        # Occasional outages exercise the max-gap filter
+        if rng.random() < 0.0005:
+            continue
+        readings.append((LOCATION, t.isoformat(), int(t.timestamp() * 1000),
+                         round(temp, 2), 40.0, int(on)))
+    db.executemany(
+        "INSERT INTO esp32_temphum (location, timestamp, ts_epoch_ms, temperature, humidity, ac_on) "
+        "VALUES (?, ?, ?, ?, ?, ?)", readings)
+    db.executemany(
+        "INSERT INTO ac_events (timestamp, ts_epoch_ms, is_on, source) VALUES (?, ?, ?, ?)", events)
+    return len(readings), len(events)
+
+
+def rates_rows(db, start_ms: int, end_ms: int) -> dict:
+    rows = db.fetchall(
+        "SELECT id, location, timestamp, temperature, humidity, ac_on FROM esp32_temphum "
+        "WHERE location = ? AND ts_epoch_ms >= ? AND ts_epoch_ms <= ? ORDER BY ts_epoch_ms",
+        (LOCATION, start_ms, end_ms))
+    readings = [Reading(r['id'], r['location'], r['timestamp'], r['temperature'],
+                        r['humidity'], None if r['ac_on'] is None else bool(r['ac_on']))
+                for r in rows]
+    events = [(datetime.fromisoformat(e['timestamp']), bool(e['is_on'])) for e in db.fetchall(
+        "SELECT timestamp, is_on FROM ac_events WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ? "
+        "ORDER BY ts_epoch_ms, id", (start_ms, end_ms))]
+    ev_idx = 0
+    state = None
+    points = []
+    for r in readings:
+        ts = datetime.fromisoformat(r.timestamp)
+        while ev_idx < len(events) and events[ev_idx][0] <= ts:
+            state = events[ev_idx][1]
+            ev_idx += 1
+        points.append((ts, float(r.temperature), state))
+    sums = {True: [0.0, 0.0, 0], False: [0.0, 0.0, 0]}
+    for (t0, T0, s0), (t1, T1, _) in zip(points, points[1:]):
+        if s0 is None:
+            continue
+        dt = (t1 - t0).total_seconds()
+        if 0 < dt <= MAX_GAP_S:
+            acc = sums[s0]
+            acc[0] += dt
+            acc[1] += T1 - T0
+            acc[2] += 1
+    return {
+        'time_on_s': sums[True][0], 'time_off_s': sums[False][0],
+        'pairs_on': sums[True][2], 'pairs_off': sums[False][2],
+        'cooling_rate_c_per_h': sums[True][1] / sums[True][0] * 3600.0 if sums[True][0] else None,
+        'heating_rate_c_per_h': sums[False][1] / sums[False][0] * 3600.0 if sums[False][0] else None,
+    }
+
+
+def rates_columnar(db, hvac_rates, start_ms: int, end_ms: int) -> dict:
+    readings = db.fetch_columns(
+        "SELECT ts_epoch_ms, temperature FROM esp32_temphum "
+        "WHERE location = ? AND ts_epoch_ms >= ? AND ts_epoch_ms <= ? ORDER BY ts_epoch_ms",
+        (LOCATION, start_ms, end_ms), (('ts_ms', 'i8'), ('temperature', 'f8')))
+    events = db.fetch_columns(
+        "SELECT ts_epoch_ms, is_on FROM ac_events WHERE ts_epoch_ms >= ? AND ts_epoch_ms <= ? "
+        "ORDER BY ts_epoch_ms, id", (start_ms, end_ms), (('ts_ms', 'i8'), ('is_on', '?')))
+    return hvac_rates.avg_rates(readings['ts_ms'], readings['temperature'],
+                                events['ts_ms'], events['is_on'], None)
+
+
+def best_of(fn, repeat: int) -> tuple[float, dict]:
+    best = math.inf
+    result: dict = {}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, result
+
+
+def same(a: dict, b: dict) -> bool:
+    for key in ('time_on_s', 'time_off_s', 'pairs_on', 'pairs_off',
+                'cooling_rate_c_per_h', 'heating_rate_c_per_h'):
+        x, y = a[key], b[key]
+        if (x is None) != (y is None):
+            return False
+        if x is not None and not math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-9):
+            return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HVAC rate computation")
+    parser.add_argument("--days", type=int, default=30, help="Days of data (default: 30)")
+    parser.add_argument("--interval", type=int, default=10,
+                        help="Seconds between readings (default: 10)")
+    parser.add_argument("--repeat", type=int, default=5, help="Best-of runs (default: 5)")
+    args = parser.parse_args()
+
+    module = load_database_module()
+    hvac_rates = importlib.import_module('bench_core.hvac_rates')
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = module.DatabaseManager(path)
+        db.query_stats.configure(enabled=False)
+        n_readings, n_events = populate(db, args.days, args.interval)
+        start_ms = int(START.timestamp() * 1000)
+        end_ms = start_ms + args.days * 86_400_000
+        print(f"{args.days} days: {n_readings} readings, {n_events} AC events\n")
+
+        rows_ms, expected = best_of(lambda: rates_rows(db, start_ms, end_ms), args.repeat)
+        cols_ms, got = best_of(
+            lambda: rates_columnar(db, hvac_rates, start_ms, end_ms), args.repeat)
+        print(f"{'rows':<10} {rows_ms:9.1f} ms")
+        print(f"{'columnar':<10} {cols_ms:9.1f} ms")
+        print(f"\ncolumnar: {rows_ms / cols_ms:.1f}x vs rows")
+        if not same(expected, got):
+            print(f"\nResults differ:\n  rows:     {expected}\n  columnar: {got}")
+            sys.exit(1)
+        print(f"cooling {got['cooling_rate_c_per_h']:.3f} °C/h, "
+              f"heating {got['heating_rate_c_per_h']:.3f} °C/h (identical)")
+        db.close()
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of broadcasting one Socket.IO event to N browser views.
+
+Uses a real python-socketio Server whose message-queue manager pickles and
+counts each publish (what the Redis manager does before PUBLISH) instead of
+talking to Redis, and whose transport only encodes outgoing packets. For
+each subscriber count it times:
+
+  - per-sid:  socketio.emit(event, payload, to=sid) for every tracked sid
+              (the previous SocketEventHandler.emit_to_views)
+  - room:     one socketio.emit(event, payload, to='views')
+
+and reports µs per event plus message-queue publishes per event. Pass
+--publish-us to add a simulated Redis round-trip per publish.
+
+Usage:
+  python tools/bench_socketio_emit.py [--subscribers 1,4,12,50,200]
+                                      [--events 2000] [--publish-us 0]
+
+Needs python-socketio (server/requirements.txt); Flask, eventlet and Redis
+are not used.
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import time
+
+import socketio
+
+EVENT = 'esp32_temphum'
+PAYLOAD = {
+    'location': 'Tietokonepöytä',
+    'temperature': 22.4,
+    'humidity': 41.2,
+    'ac_on': True,
+}
+ROOM = 'views'
+
+
+class CountingQueueManager(socketio.PubSubManager):
+    """Message-queue manager that serializes publishes but never sends them."""
+
+    name = 'bench'
+
+    def __init__(self, publish_us: float = 0.0) -> None:
+        super().__init__(write_only=True)
+        self.publish_s = publish_us / 1e6
+        self.publishes = 0
+        self.published_bytes = 0
+
+    def _publish(self, data):
+        self.published_bytes += len(pickle.dumps(data))
+        self.publishes += 1
+        if self.publish_s:
+            deadline = time.perf_counter() + self.publish_s
+            while time.perf_counter() < deadline:
+                pass
+
+
+def make_server(subscribers: int, publish_us: float):
+    mgr = CountingQueueManager(publish_us)
+    server = socketio.Server(client_manager=mgr, async_mode='threading')
+    sent = [0]
+
+    def _send_eio_packet(eio_sid, pkt):
+        pkt.encode()
+        sent[0] += 1
+
+    server._send_eio_packet = _send_eio_packet  # type: ignore[method-assign]
+    sids = []
+    for i in range(subscribers):
+        sid = mgr.connect(f'eio-{i}', '/')
+        mgr.enter_room(sid, '/', ROOM)
+        sids.append(sid)
+    return server, mgr, sids, sent
+
+
+def run(subscribers: int, events: int, publish_us: float) -> None:
+    results = {}
+    for mode in ('per-sid', 'room'):
+        server, mgr, sids, sent = make_server(subscribers, publish_us)
+        t0 = time.perf_counter()
+        for _ in range(events):
+            if mode == 'room':
+                server.emit(EVENT, PAYLOAD, to=ROOM)
+            else:
+                for sid in list(sids):
+                    server.emit(EVENT, PAYLOAD, to=sid)
+        elapsed = time.perf_counter() - t0
+        if sent[0] != subscribers * events:
+            raise SystemExit(f"{mode}: delivered {sent[0]} packets, expected {subscribers * events}")
+        results[mode] = (elapsed / events * 1e6, mgr.publishes / events, mgr.published_bytes / events)
+    per_sid, room = results['per-sid'], results['room']
+    print(f"{subscribers:>6} {per_sid[0]:10.1f} {room[0]:10.1f} {per_sid[0] / room[0]:7.1f}x"
+          f" {per_sid[1]:8.0f} {room[1]:6.0f} {per_sid[2]:9.0f} {room[2]:7.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Socket.IO broadcast cost vs subscriber count")
+    parser.add_argument("--subscribers", default="1,4,12,50,200",
+                        help="Comma-separated subscriber counts (default: 1,4,12,50,200)")
+    parser.add_argument("--events", type=int, default=2000, help="Events per run (default: 2000)")
+    parser.add_argument("--publish-us", type=float, default=0.0,
+                        help="Simulated message-queue round-trip per publish in µs (default: 0)")
+    args = parser.parse_args()
+
+    print(f"{'subs':>6} {'per-sid µs':>10} {'room µs':>10} {'speedup':>8}"
+          f" {'pub/evt':>8} {'pub':>6} {'bytes/evt':>9} {'bytes':>7}")
+    for n in (int(x) for x in args.subscribers.split(',') if x.strip()):
+        run(n, args.events, args.publish_us)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: rate-limit whitelist lookup cost.
+
+Compares, for a whitelist of --entries items (exact IPv4/IPv6 addresses,
+"a.b.c.*" wildcards and IPv4/IPv6 CIDR ranges):
+
+  - legacy:   the previous request filter loop (string prefix checks and
+              ip_network() re-parsed for every CIDR entry on every request)
+  - compiled: app/ip_whitelist.IPWhitelist prefix tables, uncached lookup
+  - memo:     IPWhitelist membership test including its per-address memo
+              (what the filter does for repeat clients)
+
+Both implementations must agree on every address; the script exits non-zero
+otherwise.
+
+Usage:
+  python tools/bench_whitelist.py [--entries 150] [--lookups 20000]
+
+Only needs the standard library; ip_whitelist.py is loaded directly so Flask
+and the rest of the app are not imported.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from ipaddress import ip_address, ip_network
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+IP_WHITELIST_PY = REPO_ROOT / 'server' / 'app' / 'ip_whitelist.py'
+
+
+def load_whitelist_module():
+    spec = importlib.util.spec_from_file_location('bench_ip_whitelist', IP_WHITELIST_PY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def legacy_match(addr: str, wl: list) -> bool:
+    for item in wl:
+        s = str(item).strip()
+        if not s:
+            continue
+        if s.endswith('.*'):
+            if addr.startswith(s[:-1]):
+                return True
+            continue
+        if '/' in s:
+            try:
+                if ip_address(addr) in ip_network(s, strict=False):
+                    return True
+                continue
+            except Exception:
+                pass
+        if addr == s:
+            return True
+    return False
+
+
+def make_entries(n: int, rng: random.Random) -> list[str]:
+    entries: list[str] = []
+    for i in range(n):
+        kind = i % 6
+        if kind in (0, 1):
+            entries.append(f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}")
+        elif kind == 2:
+            entries.append(f"172.{rng.randrange(16, 32)}.{rng.randrange(256)}.*")
+        elif kind == 3:
+            entries.append(f"192.168.{rng.randrange(256)}.0/{rng.choice((24, 26, 28))}")
+        elif kind == 4:
+            entries.append(f"2001:db8:{rng.randrange(65536):x}::/48")
+        else:
+            entries.append(f"2001:db8:ffff::{rng.randrange(65536):x}")
+    return entries
+
+
+def make_addresses(entries: list[str], n: int, rng: random.Random) -> list[str]:
+    addrs: list[str] = []
+    for _ in range(n):
+        if rng.random() < 0.3:
+            e = rng.choice(entries)
+            if e.endswith('.*'):
+                addrs.append(e[:-1] + str(rng.randrange(256)))
+            elif '/' in e:
+                net = ip_network(e, strict=False)
+                addrs.append(str(net.network_address + rng.randrange(min(net.num_addresses, 1 << 16))))
+            else:
+                addrs.append(e)
+        elif rng.random() < 0.8:
+            addrs.append(f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}")
+        else:
+            addrs.append(f"2a00:{rng.randrange(65536):x}::{rng.randrange(65536):x}")
+    return addrs
+
+
+def timed(label: str, fn, addrs: list[str]) -> float:
+    t0 = time.perf_counter()
+    for a in addrs:
+        fn(a)
+    per_lookup_us = (time.perf_counter() - t0) / len(addrs) * 1e6
+    print(f"{label:<10} {per_lookup_us:9.2f} µs/lookup")
+    return per_lookup_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the rate-limit whitelist filter")
+    parser.add_argument("--entries", type=int, default=150, help="Whitelist size (default: 150)")
+    parser.add_argument("--lookups", type=int, default=20000, help="Lookups per variant (default: 20000)")
+    args = parser.parse_args()
+
+    module = load_whitelist_module()
+    rng = random.Random(1)
+    entries = make_entries(args.entries, rng)
+    addrs = make_addresses(entries, args.lookups, rng)
+    compiled = module.IPWhitelist(entries)
+
+    mismatches = [a for a in addrs if legacy_match(a, entries) != compiled._lookup(a)]
+    hits = sum(1 for a in addrs if compiled._lookup(a))
+    print(f"{len(entries)} entries, {len(addrs)} lookups ({hits} whitelisted)\n")
+
+    legacy = timed("legacy", lambda a: legacy_match(a, entries), addrs)
+    uncached = timed("compiled", compiled._lookup, addrs)
+    memo = timed("memo", compiled.__contains__, addrs)
+    print()
+    print(f"compiled: {legacy / uncached:.0f}x vs legacy")
+    print(f"memo:     {legacy / memo:.0f}x vs legacy")
+    if mismatches:
+        print(f"\n{len(mismatches)} address(es) differ, e.g. {mismatches[:5]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()